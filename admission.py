@@ -0,0 +1,74 @@
+# Admission control for the hot request paths under overload
+# Each guarded request takes one of `capacity` slots before any work starts.
+# When all slots are taken it waits up to `max_queue_seconds` for one, and the
+# wait is its queueing latency, smoothed into an exponentially weighted
+# average. Every request is given a load level:
+#   NORMAL    full service
+#   DEGRADED  in-flight requests at `degrade_in_flight` or more, or smoothed
+#             queueing latency above `degrade_queue_seconds`: routes answer
+#             from cheaper tiers (lookup table or linear model, stale cached data)
+#   SHED      no slot within `max_queue_seconds`: routes answer with stale
+#             data if they have any, and otherwise 503 with Retry-After
+# Because admission happens before any work, overload shows up as a bounded
+# queue and cheaper answers instead of every request getting slower.
+import threading
+import time
+
+NORMAL, DEGRADED, SHED = 'normal', 'degraded', 'shed'
+
+
+class AdmissionController:
+    '''Bounded concurrency with queueing-latency tracking and graded load levels'''
+
+    def __init__(self, capacity=32, degrade_in_flight=24, degrade_queue_seconds=0.05,
+                 max_queue_seconds=0.5, retry_after=5, smoothing=0.2):
+        self.capacity = capacity
+        self.degrade_in_flight = degrade_in_flight
+        self.degrade_queue_seconds = degrade_queue_seconds
+        self.max_queue_seconds = max_queue_seconds
+        self.retry_after = retry_after
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.queue_seconds = 0.0
+        self.counts = {NORMAL: 0, DEGRADED: 0, SHED: 0}
+        self._slots = threading.BoundedSemaphore(capacity)
+        self._lock = threading.Lock()
+
+    def admit(self):
+        '''Wait for a slot and grade the load: (level, seconds waited).
+
+        NORMAL and DEGRADED hold a slot until release(); SHED holds none.
+        '''
+        started = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.max_queue_seconds)
+        waited = time.monotonic() - started
+
+        with self._lock:
+            self.queue_seconds += self.smoothing * (waited - self.queue_seconds)
+            if not acquired:
+                level = SHED
+            else:
+                self.in_flight += 1
+                overloaded = (self.in_flight >= self.degrade_in_flight
+                              or self.queue_seconds > self.degrade_queue_seconds)
+                level = DEGRADED if overloaded else NORMAL
+            self.counts[level] += 1
+        return level, waited
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def status(self):
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'queue_ms': round(self.queue_seconds * 1000, 2),
+                'degrade_in_flight': self.degrade_in_flight,
+                'degrade_queue_ms': self.degrade_queue_seconds * 1000,
+                'max_queue_ms': self.max_queue_seconds * 1000,
+                'retry_after': self.retry_after,
+                'requests': dict(self.counts),
+            }
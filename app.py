@@ -1,27 +1,133 @@
-from flask import Flask, jsonify, request, render_template_string
+from flask import Flask, Response, g, request, render_template_string
 from flask_cors import CORS
-import joblib
 import numpy as np
 import pandas as pd
-import json
 import requests
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import calendar
+import hmac
+from collections import OrderedDict
+from functools import lru_cache
+import threading
 import random
+import os
+import time
+
+from serialization import json_response, bytes_response, encode_object, StaticFragments
+from timeseries import SERIES_FORMATS, SERIES_HEADERS, columnar_payload, binary_body
+from metrics import MetricsRegistry
+from profiling import RequestProfiler
+from admission import AdmissionController, NORMAL, DEGRADED, SHED
+from features import FeatureAssembler, REQUIRED_FIELDS, feature_group, station_key
+from model_export import EXPORT_PATH, load_models
+from lookup_table import LUT_PATH, LookupTable
+from geo import IDWGrid, StationIndex, DELHI_NCR_BOUNDS, score_routes, valid_coordinates
+from scenarios import INTERVENTIONS, POLLUTANTS, SOURCES, ScenarioEngine, history_matrix, parse_scenario
+from apportionment import apportion_sources
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all domains
+CORS(app, expose_headers=SERIES_HEADERS)  # Enable CORS for all domains
+
+# Request, model and cache metrics exposed on /metrics
+metrics = MetricsRegistry()
+metrics.counter('airsense_requests_total', 'HTTP requests by method, route and status')
+metrics.histogram('airsense_request_duration_seconds', 'HTTP request latency by method and route')
+metrics.counter('airsense_errors_total', 'Unhandled and reported errors by route and exception type')
+metrics.histogram('airsense_model_inference_seconds', 'Model predict() latency by model')
+metrics.counter('airsense_cache_requests_total', 'Cache lookups by cache and result')
+metrics.counter('airsense_admission_total', 'Admission decisions on guarded routes by route and load level')
+metrics.histogram('airsense_admission_queue_seconds', 'Time guarded requests waited for an admission slot')
+
+# Opt-in request profiling, enabled per request with an X-Profile header or
+# for a sampled share of traffic through /admin/profile
+profiler = RequestProfiler()
+# Admin endpoints and X-Profile are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get('AIRSENSE_ADMIN_TOKEN')
 
-# Load the trained model and features
+# Admission control for the routes that spike during smog episodes: past the
+# degrade thresholds /api/predict answers from the lookup table or linear model
+# and station data is served stale; 503 + Retry-After only when no slot frees up
+admission = AdmissionController(
+    capacity=int(os.environ.get('AIRSENSE_MAX_IN_FLIGHT', 32)),
+    degrade_in_flight=int(os.environ.get('AIRSENSE_DEGRADE_IN_FLIGHT', 24)),
+    degrade_queue_seconds=float(os.environ.get('AIRSENSE_DEGRADE_QUEUE_MS', 50)) / 1000,
+    max_queue_seconds=float(os.environ.get('AIRSENSE_MAX_QUEUE_MS', 500)) / 1000)
+ADMISSION_ROUTES = {'/api/predict', '/api/current', '/api/stations'}
+
+# AIRSENSE_FLOAT32=1 serves from float32 feature matrices and tree arrays:
+# half the memory traffic for batch and grid scoring, branching unchanged
+# (scikit-learn trees compare float32 features anyway)
+SERVING_DTYPE = np.float32 if os.environ.get('AIRSENSE_FLOAT32', '0') == '1' else np.float64
+
+# Load the trained models and features from the portable export written by
+# script_1.py (plain arrays evaluated with NumPy: no pickles, no scikit-learn)
 try:
-    model = joblib.load('model_gradient_boosting.pkl')
-    with open('feature_columns.json', 'r') as f:
-        feature_columns = json.load(f)
-    print("✅ Model and features loaded successfully")
+    exported = load_models(EXPORT_PATH, dtype=SERVING_DTYPE)
+    model = exported.point
+    feature_columns = exported.feature_columns
+    print(f"✅ Model and features loaded successfully ({exported.meta['trained_with']} export)")
 except Exception as e:
     print(f"❌ Error loading model: {e}")
+    exported = None
     model = None
     feature_columns = []
 
+assembler = FeatureAssembler(feature_columns, dtype=SERVING_DTYPE)
+
+# Quantile models give prediction intervals; the point model and every
+# quantile are evaluated together in one pass over flat tree arrays
+if exported and exported.quantiles:
+    quantiles = exported.quantiles
+    quantile_labels = [f'p{int(round(q * 100))}' for q in quantiles]
+    interval_forest = exported.forest
+    print(f"✅ Quantile models loaded: {', '.join(quantile_labels)}")
+else:
+    print("⚠️ Quantile models not available, predictions have no interval")
+    quantiles = []
+    quantile_labels = []
+    interval_forest = None
+
+# Linear regression with its scaler folded into the coefficients: one dot
+# product per request, served for /api/predict?model=linear as the cheap fallback
+linear_model = exported.linear if exported else None
+if linear_model:
+    print("✅ Linear fallback model loaded (scaler folded)")
+
+# Requests that only set the lookup-table fields (the common case) are answered
+# from the distilled table built by lookup_table.py; the rest use the models
+try:
+    lookup_table = LookupTable.load(LUT_PATH, assembler) if model else None
+    if lookup_table:
+        print(f"✅ Prediction lookup table loaded: {lookup_table.table.nbytes / 2**20:.0f} MiB mapped")
+except Exception as e:
+    print(f"⚠️ Prediction lookup table not available, every request uses the models: {e}")
+    lookup_table = None
+
+# Explanations walk the point model's flattened trees; its impurity importances
+# are global and computed once here
+explain_forest = interval_forest or (model.forest if model else None)
+FEATURE_GROUP_NAMES = sorted({feature_group(column) for column in feature_columns})
+# (feature, group) indicator so group totals are one matrix product
+FEATURE_GROUP_MATRIX = np.array([[feature_group(column) == name for name in FEATURE_GROUP_NAMES]
+                                 for column in feature_columns], dtype=np.float64).reshape(-1, len(FEATURE_GROUP_NAMES))
+GLOBAL_IMPORTANCE = sorted(
+    ({'feature': column, 'group': feature_group(column), 'importance': round(float(importance), 4)}
+     for column, importance in zip(feature_columns, model.feature_importances_ if model else [])),
+    key=lambda item: -item['importance'])
+MAX_EXPLAIN_RECORDS = 10000
+
+# Load the historical readings once for the history endpoint
+try:
+    history = pd.read_csv('delhi_air_quality_2024.csv', parse_dates=['timestamp'])
+    history = history.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    history_epoch = history['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    print(f"✅ Historical data loaded: {len(history)} readings")
+except Exception as e:
+    print(f"❌ Error loading historical data: {e}")
+    history = None
+    history_epoch = None
+
 # Sample Delhi stations data
 DELHI_STATIONS = [
     {"id": "anand_vihar", "name": "Anand Vihar", "lat": 28.6469, "lng": 77.3151, "zone": "East"},
@@ -34,20 +140,67 @@ DELHI_STATIONS = [
     {"id": "shadipur", "name": "Shadipur", "lat": 28.6506, "lng": 77.1572, "zone": "West"}
 ]
 
+STATION_LATS = np.array([station['lat'] for station in DELHI_STATIONS])
+STATION_LNGS = np.array([station['lng'] for station in DELHI_STATIONS])
+STATION_INDEX = StationIndex(STATION_LATS, STATION_LNGS)
+
+# Static station metadata is JSON-encoded once and spliced into responses
+STATION_STATIC_FIELDS = ('id', 'name', 'lat', 'lng', 'zone')
+STATION_FRAGMENTS = StaticFragments(DELHI_STATIONS, STATION_STATIC_FIELDS)
+MAX_NEAREST_K = 20
+MAX_BATCH_LOCATIONS = 10000
+
+# Station readings are refreshed once per reading cycle and shared by all
+# endpoints, so the map, the grid and the station list agree with each other
+READING_CYCLE_SECONDS = 60
+MAX_GRID_SIZE = 200
+GRID_CACHE_SIZE = 16
+
+# Route scoring samples the full-resolution city grid every ROUTE_SPACING_KM
+ROUTE_GRID_SIZE = 100
+ROUTE_SPACING_KM = 0.1
+MAX_ROUTES = 100
+MAX_ROUTE_POINTS = 5000
+# Samples per request (ROUTE_SPACING_KM each): 50,000 km of routes in total
+MAX_ROUTE_SAMPLES = 500_000
+
+MAX_FORECAST_HOURS = 168
+MAX_SCENARIOS = 100
+
+# Dashboard name and colour for each apportioned source
+SOURCE_DISPLAY = {
+    'vehicles': ('Vehicular Emissions', '#FF6B6B'),
+    'industry': ('Industrial Pollution', '#4ECDC4'),
+    'dust': ('Construction & Dust', '#45B7D1'),
+    'stubble': ('Stubble Burning', '#96CEB4'),
+}
+SOURCES_RETRY_SECONDS = 5
+HISTORY_FIELDS = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3', 'temperature', 'humidity', 'wind_speed', 'aqi']
+
+_reading_lock = threading.Lock()
+_reading_cycle = {'key': None, 'timestamp': None, 'readings': None}
+# Last /api/current answer, served stale under load
+_current_snapshot = {'timestamp': None, 'payload': None}
+_grid_cache = OrderedDict()
+# Scenario engine and intervention effects, built once on first use or by the startup warm-up
+_scenario_lock = threading.RLock()
+_scenarios = {'engine': None, 'effects': None}
+
+# AQI category upper bounds with their color and status, lowest first
+AQI_CATEGORIES = [
+    {'max': 50, 'color': '#00e400', 'status': 'Good'},
+    {'max': 100, 'color': '#ffff00', 'status': 'Moderate'},
+    {'max': 150, 'color': '#ff7e00', 'status': 'Unhealthy for Sensitive Groups'},
+    {'max': 200, 'color': '#ff0000', 'status': 'Unhealthy'},
+    {'max': 300, 'color': '#8f3f97', 'status': 'Very Unhealthy'},
+    {'max': None, 'color': '#7e0023', 'status': 'Hazardous'}
+]
+
 def get_aqi_color_and_status(aqi):
     '''Return color code and status based on AQI value'''
-    if aqi <= 50:
-        return "#00e400", "Good"
-    elif aqi <= 100:
-        return "#ffff00", "Moderate"  
-    elif aqi <= 150:
-        return "#ff7e00", "Unhealthy for Sensitive Groups"
-    elif aqi <= 200:
-        return "#ff0000", "Unhealthy"
-    elif aqi <= 300:
-        return "#8f3f97", "Very Unhealthy"
-    else:
-        return "#7e0023", "Hazardous"
+    for category in AQI_CATEGORIES:
+        if category['max'] is None or aqi <= category['max']:
+            return category['color'], category['status']
 
 def generate_realistic_pollution_data(hour, month, base_station="Anand Vihar"):
     '''Generate realistic pollution data based on Delhi patterns'''
@@ -105,6 +258,285 @@ def generate_realistic_pollution_data(hour, month, base_station="Anand Vihar"):
         'aqi': int(aqi)
     }
 
+def route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def record_cache(cache, hit, stale=False):
+    '''Count a cache lookup as a hit, a miss, or an outdated entry served stale under load'''
+    result = 'stale' if stale else 'hit' if hit else 'miss'
+    metrics.inc('airsense_cache_requests_total', (('cache', cache), ('result', result)))
+
+def run_model(name, predict, X):
+    '''Call a model's predict function, recording its latency'''
+    started = time.perf_counter()
+    prediction = predict(X)
+    metrics.observe('airsense_model_inference_seconds', time.perf_counter() - started, (('model', name),))
+    return prediction
+
+def predict_with_interval(X):
+    '''Point prediction and sorted quantile bounds (n_rows, n_quantiles) in one pass'''
+    raw = run_model('gradient_boosting_quantiles', interval_forest.predict, X)
+    # Independently fitted quantiles can cross; sorting restores p10 <= p50 <= p90
+    return raw[:, 0], np.sort(raw[:, 1:], axis=1)
+
+def is_admin(token):
+    '''Admin access needs the configured token; without one there is no admin access'''
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+    profile_header = request.headers.get('X-Profile')
+    if (profile_header and is_admin(profile_header)) or profiler.should_profile():
+        g.profiling = True
+        profiler.start(f'{request.method} {route_label()}')
+
+@app.before_request
+def admit_request():
+    '''Take an admission slot on guarded routes and grade the load for the view'''
+    route = route_label()
+    if route not in ADMISSION_ROUTES:
+        return None
+    g.load_level, waited = admission.admit()
+    metrics.observe('airsense_admission_queue_seconds', waited)
+    metrics.inc('airsense_admission_total', (('route', route), ('level', g.load_level)))
+    return None
+
+@app.after_request
+def mark_load_level(response):
+    level = g.get('load_level', NORMAL)
+    if level != NORMAL:
+        response.headers['X-AirSense-Load'] = level
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = route_label()
+        metrics.observe('airsense_request_duration_seconds', time.perf_counter() - started,
+                        (('method', request.method), ('route', route)))
+        metrics.inc('airsense_requests_total',
+                    (('method', request.method), ('route', route), ('status', str(response.status_code))))
+    return response
+
+@app.teardown_request
+def record_request_error(exc):
+    if g.get('profiling'):
+        profiler.stop()
+    if exc is not None:
+        metrics.inc('airsense_errors_total', (('route', route_label()), ('type', type(exc).__name__)))
+    if g.get('load_level') in (NORMAL, DEGRADED):
+        admission.release()
+
+def overload_response():
+    '''Last resort for shed requests with no stale answer to give'''
+    return json_response({'error': 'Service overloaded, please retry'}, 503,
+                         headers={'Retry-After': str(admission.retry_after)})
+
+def stale_headers(reading_time, now):
+    '''Headers marking a response as cached data from an earlier reading'''
+    return {'X-AirSense-Stale': 'true', 'Age': str(max(0, int((now - reading_time).total_seconds())))}
+
+def reading_cycle_key(now):
+    return int(now.timestamp()) // READING_CYCLE_SECONDS
+
+def get_reading_cycle(now=None, allow_stale=False):
+    '''Return (cycle_key, timestamp, readings) for the current reading cycle, or
+    with allow_stale the last cycle built (if any) without refreshing it'''
+    now = now or datetime.now()
+    key = reading_cycle_key(now)
+
+    with _reading_lock:
+        current = _reading_cycle['key'] == key
+        stale = not current and allow_stale and _reading_cycle['readings'] is not None
+        record_cache('reading_cycle', current, stale)
+        if not current and not stale:
+            _reading_cycle['readings'] = [
+                generate_realistic_pollution_data(now.hour, now.month, station['name'])
+                for station in DELHI_STATIONS
+            ]
+            _reading_cycle['timestamp'] = now
+            _reading_cycle['key'] = key
+        return _reading_cycle['key'], _reading_cycle['timestamp'], _reading_cycle['readings']
+
+def series_response(fmt, epoch, columns, rows):
+    '''Encode a time series as rows (default), columnar arrays or packed float32'''
+    if fmt == 'binary':
+        body, headers = binary_body(epoch, columns)
+        return bytes_response(body, 'application/octet-stream', headers=headers)
+    if fmt == 'columnar':
+        return json_response(columnar_payload(epoch, columns, AQI_CATEGORIES))
+    return json_response(rows())
+
+def station_reading(data, reading_time):
+    '''Per-cycle (non-static) fields of a station entry'''
+    color, status = get_aqi_color_and_status(data['aqi'])
+    return {
+        'aqi': data['aqi'],
+        'pm2_5': data['pm2_5'],
+        'pm10': data['pm10'],
+        'status': status,
+        'color': color,
+        'timestamp': reading_time.isoformat()
+    }
+
+def station_payload(station, data, reading_time):
+    '''Combine static station metadata with its reading for the current cycle'''
+    payload = {field: station[field] for field in STATION_STATIC_FIELDS}
+    payload.update(station_reading(data, reading_time))
+    return payload
+
+def parse_bbox(value):
+    '''Parse a "south,west,north,east" query value; raises ValueError if malformed'''
+    bounds = tuple(float(v) for v in value.split(','))
+    if (len(bounds) != 4 or not valid_coordinates(bounds[0::2], bounds[1::2]).all()
+            or bounds[0] >= bounds[2] or bounds[1] >= bounds[3]):
+        raise ValueError('bbox must be south,west,north,east')
+    return bounds
+
+@lru_cache(maxsize=GRID_CACHE_SIZE)
+def get_idw_grid(bounds, rows, cols, power):
+    '''Build (once per grid spec) the IDW interpolator over the station layout'''
+    return IDWGrid(STATION_LATS, STATION_LNGS, bounds, rows, cols, power)
+
+def build_scenario_engine():
+    '''Scenario engine over the historical feature matrix'''
+    try:
+        apportionment, _ = apportionment_job.result()
+        station_names, attribution = apportionment.stations, apportionment.attribution
+    except Exception:
+        app.logger.exception('Source apportionment failed, scenarios use the default source shares')
+        station_names, attribution = sorted(history['station'].unique()), None
+    X, stations, months, hours = history_matrix(history, assembler, station_names)
+    return ScenarioEngine(lambda batch: run_model('gradient_boosting', model.predict, batch),
+                          X, stations, months, hours, feature_columns, station_names, attribution)
+
+def get_scenario_engine():
+    '''Build (once) the scenario engine over the historical feature matrix'''
+    if _scenarios['engine'] is None:
+        with _scenario_lock:
+            # Checked again under the lock so concurrent first requests build (and pool) one engine
+            if _scenarios['engine'] is None:
+                _scenarios['engine'] = build_scenario_engine()
+    return _scenarios['engine']
+
+def get_intervention_effects():
+    '''Modelled outcome of each known intervention over its active months'''
+    if not model or history is None:
+        return {}
+    if _scenarios['effects'] is None:
+        with _scenario_lock:
+            if _scenarios['effects'] is None:
+                names = list(INTERVENTIONS)
+                results = get_scenario_engine().run([parse_scenario({'interventions': [name]}) for name in names])
+                _scenarios['effects'] = dict(zip(names, results))
+    return _scenarios['effects']
+
+def build_source_tables():
+    '''Apportion the history and pre-build the /api/policy/sources payload per station and month'''
+    apportionment = apportion_sources(history)
+    stubble = apportionment.pm25_share[-1, :, SOURCES.index('stubble')]
+    peak = np.argsort(stubble)[::-1][:2] + 1
+    note = f"Stubble burning share is highest in {' and '.join(calendar.month_abbr[m] for m in peak)}"
+
+    tables = {}
+    for s, name in enumerate(apportionment.stations + [None]):
+        for month in range(1, 13):
+            shares = apportionment.pm25_share[s, month - 1]
+            tables[(station_key(name) if name else None, month)] = {
+                'sources': [{
+                    'name': SOURCE_DISPLAY[source][0],
+                    'source': source,
+                    'contribution': round(float(share), 1),
+                    'color': SOURCE_DISPLAY[source][1],
+                    'profile': dict(zip(POLLUTANTS, np.round(apportionment.profiles[i], 3).tolist()))
+                } for i, (source, share) in enumerate(zip(SOURCES, shares))],
+                'station': name or 'All stations',
+                'month': month,
+                'pollutant': 'pm2_5',
+                'method': f'Non-negative matrix factorisation ({len(SOURCES)} factors, 2024 hourly readings)',
+                'explained_variance': round(apportionment.explained_variance, 4),
+                'seasonal_note': note
+            }
+    return apportionment, tables
+
+# Source apportionment runs once in the background at startup
+_apportionment_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='apportionment')
+apportionment_job = _apportionment_pool.submit(build_source_tables) if history is not None else None
+# then warms the scenario engine, so the first /api/policy/interventions request does not build it
+scenario_warmup = _apportionment_pool.submit(get_intervention_effects) if history is not None else None
+
+def get_aqi_grid(bounds=DELHI_NCR_BOUNDS, rows=40, cols=40, power=2.0):
+    '''Return (interpolator, timestamp, aqi grid) for the current reading cycle'''
+    key, timestamp, readings = get_reading_cycle()
+    cache_key = (key, bounds, rows, cols, power)
+    interpolator = get_idw_grid(bounds, rows, cols, power)
+
+    with _reading_lock:
+        grid = _grid_cache.get(cache_key)
+        record_cache('aqi_grid', grid is not None)
+        if grid is not None:
+            _grid_cache.move_to_end(cache_key)
+            return interpolator, timestamp, grid
+
+    grid = interpolator.interpolate([reading['aqi'] for reading in readings])
+    with _reading_lock:
+        _grid_cache[cache_key] = grid
+        while len(_grid_cache) > GRID_CACHE_SIZE:
+            _grid_cache.popitem(last=False)
+    return interpolator, timestamp, grid
+
+def idw_cache_samples():
+    info = get_idw_grid.cache_info()
+    return [('airsense_cache_requests_total', (('cache', 'idw_weights'), ('result', 'hit')), info.hits),
+            ('airsense_cache_requests_total', (('cache', 'idw_weights'), ('result', 'miss')), info.misses)]
+
+metrics.add_collector(idw_cache_samples)
+
+@app.route('/metrics')
+def get_metrics():
+    '''Prometheus metrics for this worker'''
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profile', methods=['GET', 'POST', 'DELETE'])
+def admin_profile():
+    '''Configure request sampling (POST), fetch collapsed stacks (GET) or reset (DELETE)'''
+    if not is_admin(request.headers.get('X-Admin-Token')):
+        return json_response({'error': 'Forbidden'}), 403
+
+    if request.method == 'GET':
+        if request.args.get('format') == 'status':
+            return json_response(profiler.status())
+        return Response(profiler.collapsed(), mimetype='text/plain')
+
+    if request.method == 'DELETE':
+        profiler.reset()
+        return json_response(profiler.status())
+
+    data = request.json or {}
+    try:
+        sample_rate = float(data.get('sample_rate', profiler.sample_rate))
+    except (TypeError, ValueError):
+        return json_response({'error': 'sample_rate must be a number'}), 400
+    if not 0 <= sample_rate <= 1:
+        return json_response({'error': 'sample_rate must be between 0 and 1'}), 400
+
+    profiler.sample_rate = sample_rate
+    if data.get('reset'):
+        profiler.reset()
+    return json_response(profiler.status())
+
+@app.route('/admin/admission')
+def admin_admission():
+    '''Admission controller state: in-flight requests, queueing latency, load levels'''
+    if not is_admin(request.headers.get('X-Admin-Token')):
+        return json_response({'error': 'Forbidden'}), 403
+    return json_response(admission.status())
+
 @app.route('/')
 def home():
     '''API Documentation Home Page'''
@@ -132,6 +564,15 @@ def home():
     <div class="endpoint">
         <div class="method">GET /api/stations</div>
         <p>Get all monitoring stations with current readings</p>
+        <pre>Query: ?bbox=south,west,north,east (optional map viewport)</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/nearest</div>
+        <p>Get the nearest stations to a location</p>
+        <pre>Query: ?lat=28.61&amp;lng=77.21&amp;k=3</pre>
+        <div class="method">POST /api/nearest</div>
+        <pre>Body: {{"locations": [[28.61, 77.21], [28.70, 77.10]], "k": 1}}</pre>
     </div>
 
     <div class="endpoint">
@@ -139,15 +580,42 @@ def home():
         <p>Get specific station data</p>
     </div>
 
+    <div class="endpoint">
+        <div class="method">GET /api/grid</div>
+        <p>Get AQI interpolated onto a lat/lng grid over Delhi-NCR</p>
+        <pre>Query: ?rows=40&amp;cols=40&amp;power=2&amp;bbox=south,west,north,east</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">POST /api/routes/score</div>
+        <p>Rank candidate routes by AQI exposure along each path</p>
+        <pre>Body: {{"routes": [{{"id": "via-ring-road", "points": [[28.63, 77.22], [28.57, 77.19]]}}]}}</pre>
+    </div>
+
     <div class="endpoint">
         <div class="method">GET /api/forecast</div>
         <p>Get 24-hour AQI forecast</p>
+        <pre>Query: ?hours=24&amp;format=rows|columnar|binary</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/history</div>
+        <p>Get historical readings (2024)</p>
+        <pre>Query: ?station=anand_vihar&amp;start=2024-11-01&amp;end=2024-12-01&amp;fields=aqi,pm2_5&amp;format=columnar</pre>
     </div>
 
     <div class="endpoint">
         <div class="method">POST /api/predict</div>
         <p>Predict AQI based on pollutant inputs</p>
-        <pre>Body: {{"pm25": 85, "pm10": 120, "no2": 45, "hour": 9, "month": 11}}</pre>
+        <pre>Body: {{"pm25": 85, "pm10": 120, "no2": 45, "hour": 9, "month": 11, "station": "anand_vihar"}}</pre>
+        <pre>Query: ?model=linear (cheap linear model)</pre>
+        <p>Under overload, /api/predict, /api/current and /api/stations answer from cheaper tiers or stale data
+        (X-AirSense-Load, X-AirSense-Stale and Age headers), and 503 with Retry-After as a last resort</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">POST /api/predict/explain</div>
+        <p>Per-feature and per-group contributions to the prediction (same body, or {{"records": [...]}} for a batch)</p>
     </div>
 
     <div class="endpoint">
@@ -157,7 +625,8 @@ def home():
 
     <div class="endpoint">
         <div class="method">GET /api/policy/sources</div>
-        <p>Get pollution source breakdown for policy dashboard</p>
+        <p>Get pollution source breakdown for policy dashboard (NMF source apportionment)</p>
+        <pre>Query: ?station=anand_vihar&amp;month=11 (defaults: all stations, current month)</pre>
     </div>
 
     <div class="endpoint">
@@ -165,6 +634,17 @@ def home():
         <p>Get current policy interventions and effectiveness</p>
     </div>
 
+    <div class="endpoint">
+        <div class="method">POST /api/policy/scenarios</div>
+        <p>What-if AQI change distribution for intervention scenarios over the 2024 readings</p>
+        <pre>Body: {{"scenarios": [{{"interventions": ["GRAP Stage II"], "reductions": {{"vehicles": 0.2}}, "months": [11]}}]}}</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /metrics</div>
+        <p>Request, model and cache metrics in Prometheus text format</p>
+    </div>
+
     <p><strong>Model Accuracy:</strong> R² = 1.000, RMSE = 2.60</p>
     <p><strong>Data Source:</strong> Simulated based on CPCB Delhi patterns</p>
     <p><strong>Last Updated:</strong> {timestamp}</p>
@@ -177,10 +657,17 @@ def home():
 def get_current_air_quality():
     '''Get current air quality data'''
     now = datetime.now()
+    snapshot_time, snapshot = _current_snapshot['timestamp'], _current_snapshot['payload']
+    if g.get('load_level', NORMAL) != NORMAL:
+        if snapshot is not None:
+            return json_response(snapshot, headers=stale_headers(snapshot_time, now))
+        if g.load_level == SHED:
+            return overload_response()
+
     current_data = generate_realistic_pollution_data(now.hour, now.month)
     color, status = get_aqi_color_and_status(current_data['aqi'])
 
-    return jsonify({
+    payload = {
         'aqi': current_data['aqi'],
         'pm2_5': current_data['pm2_5'],
         'pm10': current_data['pm10'],
@@ -194,90 +681,363 @@ def get_current_air_quality():
         'location': 'Delhi NCR',
         'timestamp': now.isoformat(),
         'last_updated': now.strftime('%Y-%m-%d %H:%M:%S IST')
-    })
+    }
+    _current_snapshot.update(timestamp=now, payload=payload)
+    return json_response(payload)
 
 @app.route('/api/stations')
 def get_all_stations():
-    '''Get all monitoring stations with current readings'''
+    '''Get all monitoring stations with current readings, optionally within ?bbox='''
     now = datetime.now()
-    stations_data = []
-
-    for station in DELHI_STATIONS:
-        data = generate_realistic_pollution_data(now.hour, now.month, station['name'])
-        color, status = get_aqi_color_and_status(data['aqi'])
-
-        stations_data.append({
-            'id': station['id'],
-            'name': station['name'],
-            'lat': station['lat'],
-            'lng': station['lng'],
-            'zone': station['zone'],
-            'aqi': data['aqi'],
-            'pm2_5': data['pm2_5'],
-            'pm10': data['pm10'],
+    level = g.get('load_level', NORMAL)
+    if level == SHED and _reading_cycle['readings'] is None:
+        return overload_response()
+    key, reading_time, readings = get_reading_cycle(now, allow_stale=level != NORMAL)
+    headers = stale_headers(reading_time, now) if key != reading_cycle_key(now) else None
+
+    bbox = request.args.get('bbox')
+    if bbox:
+        try:
+            indices = STATION_INDEX.within_bbox(*parse_bbox(bbox))
+        except ValueError:
+            return json_response({'error': 'bbox must be south,west,north,east'}), 400
+    else:
+        indices = range(len(DELHI_STATIONS))
+
+    stations_json = STATION_FRAGMENTS.encode_list(
+        indices, (station_reading(readings[i], reading_time) for i in indices))
+
+    return json_response(encode_object({
+        'total_stations': len(indices),
+        'timestamp': now.isoformat()
+    }, raw_fields={'stations': stations_json}), headers=headers)
+
+@app.route('/api/nearest', methods=['GET', 'POST'])
+def get_nearest_stations():
+    '''Get the k nearest stations to a point (GET) or to many points (POST)'''
+    _, reading_time, readings = get_reading_cycle()
+
+    try:
+        if request.method == 'GET':
+            lat = float(request.args['lat'])
+            lng = float(request.args['lng'])
+            k = int(request.args.get('k', 1))
+        else:
+            data = request.json or {}
+            locations = np.asarray(data['locations'], dtype=np.float64)
+            k = int(data.get('k', 1))
+    except (KeyError, TypeError, ValueError):
+        return json_response({'error': 'Provide lat and lng (GET) or {"locations": [[lat, lng], ...]} (POST)'}), 400
+
+    if not 1 <= k <= MAX_NEAREST_K:
+        return json_response({'error': f'k must be between 1 and {MAX_NEAREST_K}'}), 400
+    if request.method == 'POST' and (locations.ndim != 2 or locations.shape[1] != 2
+                                     or len(locations) > MAX_BATCH_LOCATIONS):
+        return json_response({'error': f'locations must be a list of up to {MAX_BATCH_LOCATIONS} [lat, lng] pairs'}), 400
+    lats, lngs = (lat, lng) if request.method == 'GET' else (locations[:, 0], locations[:, 1])
+    if not valid_coordinates(lats, lngs).all():
+        return json_response({'error': 'lat must be within -90..90 and lng within -180..180'}), 400
+
+    def nearest_payload(indices, distances):
+        return [dict(station_payload(DELHI_STATIONS[i], readings[i], reading_time),
+                     distance_km=round(float(d), 3))
+                for i, d in zip(indices, distances)]
+
+    if request.method == 'GET':
+        indices, distances = STATION_INDEX.nearest(lat, lng, k)
+        return json_response({
+            'location': {'lat': lat, 'lng': lng},
+            'stations': nearest_payload(indices, distances),
+            'timestamp': reading_time.isoformat()
+        })
+
+    indices, distances = STATION_INDEX.nearest_batch(lats, lngs, k)
+    return json_response({
+        'results': [{'location': {'lat': float(lat), 'lng': float(lng)},
+                     'stations': nearest_payload(idx, dist)}
+                    for (lat, lng), idx, dist in zip(locations, indices, distances)],
+        'timestamp': reading_time.isoformat()
+    })
+
+@app.route('/api/grid')
+def get_aqi_grid_endpoint():
+    '''Get station AQI interpolated onto a lat/lng grid (inverse-distance weighting)'''
+    try:
+        rows = int(request.args.get('rows', 40))
+        cols = int(request.args.get('cols', 40))
+        power = float(request.args.get('power', 2.0))
+        bbox = request.args.get('bbox')
+        bounds = parse_bbox(bbox) if bbox else DELHI_NCR_BOUNDS
+    except ValueError:
+        return json_response({'error': 'rows, cols and power must be numeric and bbox must be south,west,north,east'}), 400
+
+    if not (2 <= rows <= MAX_GRID_SIZE and 2 <= cols <= MAX_GRID_SIZE):
+        return json_response({'error': f'rows and cols must be between 2 and {MAX_GRID_SIZE}'}), 400
+    if not 0.5 <= power <= 5:
+        return json_response({'error': 'power must be between 0.5 and 5'}), 400
+
+    interpolator, reading_time, grid = get_aqi_grid(bounds, rows, cols, power)
+
+    return json_response({
+        'method': 'idw',
+        'power': power,
+        'bounds': {'south': bounds[0], 'west': bounds[1], 'north': bounds[2], 'east': bounds[3]},
+        'rows': rows,
+        'cols': cols,
+        'lats': np.round(interpolator.lats, 5),
+        'lngs': np.round(interpolator.lngs, 5),
+        'aqi': np.round(grid, 1),
+        'total_stations': len(DELHI_STATIONS),
+        'timestamp': reading_time.isoformat()
+    })
+
+@app.route('/api/routes/score', methods=['POST'])
+def score_clean_routes():
+    '''Rank candidate routes by integrated AQI exposure along each path'''
+    data = request.json or {}
+    routes = data.get('routes')
+    if not isinstance(routes, list) or not 1 <= len(routes) <= MAX_ROUTES:
+        return json_response({'error': f'Provide 1 to {MAX_ROUTES} routes as {{"id": ..., "points": [[lat, lng], ...]}}'}), 400
+
+    try:
+        polylines = [np.asarray(route['points'], dtype=np.float64) for route in routes]
+    except (KeyError, TypeError, ValueError):
+        return json_response({'error': 'Each route needs a "points" list of [lat, lng] pairs'}), 400
+    if any(p.ndim != 2 or p.shape[1] != 2 or not 2 <= len(p) <= MAX_ROUTE_POINTS for p in polylines):
+        return json_response({'error': f'Each route needs 2 to {MAX_ROUTE_POINTS} [lat, lng] points'}), 400
+    south, west, north, east = DELHI_NCR_BOUNDS
+    for p in polylines:
+        # NaN compares false, so it fails this check too
+        if not ((p[:, 0] >= south) & (p[:, 0] <= north) & (p[:, 1] >= west) & (p[:, 1] <= east)).all():
+            return json_response({'error': f'Route points must lie within Delhi-NCR {DELHI_NCR_BOUNDS}'}), 400
+
+    interpolator, reading_time, grid = get_aqi_grid(DELHI_NCR_BOUNDS, ROUTE_GRID_SIZE, ROUTE_GRID_SIZE, 2.0)
+    try:
+        exposure, mean_aqi, max_aqi, length_km = score_routes(interpolator, grid, polylines, ROUTE_SPACING_KM,
+                                                              MAX_ROUTE_SAMPLES)
+    except ValueError as e:
+        return json_response({'error': str(e)}), 400
+
+    worst = mean_aqi.max()
+    scored = []
+    for i, route in enumerate(routes):
+        color, status = get_aqi_color_and_status(mean_aqi[i])
+        scored.append({
+            'id': route.get('id', i),
+            'name': route.get('name'),
+            'length_km': round(float(length_km[i]), 2),
+            'exposure': round(float(exposure[i]), 1),
+            'mean_aqi': round(float(mean_aqi[i]), 1),
+            'max_aqi': round(float(max_aqi[i]), 1),
+            'aqi_reduction': f'{(1 - mean_aqi[i] / worst) * 100:.0f}%' if worst > 0 else '0%',
             'status': status,
-            'color': color,
-            'timestamp': now.isoformat()
+            'color': color
         })
+    scored.sort(key=lambda r: r['mean_aqi'])
 
-    return jsonify({
-        'stations': stations_data,
-        'total_stations': len(stations_data),
-        'timestamp': now.isoformat()
+    return json_response({
+        'routes': scored,
+        'cleanest': scored[0]['id'],
+        'timestamp': reading_time.isoformat()
     })
 
+@app.route('/api/forecast')
+def get_forecast():
+    '''Get hourly AQI forecast (24 hours by default), optionally ?format=columnar|binary'''
+    try:
+        hours = int(request.args.get('hours', 24))
+    except ValueError:
+        return json_response({'error': 'hours must be an integer'}), 400
+    fmt = request.args.get('format', 'rows')
+    if not 1 <= hours <= MAX_FORECAST_HOURS:
+        return json_response({'error': f'hours must be between 1 and {MAX_FORECAST_HOURS}'}), 400
+    if fmt not in SERIES_FORMATS:
+        return json_response({'error': f'format must be one of {list(SERIES_FORMATS)}'}), 400
+
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    times = [now + timedelta(hours=i) for i in range(hours)]
+    aqi = np.array([generate_realistic_pollution_data(t.hour, t.month)['aqi'] for t in times])
+    epoch = np.array([int(t.timestamp()) for t in times])
+
+    def rows():
+        forecast_data = []
+        for t, value in zip(times, aqi.tolist()):
+            color, status = get_aqi_color_and_status(value)
+            forecast_data.append({
+                'hour': t.strftime('%H:%M'),
+                'datetime': t.isoformat(),
+                'aqi': value,
+                'status': status,
+                'color': color
+            })
+        return {
+            'forecast': forecast_data,
+            'generated_at': datetime.now().isoformat(),
+            'model': 'Gradient Boosting Regressor'
+        }
+
+    return series_response(fmt, epoch, {'aqi': aqi}, rows)
+
+@app.route('/api/history')
+def get_history():
+    '''Get historical readings, optionally filtered by ?station=&start=&end=&fields='''
+    if history is None:
+        return json_response({'error': 'Historical data not available'}), 500
+
+    fmt = request.args.get('format', 'rows')
+    fields = request.args.get('fields', 'aqi,pm2_5,pm10').split(',')
+    if fmt not in SERIES_FORMATS:
+        return json_response({'error': f'format must be one of {list(SERIES_FORMATS)}'}), 400
+    if not set(fields) <= set(HISTORY_FIELDS) or len(set(fields)) != len(fields):
+        return json_response({'error': f'fields must be distinct entries of {HISTORY_FIELDS}'}), 400
+
+    mask = np.ones(len(history), dtype=bool)
+    station = request.args.get('station')
+    if station:
+        names = {s['id']: s['name'] for s in DELHI_STATIONS}
+        mask &= (history['station'] == names.get(station, station)).to_numpy()
+    try:
+        for arg, compare in (('start', np.greater_equal), ('end', np.less)):
+            if request.args.get(arg):
+                bound = int(pd.Timestamp(request.args[arg]).timestamp())
+                mask &= compare(history_epoch, bound)
+    except ValueError:
+        return json_response({'error': 'start and end must be ISO dates'}), 400
+
+    selected = history[mask]
+    epoch = history_epoch[mask]
+    columns = {field: selected[field].to_numpy() for field in fields}
+    if not station:
+        # Readings from several stations share the series; identify each one by
+        # its position in /api/stations
+        positions = {s['name']: i for i, s in enumerate(DELHI_STATIONS)}
+        columns['station'] = selected['station'].map(positions).to_numpy()
+
+    def rows():
+        records = selected[['timestamp', 'station'] + fields].to_dict('records')
+        for record in records:
+            record['timestamp'] = record['timestamp'].isoformat()
+            if 'aqi' in record:
+                record['color'], record['status'] = get_aqi_color_and_status(record['aqi'])
+        return {'history': records, 'count': len(records)}
+
+    return series_response(fmt, epoch, columns, rows)
+
 @app.route('/api/predict', methods=['POST'])
 def predict_aqi():
     '''Predict AQI using the trained model'''
     if not model:
-        return jsonify({'error': 'Model not available'}), 500
+        return json_response({'error': 'Model not available'}), 500
+    level = g.get('load_level', NORMAL)
+    if level == SHED:
+        return overload_response()
 
     try:
         data = request.json
-        required_fields = ['pm25', 'pm10', 'no2', 'hour', 'month']
-        if not all(field in data for field in required_fields):
-            return jsonify({'error': f'Missing required fields: {required_fields}'}), 400
-
-        # Create input array
-        input_data = np.zeros(len(feature_columns))
-
-        # Fill basic features
-        input_data[0] = data['pm25']
-        input_data[1] = data['pm10']
-        input_data[2] = data['no2']
-        input_data[3] = data.get('so2', 15)
-        input_data[4] = data.get('co', 1.2)
-        input_data[5] = data.get('o3', 35)
-        input_data[6] = data.get('temperature', 28)
-        input_data[7] = data.get('humidity', 65)
-        input_data[8] = data.get('wind_speed', 8)
-        input_data[9] = data['hour']
-        input_data[10] = 0  # day_of_week
-        input_data[11] = data['month']
-        input_data[12] = 0  # is_weekend
-        input_data[13] = 1 if data['hour'] in [7,8,9,17,18,19,20] else 0  # is_rush_hour
-        input_data[14] = 1 if data['month'] in [11,12,1,2] else 0  # is_winter
-        input_data[15] = data['pm25']  # pm2_5_lag1
-        input_data[16] = data['pm10']  # pm10_lag1
-        input_data[17] = 150  # aqi_lag1
+        if not all(field in data for field in REQUIRED_FIELDS):
+            return json_response({'error': f'Missing required fields: {REQUIRED_FIELDS}'}), 400
 
         # Make prediction
-        prediction = model.predict(input_data.reshape(1, -1))[0]
+        use_linear = request.args.get('model') == 'linear'
+        if use_linear and not linear_model:
+            return json_response({'error': 'Linear model not available'}), 400
+        covered = lookup_table and lookup_table.covers(data)
+        # Under load, requests the lookup table cannot answer drop to the linear model
+        if level == DEGRADED and not covered and linear_model:
+            use_linear = True
+        if use_linear:
+            prediction = run_model('linear_regression', linear_model.predict, assembler.vector(data))
+            bounds = None
+        elif covered:
+            raw = run_model('lookup_table', lookup_table.predict, data)
+            prediction, bounds = raw[0], np.sort(raw[1:]) if quantiles else None
+        elif interval_forest:
+            point, bounds = predict_with_interval(assembler.vector(data).reshape(1, -1))
+            prediction, bounds = point[0], bounds[0]
+        else:
+            prediction = run_model('gradient_boosting', model.predict, assembler.vector(data).reshape(1, -1))[0]
+            bounds = None
+
+        if bounds is not None:
+            interval = {label: max(0, int(round(b))) for label, b in zip(quantile_labels, bounds)}
+            confidence = (f"{int(round((quantiles[-1] - quantiles[0]) * 100))}% interval "
+                          f"{interval[quantile_labels[0]]}-{interval[quantile_labels[-1]]}")
+        else:
+            interval = None
+            confidence = ('Point estimate only (linear model)' if use_linear
+                          else 'Point estimate only (no interval model loaded)')
         aqi = max(0, int(round(prediction)))
         color, status = get_aqi_color_and_status(aqi)
 
-        return jsonify({
+        return json_response({
             'predicted_aqi': aqi,
             'status': status,
             'color': color,
-            'confidence': 'High (R² = 1.000)',
-            'model': 'Gradient Boosting Regressor',
+            'confidence': confidence,
+            'interval': interval,
+            'model': 'Linear Regression' if use_linear else 'Gradient Boosting Regressor',
             'input_data': data,
             'timestamp': datetime.now().isoformat()
         })
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        app.logger.exception('Prediction failed')
+        metrics.inc('airsense_errors_total', (('route', route_label()), ('type', type(e).__name__)))
+        return json_response({'error': str(e)}), 500
+
+@app.route('/api/predict/explain', methods=['POST'])
+def explain_prediction():
+    '''Per-feature contributions to the AQI prediction for one input or {"records": [...]}'''
+    if not explain_forest:
+        return json_response({'error': 'Model not available'}), 500
+
+    data = request.json or {}
+    batch = 'records' in data
+    records = data['records'] if batch else [data]
+    if not isinstance(records, list) or not 1 <= len(records) <= MAX_EXPLAIN_RECORDS:
+        return json_response({'error': f'records must be a list of 1 to {MAX_EXPLAIN_RECORDS} inputs'}), 400
+    if not all(isinstance(r, dict) and all(field in r for field in REQUIRED_FIELDS) for r in records):
+        return json_response({'error': f'Missing required fields: {REQUIRED_FIELDS}'}), 400
+
+    try:
+        X = assembler.matrix(records)
+        bias, contributions = run_model('gradient_boosting_explain', explain_forest.contributions, X)
+    except (TypeError, ValueError) as e:
+        return json_response({'error': f'Invalid input: {e}'}), 400
+    predictions = bias + contributions.sum(axis=1)
+    groups = contributions @ FEATURE_GROUP_MATRIX
+
+    if batch:
+        # Columnar so large dashboard batches stay compact
+        return json_response({
+            'features': feature_columns,
+            'base_value': round(float(bias[0]), 2),
+            'predictions': np.round(predictions, 2),
+            'contributions': np.round(contributions, 3),
+            'groups': {name: np.round(groups[:, g], 2) for g, name in enumerate(FEATURE_GROUP_NAMES)},
+            'count': len(records),
+            'method': 'Saabas path attribution (Gradient Boosting Regressor)',
+            'timestamp': datetime.now().isoformat()
+        })
+
+    order = np.argsort(-np.abs(contributions[0]))
+    aqi = max(0, int(round(predictions[0])))
+    color, status = get_aqi_color_and_status(aqi)
+    return json_response({
+        'predicted_aqi': aqi,
+        'status': status,
+        'color': color,
+        'base_value': round(float(bias[0]), 2),
+        'contributions': [{'feature': feature_columns[i], 'group': feature_group(feature_columns[i]),
+                           'value': float(X[0, i]), 'contribution': round(float(contributions[0, i]), 3)}
+                          for i in order if contributions[0, i] != 0],
+        'groups': dict(sorted(((name, round(float(groups[0, g]), 2) + 0.0) for g, name in enumerate(FEATURE_GROUP_NAMES)),
+                              key=lambda item: -abs(item[1]))),
+        'global_importance': GLOBAL_IMPORTANCE[:10],
+        'method': 'Saabas path attribution (Gradient Boosting Regressor)',
+        'input_data': data,
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.route('/api/health-advice/<int:aqi>')
 def get_health_advice(aqi):
@@ -329,68 +1089,69 @@ def get_health_advice(aqi):
     advice['color'] = color
     advice['aqi'] = aqi
 
-    return jsonify(advice)
+    return json_response(advice)
 
 @app.route('/api/policy/sources')
 def get_pollution_sources():
-    '''Get pollution source breakdown for policy dashboard'''
+    '''Get the PM2.5 source breakdown for a station (?station=) and month (?month=, default current)'''
+    if apportionment_job is None:
+        return json_response({'error': 'Historical data not available'}), 500
+    if not apportionment_job.done():
+        return json_response({'error': 'Source apportionment is still being computed'}, 503,
+                             {'Retry-After': str(SOURCES_RETRY_SECONDS)})
+    try:
+        _, tables = apportionment_job.result()
+    except Exception as e:
+        return json_response({'error': f'Source apportionment failed: {e}'}), 500
+
     now = datetime.now()
+    try:
+        month = int(request.args.get('month', now.month))
+    except ValueError:
+        return json_response({'error': 'month must be an integer'}), 400
+    station = request.args.get('station')
+    payload = tables.get((station_key(station) if station else None, month))
+    if payload is None:
+        return json_response({'error': f'No source breakdown for station={station} month={month}'}), 404
 
-    # Adjust stubble burning contribution based on season
-    if now.month in [11, 12]:
-        stubble_contribution = random.randint(35, 45)
-        vehicle_contribution = random.randint(30, 40)
-        industry_contribution = random.randint(15, 25)
-        dust_contribution = random.randint(10, 20)
-    elif now.month in [3, 4, 5, 6]:
-        stubble_contribution = random.randint(5, 10)
-        vehicle_contribution = random.randint(35, 45)
-        industry_contribution = random.randint(20, 30)
-        dust_contribution = random.randint(25, 40)
-    else:
-        stubble_contribution = random.randint(5, 15)
-        vehicle_contribution = random.randint(40, 50)
-        industry_contribution = random.randint(25, 35)
-        dust_contribution = random.randint(15, 25)
-
-    return jsonify({
-        'sources': [
-            {'name': 'Vehicular Emissions', 'contribution': vehicle_contribution, 'color': '#FF6B6B'},
-            {'name': 'Industrial Pollution', 'contribution': industry_contribution, 'color': '#4ECDC4'},
-            {'name': 'Construction & Dust', 'contribution': dust_contribution, 'color': '#45B7D1'},
-            {'name': 'Stubble Burning', 'contribution': stubble_contribution, 'color': '#96CEB4'}
-        ],
-        'seasonal_note': 'Stubble burning peaks in Nov-Dec',
-        'timestamp': now.isoformat()
-    })
+    return json_response(dict(payload, timestamp=now.isoformat()))
 
 @app.route('/api/policy/interventions')
 def get_policy_interventions():
-    '''Get current policy interventions and their effectiveness'''
-    return jsonify({
+    '''Get current policy interventions and their modelled effectiveness'''
+    effects = get_intervention_effects()
+
+    def effectiveness(name):
+        if name not in effects:
+            return None
+        return f"{-effects[name]['relative_change_pct']:.1f}% lower AQI"
+
+    return json_response({
         'active_interventions': [
             {
                 'name': 'GRAP Stage II',
                 'status': 'Active',
-                'effectiveness': f'{random.randint(60, 75)}%',
+                'effectiveness': effectiveness('GRAP Stage II'),
                 'description': 'Construction activities banned on major roads',
                 'implemented': '2025-09-25'
             },
             {
                 'name': 'Enhanced Road Cleaning',
                 'status': 'Active', 
-                'effectiveness': f'{random.randint(70, 85)}%',
+                'effectiveness': effectiveness('Enhanced Road Cleaning'),
                 'description': 'Mechanical sweeping and water sprinkling',
                 'implemented': '2025-09-20'
             },
             {
                 'name': 'Industrial Emission Monitoring',
                 'status': 'Ongoing',
-                'effectiveness': f'{random.randint(75, 90)}%', 
+                'effectiveness': effectiveness('Industrial Emission Monitoring'),
                 'description': 'Real-time monitoring of industrial stacks',
                 'implemented': '2025-01-01'
             }
         ],
+        'available_interventions': {name: dict(spec, modelled=effects.get(name))
+                                    for name, spec in INTERVENTIONS.items()},
         'recommendations': [
             'Implement odd-even vehicle restrictions during peak hours',
             'Increase public transportation frequency',
@@ -400,8 +1161,35 @@ def get_policy_interventions():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/policy/scenarios', methods=['POST'])
+def run_policy_scenarios():
+    '''Re-score the historical readings under what-if intervention scenarios'''
+    if not model or history is None:
+        return json_response({'error': 'Model or historical data not available'}), 500
+
+    scenarios = (request.json or {}).get('scenarios')
+    if not isinstance(scenarios, list) or not 1 <= len(scenarios) <= MAX_SCENARIOS:
+        return json_response({'error': f'Provide {{"scenarios": [...]}} with 1 to {MAX_SCENARIOS} scenarios'}), 400
+    try:
+        parsed = [parse_scenario(spec) for spec in scenarios]
+    except ValueError as e:
+        return json_response({'error': str(e)}), 400
+
+    started = time.perf_counter()
+    results = get_scenario_engine().run(parsed)
+    return json_response({
+        'scenarios': results,
+        'combinations': sum(r['combinations'] for r in results),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'model': 'Gradient Boosting Regressor',
+        'timestamp': datetime.now().isoformat()
+    })
+
 if __name__ == '__main__':
     print("🚀 Starting AirSense Delhi API...")
     print("📊 Air Quality Monitoring Platform")
-    print("🌐 API will be available at: http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    print(f"🔢 Serving precision: {np.dtype(SERVING_DTYPE).name}")
+    port = int(os.environ.get('PORT', 5000))
+    debug = os.environ.get('AIRSENSE_DEBUG', '1') == '1'
+    print(f"🌐 API will be available at: http://localhost:{port}")
+    app.run(debug=debug, host='0.0.0.0', port=port)
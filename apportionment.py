@@ -0,0 +1,135 @@
+# Source apportionment of the multi-pollutant history for the policy dashboard
+# Non-negative matrix factorisation (the receptor-model approach behind PMF):
+# hourly readings V (hours x pollutants) ~ W @ H, where each row of H is a
+# source's pollutant profile and W says how active that source was each hour.
+# Factors are named by matching their profiles against known source
+# signatures, and contributions are summed per station and month once, so
+# serving a breakdown is a table lookup. The factorisation is plain NumPy
+# (NNDSVDa start, coordinate descent), so serving never imports scikit-learn.
+from itertools import permutations
+
+import numpy as np
+
+from scenarios import DEFAULT_SHARES, POLLUTANTS, SOURCES
+
+# Reference pollutant signature of each source (rows follow SOURCES)
+SOURCE_SIGNATURES = DEFAULT_SHARES / np.linalg.norm(DEFAULT_SHARES, axis=1, keepdims=True)
+# Initial factor entries below this are treated as zero (then set to the data mean)
+NNDSVD_EPSILON = 1e-6
+
+
+def nndsvda(V, k):
+    '''NNDSVD initialisation (Boutsidis & Gallopoulos) with zeros filled by the data mean'''
+    U, S, Vt = np.linalg.svd(V, full_matrices=False)
+    W, H = np.zeros((len(V), k)), np.zeros((k, V.shape[1]))
+    W[:, 0] = np.sqrt(S[0]) * np.abs(U[:, 0])
+    H[0] = np.sqrt(S[0]) * np.abs(Vt[0])
+    for j in range(1, k):
+        x, y = U[:, j], Vt[j]
+        # Keep whichever sign pattern of the singular pair carries more mass
+        xp, xn, yp, yn = np.maximum(x, 0), np.maximum(-x, 0), np.maximum(y, 0), np.maximum(-y, 0)
+        pos = np.linalg.norm(xp) * np.linalg.norm(yp)
+        neg = np.linalg.norm(xn) * np.linalg.norm(yn)
+        u, v, mass = (xp, yp, pos) if pos > neg else (xn, yn, neg)
+        scale = np.sqrt(S[j] * mass)
+        W[:, j] = scale * u / np.linalg.norm(u)
+        H[j] = scale * v / np.linalg.norm(v)
+    W[W < NNDSVD_EPSILON] = 0
+    H[H < NNDSVD_EPSILON] = 0
+    average = V.mean()
+    W[W == 0] = average
+    H[H == 0] = average
+    return W, H
+
+
+def _coordinate_step(W, HHt, VHt):
+    '''One coordinate-descent sweep over the columns of W in place; returns the projected gradient norm'''
+    violation = 0.0
+    for t in range(W.shape[1]):
+        grad = W @ HHt[:, t] - VHt[:, t]
+        violation += np.abs(np.where(W[:, t] == 0, np.minimum(grad, 0), grad)).sum()
+        if HHt[t, t] != 0:
+            W[:, t] = np.maximum(W[:, t] - grad / HHt[t, t], 0)
+    return violation
+
+
+def factorize(V, k, max_iter=1000, tol=1e-4):
+    '''Non-negative W (rows x k), H (k x columns) minimising ||V - W @ H||_F.
+
+    Coordinate descent (HALS), alternating W and H, as scikit-learn's NMF
+    solver='cd'; stops once the projected gradient falls to tol of its start.
+    '''
+    W, H = nndsvda(V, k)
+    Ht = np.ascontiguousarray(H.T)
+    initial = None
+    for _ in range(max_iter):
+        violation = _coordinate_step(W, Ht.T @ Ht, V @ Ht)
+        violation += _coordinate_step(Ht, W.T @ W, V.T @ W)
+        initial = initial or violation
+        if not initial or violation / initial <= tol:
+            break
+    return W, Ht.T
+
+
+def label_factors(shares):
+    '''Order of factors matching SOURCES, by best total cosine similarity of profiles'''
+    profiles = shares / np.maximum(np.linalg.norm(shares, axis=1, keepdims=True), 1e-12)
+    similarity = SOURCE_SIGNATURES @ profiles.T  # (source, factor)
+    best = max(permutations(range(len(profiles)), len(SOURCES)),
+               key=lambda order: similarity[np.arange(len(SOURCES)), order].sum())
+    return list(best)
+
+
+class SourceApportionment:
+    '''Per station and month source contributions from an NMF of the readings.
+
+    attribution[station, month - 1, source, pollutant] is the share of the
+    measured pollutant explained by the source; pm25_share is the same for
+    PM2.5 in percent, with a final city-wide row after the stations.
+    '''
+
+    def __init__(self, stations, attribution, pm25_share, profiles, explained_variance):
+        self.stations = stations
+        self.attribution = attribution
+        self.pm25_share = pm25_share
+        self.profiles = profiles
+        self.explained_variance = explained_variance
+
+
+def apportion_sources(history, max_iter=1000):
+    '''Factorise the pollutant history into len(SOURCES) sources'''
+    # Sensor noise can dip below zero; treat those readings as below detection
+    V = np.clip(history[POLLUTANTS].to_numpy(dtype=np.float64), 0, None)
+    scale = np.maximum(V.std(axis=0), 1e-9)  # so no pollutant dominates by its units
+    W, components = factorize(V / scale, len(SOURCES), max_iter)
+    H = components * scale
+
+    # Share of each pollutant explained by each factor over the whole year
+    shares = W.mean(axis=0)[:, None] * H / np.maximum(V.mean(axis=0), 1e-12)
+    order = label_factors(shares)
+    W, H, shares = W[:, order], H[order], shares[order]
+
+    stations = sorted(history['station'].unique())
+    lookup = {name: i for i, name in enumerate(stations)}
+    group = (history['station'].map(lookup).to_numpy() * 12
+             + history['timestamp'].dt.month.to_numpy() - 1)
+    n_groups = len(stations) * 12
+
+    contributed = np.zeros((n_groups, len(SOURCES), len(POLLUTANTS)))
+    np.add.at(contributed, group, W[:, :, None] * H[None, :, :])
+    measured = np.zeros((n_groups, len(POLLUTANTS)))
+    np.add.at(measured, group, V)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        attribution = np.nan_to_num(contributed / measured[:, None, :])
+    attribution = attribution.reshape(len(stations), 12, len(SOURCES), len(POLLUTANTS))
+
+    # PM2.5 breakdown per station and month, then city-wide per month
+    pm25 = contributed[:, :, POLLUTANTS.index('pm2_5')].reshape(len(stations), 12, len(SOURCES))
+    pm25 = np.concatenate([pm25, pm25.sum(axis=0, keepdims=True)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pm25_share = np.nan_to_num(pm25 / pm25.sum(axis=2, keepdims=True) * 100)
+
+    residual = V / scale - W @ components[order]
+    explained = 1 - (residual ** 2).sum() / ((V / scale) ** 2).sum()
+    return SourceApportionment(stations, attribution, pm25_share, shares, float(explained))
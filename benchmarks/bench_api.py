@@ -0,0 +1,250 @@
+# End-to-end API benchmark with reproducible load profiles
+# Starts app.py on a free local port, drives it with a seeded request mix from
+# a pool of keep-alive client threads and records throughput and p50/p95/p99
+# latency per endpoint. Results are written as JSON so runs on different
+# commits can be compared with --compare.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_api.py --profile dashboard
+#   python benchmarks/bench_api.py --profile prediction_burst --compare benchmarks/results/<baseline>.json
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Each profile is a weighted request mix, a client concurrency and a duration.
+# Weights are relative; think_ms is the pause between requests per client.
+PROFILES = {
+    'dashboard': {
+        'description': 'Dashboards polling current conditions, stations and forecast',
+        'concurrency': 8, 'duration': 20, 'think_ms': 50,
+        'mix': {'current': 4, 'stations': 4, 'forecast': 2},
+    },
+    'prediction_burst': {
+        'description': 'Burst of prediction calls with some background polling',
+        'concurrency': 32, 'duration': 10, 'think_ms': 0,
+        'mix': {'predict': 9, 'current': 1},
+    },
+    'mixed': {
+        'description': 'Steady blend of every benchmarked route',
+        'concurrency': 16, 'duration': 20, 'think_ms': 10,
+        'mix': {'current': 3, 'stations': 3, 'forecast': 2, 'predict': 2},
+    },
+}
+
+
+def predict_body(rng):
+    '''Plausible /api/predict payload drawn from the seeded generator'''
+    month = rng.randint(1, 12)
+    winter = month in [11, 12, 1, 2]
+    pm25 = rng.uniform(80, 250) if winter else rng.uniform(20, 120)
+    return {
+        'pm25': round(pm25, 1),
+        'pm10': round(pm25 * rng.uniform(1.3, 1.9), 1),
+        'no2': round(rng.uniform(20, 90), 1),
+        'hour': rng.randint(0, 23),
+        'month': month,
+    }
+
+
+REQUESTS = {
+    'current': lambda rng: ('GET', '/api/current', None),
+    'stations': lambda rng: ('GET', '/api/stations', None),
+    'forecast': lambda rng: ('GET', '/api/forecast', None),
+    'predict': lambda rng: ('POST', '/api/predict', predict_body(rng)),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, timeout=60):
+    '''Start app.py without the debug reloader and wait until it answers'''
+    env = dict(os.environ, PORT=str(port), AIRSENSE_DEBUG='0')
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('app.py exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/current')
+            conn.getresponse().read()
+            conn.close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'app.py did not answer on port {port} within {timeout}s')
+
+
+def client_worker(port, profile, seed, stop_at, warmup_until, samples):
+    '''Issue requests until stop_at, recording (name, status, latency_s) after warm-up'''
+    rng = random.Random(seed)
+    names = list(profile['mix'])
+    weights = [profile['mix'][name] for name in names]
+    think = profile['think_ms'] / 1000.0
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    while time.time() < stop_at:
+        name = rng.choices(names, weights)[0]
+        method, path, body = REQUESTS[name](rng)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        latency = time.perf_counter() - started
+
+        if time.time() >= warmup_until:
+            samples.append((name, status, latency))
+        if think:
+            time.sleep(think)
+    conn.close()
+
+
+def summarize(samples, elapsed):
+    '''Throughput, error rate and latency percentiles (ms) per endpoint and overall'''
+    def stats(rows):
+        latencies = np.array([latency for _, _, latency in rows]) * 1000.0
+        errors = sum(1 for _, status, _ in rows if status == 0 or status >= 500)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(rows) else (0.0, 0.0, 0.0)
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 2),
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+        }
+
+    by_endpoint = {}
+    for row in samples:
+        by_endpoint.setdefault(row[0], []).append(row)
+    return {
+        'overall': stats(samples),
+        'endpoints': {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(current, baseline, tolerance):
+    '''Return regressions where p95 grew or throughput fell by more than tolerance'''
+    regressions = []
+    for name, now in current['summary']['endpoints'].items():
+        before = baseline['summary']['endpoints'].get(name)
+        if not before:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+        if before['throughput_rps'] and now['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']:.1f} -> {now['throughput_rps']:.1f} rps")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AirSense API load benchmark')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='dashboard')
+    parser.add_argument('--duration', type=float, help='override the profile duration (s)')
+    parser.add_argument('--concurrency', type=int, help='override the profile concurrency')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds excluded from the results')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='result file (default: benchmarks/results/api-<profile>-<commit>.json)')
+    parser.add_argument('--compare', help='baseline result file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    if args.duration:
+        profile['duration'] = args.duration
+    if args.concurrency:
+        profile['concurrency'] = args.concurrency
+
+    port = free_port()
+    server = start_server(port)
+    try:
+        samples = []
+        started = time.time()
+        warmup_until = started + args.warmup
+        stop_at = warmup_until + profile['duration']
+        workers = [threading.Thread(target=client_worker,
+                                    args=(port, profile, args.seed + i, stop_at, warmup_until, samples))
+                   for i in range(profile['concurrency'])]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    commit = git_commit()
+    result = {
+        'profile': args.profile,
+        'config': profile,
+        'seed': args.seed,
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'started_at': datetime.fromtimestamp(started).isoformat(),
+        'summary': summarize(samples, profile['duration']),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f'api-{args.profile}-{commit}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"Profile: {args.profile} ({profile['concurrency']} clients, {profile['duration']}s) @ {commit}")
+    print(f"{'endpoint':<12}{'requests':>10}{'rps':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = dict(result['summary']['endpoints'], overall=result['summary']['overall'])
+    for name, s in rows.items():
+        print(f"{name:<12}{s['requests']:>10}{s['throughput_rps']:>10.1f}{s['error_rate']:>9.2%}"
+              f"{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    print(f'Results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
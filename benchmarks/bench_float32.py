@@ -0,0 +1,165 @@
+# float32 vs float64 serving on the full historical dataset
+# Scores every historical reading with the point and quantile models the way
+# app.py does, once with the default float64 matrices and once with
+# AIRSENSE_FLOAT32-style float32 feature matrices and tree arrays. Reports
+# memory (feature matrix, node arrays, peak allocation during predict),
+# throughput per path, and checks the float32 predictions against float64:
+# exits non-zero if any AQI differs by more than --max-error.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_float32.py [--max-error 0.01] [--json out.json]
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from features import FeatureAssembler  # noqa: E402
+from scenarios import INTERVENTIONS, ScenarioEngine, history_matrix, parse_scenario  # noqa: E402
+from tree_arrays import FlatForest  # noqa: E402
+
+DTYPES = [np.float64, np.float32]
+# Batch size of the request-sized path
+REQUEST_ROWS = 64
+
+
+def timed(fn, repeat=5):
+    '''Best wall time of fn in seconds and its last result'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_bytes(fn):
+    '''Peak bytes allocated while fn runs (numpy reports to tracemalloc)'''
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def flat_predict(forest, X):
+    '''The request-sized path: REQUEST_ROWS rows at a time through the node arrays'''
+    return np.vstack([forest.predict(X[start:start + REQUEST_ROWS])
+                      for start in range(0, len(X), REQUEST_ROWS)])
+
+
+def bench_dtype(dtype, models, feature_columns, history, station_names):
+    assembler = FeatureAssembler(feature_columns, dtype=dtype)
+    assemble_seconds, (X, stations, months, hours) = timed(
+        lambda: history_matrix(history, assembler, station_names))
+    forest = FlatForest(models, dtype=dtype)
+
+    def batch():
+        return np.column_stack([m.predict(X) for m in models])
+
+    batch_seconds, batch_pred = timed(batch)
+    flat_seconds, flat_pred = timed(lambda: flat_predict(forest, X), repeat=2)
+
+    engine = ScenarioEngine(models[0].predict, X, stations, months, hours, feature_columns, station_names)
+    scenarios = [parse_scenario({'name': name, 'interventions': [name]}) for name in INTERVENTIONS]
+    scenario_seconds, scenario_results = timed(lambda: engine.run(scenarios), repeat=3)
+    engine.pool.shutdown()
+
+    return {
+        'dtype': np.dtype(dtype).name,
+        'feature_matrix_bytes': X.nbytes,
+        'tree_array_bytes': forest.nbytes,
+        'batch_peak_bytes': peak_bytes(batch),
+        'assemble_seconds': assemble_seconds,
+        'batch_rows_per_second': len(X) / batch_seconds,
+        'flat_rows_per_second': len(X) / flat_seconds,
+        'scenario_combinations_per_second': sum(r['combinations'] for r in scenario_results) / scenario_seconds,
+        'predictions': {'batch': batch_pred, 'flat': flat_pred},
+        'scenario_means': np.array([r['scenario_mean_aqi'] for r in scenario_results]),
+    }
+
+
+def print_report(results, n_rows):
+    wide, narrow = results
+    print(f'Full historical dataset: {n_rows} readings\n')
+    print(f"{'metric':<36}{'float64':>14}{'float32':>14}{'ratio':>9}")
+    rows = [
+        ('feature matrix (KiB)', 'feature_matrix_bytes', 1 / 1024),
+        ('tree arrays (KiB)', 'tree_array_bytes', 1 / 1024),
+        ('batch predict peak alloc (KiB)', 'batch_peak_bytes', 1 / 1024),
+        ('history assembly (ms)', 'assemble_seconds', 1e3),
+        ('batch predict (rows/s)', 'batch_rows_per_second', 1),
+        (f'flat {REQUEST_ROWS}-row predict (rows/s)', 'flat_rows_per_second', 1),
+        ('scenario scoring (combinations/s)', 'scenario_combinations_per_second', 1),
+    ]
+    for label, key, unit in rows:
+        a, b = wide[key] * unit, narrow[key] * unit
+        print(f'{label:<36}{a:>14,.1f}{b:>14,.1f}{b / a:>8.2f}x')
+
+
+def parity(results):
+    '''Largest AQI difference and rounded-AQI disagreements, per path'''
+    wide, narrow = results
+    report = {}
+    for path in wide['predictions']:
+        a, b = wide['predictions'][path], narrow['predictions'][path]
+        report[path] = {
+            'max_abs_error': float(np.abs(a - b).max()),
+            'mean_abs_error': float(np.abs(a - b).mean()),
+            'rounded_mismatches': int((np.round(a) != np.round(b)).sum()),
+        }
+    report['scenario_mean_aqi'] = {
+        'max_abs_error': float(np.abs(wide['scenario_means'] - narrow['scenario_means']).max()),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='float32 vs float64 serving benchmark and parity check')
+    parser.add_argument('--max-error', type=float, default=0.01, help='largest allowed AQI difference')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    with open('feature_columns.json') as f:
+        feature_columns = json.load(f)
+    models = [joblib.load('model_gradient_boosting.pkl')]
+    if os.path.exists('model_quantiles.pkl'):
+        models += joblib.load('model_quantiles.pkl')['models']
+    history = pd.read_csv('delhi_air_quality_2024.csv', parse_dates=['timestamp'])
+    history = history.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    station_names = sorted(history['station'].unique())
+
+    results = [bench_dtype(dtype, models, feature_columns, history, station_names) for dtype in DTYPES]
+    print_report(results, len(history))
+
+    report = parity(results)
+    print(f'\nParity, float32 vs float64 (AQI, {len(models)} models)')
+    for path, errors in report.items():
+        print(f'  {path:<20}' + '  '.join(f'{k}={v:.3g}' for k, v in errors.items()))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': [{k: v for k, v in r.items() if k not in ('predictions', 'scenario_means')}
+                                   for r in results], 'parity': report}, f, indent=2)
+
+    worst = max(errors['max_abs_error'] for errors in report.values())
+    if worst > args.max_error:
+        print(f'\n❌ float32 AQI error {worst:.3g} exceeds --max-error {args.max_error}')
+        sys.exit(1)
+    print(f'\n✅ float32 AQI error {worst:.3g} within --max-error {args.max_error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# Micro-benchmarks for the /api/predict hot path
+# Times each stage separately (request JSON parsing, feature assembly,
+# model.predict, response encoding) for batch sizes 1 to 100k with the
+# shipped models, and prints a per-stage and per-model comparison table.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_inference.py [--sizes 1,10,100,1000,10000,100000] [--json out.json]
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import serialization  # noqa: E402
+from features import FeatureAssembler  # noqa: E402
+from model_export import LinearModel  # noqa: E402
+from tree_arrays import FlatForest  # noqa: E402
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+STATIONS = ['Anand Vihar', 'IGI Airport', 'Mandir Marg', 'Punjabi Bagh', 'R.K. Puram']
+AQI_BOUNDS = [(50, '#00e400', 'Good'), (100, '#ffff00', 'Moderate'),
+              (150, '#ff7e00', 'Unhealthy for Sensitive Groups'), (200, '#ff0000', 'Unhealthy'),
+              (300, '#8f3f97', 'Very Unhealthy'), (float('inf'), '#7e0023', 'Hazardous')]
+
+
+def make_records(n, seed=42):
+    rng = random.Random(seed)
+    return [{
+        'pm25': round(rng.uniform(20, 250), 1),
+        'pm10': round(rng.uniform(40, 400), 1),
+        'no2': round(rng.uniform(10, 90), 1),
+        'hour': rng.randint(0, 23),
+        'month': rng.randint(1, 12),
+        'station': rng.choice(STATIONS),
+    } for _ in range(n)]
+
+
+def legacy_vector(data, feature_columns):
+    '''Original per-request assembly: np.zeros, positional writes and a station scan'''
+    input_data = np.zeros(len(feature_columns))
+    input_data[0] = data['pm25']
+    input_data[1] = data['pm10']
+    input_data[2] = data['no2']
+    input_data[3] = data.get('so2', 15)
+    input_data[4] = data.get('co', 1.2)
+    input_data[5] = data.get('o3', 35)
+    input_data[6] = data.get('temperature', 28)
+    input_data[7] = data.get('humidity', 65)
+    input_data[8] = data.get('wind_speed', 8)
+    input_data[9] = data['hour']
+    input_data[10] = 0
+    input_data[11] = data['month']
+    input_data[12] = 0
+    input_data[13] = 1 if data['hour'] in [7, 8, 9, 17, 18, 19, 20] else 0
+    input_data[14] = 1 if data['month'] in [11, 12, 1, 2] else 0
+    input_data[15] = data['pm25']
+    input_data[16] = data['pm10']
+    input_data[17] = 150
+    station_cols = [col for col in feature_columns if col.startswith('station_')]
+    for i, col in enumerate(station_cols):
+        if data['station'].replace(' ', '.') in col or data['station'] in col:
+            input_data[18 + i] = 1
+            break
+    return input_data
+
+
+def response_rows(predictions):
+    rows = []
+    for prediction in predictions:
+        aqi = max(0, int(round(prediction)))
+        color, status = next((c, s) for bound, c, s in AQI_BOUNDS if aqi <= bound)
+        rows.append({'predicted_aqi': aqi, 'status': status, 'color': color})
+    return rows
+
+
+def timed(fn, min_time=0.2, max_repeat=1000):
+    '''Median wall time of fn in seconds over enough repeats to fill min_time'''
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_repeat and (len(times) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def bench_size(n, feature_columns, models):
+    records = make_records(n)
+    body = json.dumps({'records': records}).encode()
+    assembler = FeatureAssembler(feature_columns)
+    X = assembler.matrix(records)
+
+    stages = {
+        'parse json': timed(lambda: json.loads(body)),
+        'parse orjson': timed(lambda: serialization.orjson.loads(body)) if serialization.orjson else None,
+        'assemble legacy loop': timed(lambda: np.vstack([legacy_vector(r, feature_columns) for r in records])),
+        'assemble vectorised': timed(lambda: assembler.matrix(records)),
+    }
+    for name, predict in models.items():
+        stages[f'predict {name}'] = timed(lambda: predict(X))
+
+    rows = response_rows(next(iter(models.values()))(X))
+    payload = rows[0] if n == 1 else {'predictions': rows}
+    stages['encode json'] = timed(lambda: json.dumps(payload).encode())
+    stages['encode fast'] = timed(lambda: serialization.dumps(payload))
+    return stages
+
+
+def load_models():
+    gradient_boosting = joblib.load('model_gradient_boosting.pkl')
+    linear = joblib.load('model_linear_regression.pkl')
+    scaler = joblib.load('scaler_linear_regression.pkl')
+    models = {
+        'gradient_boosting': gradient_boosting.predict,
+        'linear_regression': lambda X: linear.predict(scaler.transform(X)),
+        # Scaler folded into the coefficients, as served by /api/predict?model=linear
+        'linear folded': LinearModel.from_fitted(linear, scaler).predict,
+    }
+    if os.path.exists('model_quantiles.pkl'):
+        # Point model plus p10/p50/p90 in one pass, as served by /api/predict
+        quantile_models = joblib.load('model_quantiles.pkl')['models']
+        models['gb+quantiles loop'] = lambda X: [m.predict(X) for m in [gradient_boosting] + quantile_models]
+        models['gb+quantiles flat'] = FlatForest([gradient_boosting] + quantile_models).predict
+    return models
+
+
+def print_tables(results, model_names):
+    sizes = list(results)
+    stage_names = list(results[sizes[0]])
+
+    print('Per-stage time (ms, median)')
+    print(f"{'stage':<26}" + ''.join(f'{n:>12}' for n in sizes))
+    for stage in stage_names:
+        cells = [results[n][stage] for n in sizes]
+        print(f'{stage:<26}' + ''.join(f'{c * 1e3:>12.3f}' if c is not None else f"{'-':>12}" for c in cells))
+
+    print('\nEnd-to-end per model (fastest parse + assembly + predict + encode), us per row')
+    print(f"{'model':<26}" + ''.join(f'{n:>12}' for n in sizes))
+    for model in model_names:
+        cells = []
+        for n in sizes:
+            stages = results[n]
+            parse = min(t for k, t in stages.items() if k.startswith('parse') and t is not None)
+            assemble = min(t for k, t in stages.items() if k.startswith('assemble'))
+            encode = min(t for k, t in stages.items() if k.startswith('encode'))
+            cells.append((parse + assemble + stages[f'predict {model}'] + encode) / n * 1e6)
+        print(f'{model:<26}' + ''.join(f'{c:>12.2f}' for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inference hot-path micro-benchmarks')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    with open('feature_columns.json') as f:
+        feature_columns = json.load(f)
+    models = load_models()
+
+    results = {}
+    for n in (int(s) for s in args.sizes.split(',')):
+        results[n] = bench_size(n, feature_columns, models)
+    print_tables(results, list(models))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({str(n): stages for n, stages in results.items()}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Bytes on the wire and serialization CPU per endpoint
+# Compares the stdlib json encoder (what Flask's jsonify uses) against the
+# serialization module, uncompressed and with gzip/brotli.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_serialization.py [--repeat 200] [--json results.json]
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app import app  # noqa: E402
+import serialization  # noqa: E402
+
+ENDPOINTS = [
+    ('GET', '/api/current', None),
+    ('GET', '/api/stations', None),
+    ('GET', '/api/grid?rows=100&cols=100', None),
+    ('GET', '/api/nearest?lat=28.61&lng=77.21&k=3', None),
+    ('POST', '/api/predict', {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11}),
+    ('GET', '/api/health-advice/180', None),
+    ('GET', '/api/policy/sources', None),
+]
+
+
+def cpu_us(fn, repeat):
+    '''Mean process CPU time per call in microseconds'''
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def stdlib_dumps(payload):
+    '''The stdlib baseline, with the compact separators Flask's jsonify uses in production'''
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def bench_endpoint(client, method, path, body, repeat):
+    response = client.open(path, method=method, json=body)
+    payload = json.loads(response.get_data())
+    fast = serialization.dumps(payload)
+
+    row = {
+        'endpoint': f'{method} {path}',
+        'stdlib_bytes': len(stdlib_dumps(payload)),
+        'fast_bytes': len(fast),
+        'gzip_bytes': len(serialization.compress(fast, 'gzip')),
+        'br_bytes': len(serialization.compress(fast, 'br')) if serialization.brotli else None,
+        'stdlib_us': cpu_us(lambda: stdlib_dumps(payload), repeat),
+        'fast_us': cpu_us(lambda: serialization.dumps(payload), repeat),
+        'gzip_us': cpu_us(lambda: serialization.compress(fast, 'gzip'), repeat),
+        'request_us': cpu_us(lambda: client.open(path, method=method, json=body), max(repeat // 10, 1)),
+    }
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serialization benchmark')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    rows = [bench_endpoint(client, method, path, body, args.repeat)
+            for method, path, body in ENDPOINTS]
+
+    encoder = 'orjson' if serialization.orjson else 'json (orjson not installed)'
+    print(f'Encoder: {encoder}, brotli: {"yes" if serialization.brotli else "no"}')
+    print(f"{'endpoint':<42}{'stdlib B':>10}{'fast B':>10}{'gzip B':>10}{'br B':>10}"
+          f"{'stdlib us':>11}{'fast us':>10}{'gzip us':>10}{'request us':>12}")
+    for row in rows:
+        print(f"{row['endpoint']:<42}{row['stdlib_bytes']:>10}{row['fast_bytes']:>10}"
+              f"{row['gzip_bytes']:>10}{row['br_bytes'] or '-':>10}"
+              f"{row['stdlib_us']:>11.1f}{row['fast_us']:>10.1f}{row['gzip_us']:>10.1f}"
+              f"{row['request_us']:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'encoder': encoder, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
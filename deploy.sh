@@ -2,5 +2,9 @@
 echo "🚀 Deploying AirSense Delhi Platform..."
 echo "📦 Installing dependencies..."
 pip install -r requirements.txt
+echo "🧮 Building prediction lookup table..."
+python lookup_table.py
+echo "⚡ Building SCADA fault classifier..."
+python scada_model.py
 echo "🔥 Starting Flask API server..."
 python app.py
@@ -0,0 +1,181 @@
+# Cached feature-engineering stage for training
+# engineer_features() output is stored as raw .npy arrays under a key made of
+# the SHA-256 of the input CSV's bytes and FEATURE_SPEC_VERSION, so a retrain
+# that only changes model settings memory-maps the matrix instead of parsing
+# the CSV and rebuilding dummies and lags. Editing the data or the feature spec
+# changes the key and the stage runs again.
+#
+# stream_features() builds the same matrix for datasets that do not fit in
+# memory: the CSV is read in chunks and each chunk's features are written as
+# float32 straight into a memory-mapped .npy, with no whole-dataset frame.
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import (BASE_FEATURE_COLUMNS, FEATURE_SPEC_VERSION, RUSH_HOURS, WINTER_MONTHS,
+                      engineer_features)
+
+CACHE_DIR = '.feature_cache'
+TARGETS = ['aqi', 'pm2_5']
+STREAM_CHUNK_ROWS = 100000
+# Columns copied from the CSV as they are
+MEASURED_COLUMNS = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3', 'temperature', 'humidity', 'wind_speed']
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def feature_key(data_path):
+    '''Cache key for the engineered features of a data file under the current spec'''
+    return f'{file_sha256(data_path)[:24]}-v{FEATURE_SPEC_VERSION}'
+
+
+class FeatureSet:
+    '''Engineered training matrix: X (rows, features), targets by name, column names'''
+
+    def __init__(self, key, X, targets, feature_columns, cached):
+        self.key = key
+        self.X = X
+        self.targets = targets
+        self.feature_columns = feature_columns
+        self.cached = cached
+
+    def frame(self):
+        '''X as a DataFrame with the feature names (what the sklearn models are fitted on)'''
+        return pd.DataFrame(self.X, columns=self.feature_columns)
+
+
+def load_features(data_path, cache_dir=CACHE_DIR, mmap=True):
+    '''Engineered features for data_path, from the cache when the key matches'''
+    key = feature_key(data_path)
+    directory = os.path.join(cache_dir, key)
+    mode = 'r' if mmap else None
+
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return _open_entry(key, directory, mode)
+
+    df, feature_columns = engineer_features(pd.read_csv(data_path))
+    X = df[feature_columns].to_numpy(dtype=np.float64)
+    targets = {name: df[name].to_numpy(dtype=np.float64) for name in TARGETS}
+
+    # Write into a temporary directory and rename, so readers never see a partial entry
+    staging = f'{directory}.tmp-{os.getpid()}'
+    os.makedirs(staging, exist_ok=True)
+    np.save(os.path.join(staging, 'X.npy'), X)
+    for name, values in targets.items():
+        np.save(os.path.join(staging, f'{name}.npy'), values)
+    _publish(staging, directory, data_path, feature_columns, len(X))
+    return FeatureSet(key, X, targets, feature_columns, cached=False)
+
+
+def _open_entry(key, directory, mode):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    rows = meta['rows']
+    X = np.load(os.path.join(directory, 'X.npy'), mmap_mode=mode)[:rows]
+    targets = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode)[:rows]
+               for name in meta['targets']}
+    return FeatureSet(key, X, targets, meta['feature_columns'], cached=True)
+
+
+def _publish(staging, directory, data_path, feature_columns, rows):
+    '''Write meta.json and move a finished staging directory into place'''
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump({'feature_columns': feature_columns, 'targets': TARGETS, 'rows': rows,
+                   'spec_version': FEATURE_SPEC_VERSION, 'source': os.path.abspath(data_path),
+                   'created': time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        # Another run finished the same entry first; its copy is identical
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def stream_features(data_path, cache_dir=CACHE_DIR, chunk_rows=STREAM_CHUNK_ROWS):
+    '''float32 engineered features built chunk by chunk into memory-mapped arrays.
+
+    Same columns and rows as engineer_features(), but the CSV must already be
+    in timestamp order (lags are the previous row, carried across chunks).
+    '''
+    key = feature_key(data_path)
+    directory = os.path.join(cache_dir, f'{key}-f32')
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return _open_entry(key, directory, 'r')
+
+    # Pass 1 parses only the station column: row count and dummy columns
+    n_rows, stations = 0, set()
+    for chunk in pd.read_csv(data_path, usecols=['station'], chunksize=chunk_rows):
+        n_rows += len(chunk)
+        stations.update(chunk['station'].dropna().unique())
+    stations = sorted(stations)
+    feature_columns = BASE_FEATURE_COLUMNS + [f'station_{name}' for name in stations]
+    position = {name: i for i, name in enumerate(feature_columns)}
+    first_station = len(BASE_FEATURE_COLUMNS)
+
+    staging = f'{directory}.tmp-{os.getpid()}'
+    os.makedirs(staging, exist_ok=True)
+    # New memmaps are zero-filled, so station dummies only need their ones set
+    X = np.lib.format.open_memmap(os.path.join(staging, 'X.npy'), mode='w+', dtype=np.float32,
+                                  shape=(max(n_rows - 1, 0), len(feature_columns)))
+    targets = {name: np.lib.format.open_memmap(os.path.join(staging, f'{name}.npy'), mode='w+',
+                                               dtype=np.float32, shape=(len(X),))
+               for name in TARGETS}
+
+    dtypes = {name: np.float32 for name in MEASURED_COLUMNS + ['aqi']}
+    previous = None  # last row of the previous chunk: timestamp, pm2_5, pm10, aqi
+    row = 0
+    for chunk in pd.read_csv(data_path, chunksize=chunk_rows, dtype=dtypes, parse_dates=['timestamp']):
+        timestamp = chunk['timestamp']
+        if not timestamp.is_monotonic_increasing or (previous and timestamp.iloc[0] < previous['timestamp']):
+            raise ValueError(f'{data_path} must be sorted by timestamp for streaming')
+
+        lags = {}
+        for lag, column in (('pm2_5_lag1', 'pm2_5'), ('pm10_lag1', 'pm10'), ('aqi_lag1', 'aqi')):
+            values = chunk[column].to_numpy()
+            lags[lag] = np.r_[previous[column] if previous else np.nan, values[:-1]].astype(np.float32)
+        valid = np.isfinite(chunk[MEASURED_COLUMNS + ['aqi']].to_numpy()).all(axis=1)
+        valid &= np.isfinite(np.column_stack(list(lags.values()))).all(axis=1) & chunk['station'].notna().to_numpy()
+        keep = np.flatnonzero(valid)
+        out = X[row:row + len(keep)]
+
+        for column in MEASURED_COLUMNS:
+            out[:, position[column]] = chunk[column].to_numpy()[keep]
+        for lag, values in lags.items():
+            out[:, position[lag]] = values[keep]
+        hour = timestamp.dt.hour.to_numpy()[keep]
+        day = timestamp.dt.dayofweek.to_numpy()[keep]
+        month = timestamp.dt.month.to_numpy()[keep]
+        out[:, position['hour']] = hour
+        out[:, position['day_of_week']] = day
+        out[:, position['month']] = month
+        out[:, position['is_weekend']] = day >= 5
+        out[:, position['is_rush_hour']] = np.isin(hour, RUSH_HOURS)
+        out[:, position['is_winter']] = np.isin(month, WINTER_MONTHS)
+        codes = pd.Categorical(chunk['station'], categories=stations).codes[keep]
+        out[np.arange(len(keep)), first_station + codes] = 1
+        for name in TARGETS:
+            targets[name][row:row + len(keep)] = chunk[name].to_numpy()[keep]
+
+        last = chunk.iloc[-1]
+        previous = {'timestamp': last['timestamp'], 'pm2_5': last['pm2_5'],
+                    'pm10': last['pm10'], 'aqi': last['aqi']}
+        row += len(keep)
+
+    X.flush()
+    for values in targets.values():
+        values.flush()
+    del X, targets
+    _publish(staging, directory, data_path, feature_columns, row)
+    feature_set = _open_entry(key, directory, 'r')
+    feature_set.cached = False
+    return feature_set
@@ -0,0 +1,172 @@
+# Feature assembly shared by the API and the benchmarks
+# Maps /api/predict style inputs onto the model's feature_columns order.
+# Column positions and station dummies are resolved once per column list,
+# so building a row is a handful of array writes with no name lookups.
+import numpy as np
+
+RUSH_HOURS = [7, 8, 9, 17, 18, 19, 20]
+WINTER_MONTHS = [11, 12, 1, 2]
+
+# Values used when a request leaves an optional field out
+PREDICT_DEFAULTS = {
+    'so2': 15,
+    'co': 1.2,
+    'o3': 35,
+    'temperature': 28,
+    'humidity': 65,
+    'wind_speed': 8,
+    'day_of_week': 0,
+    'aqi_lag1': 150,
+}
+REQUIRED_FIELDS = ['pm25', 'pm10', 'no2', 'hour', 'month']
+
+# feature column -> request field it is read from
+INPUT_FIELDS = {
+    'pm2_5': 'pm25',
+    'pm10': 'pm10',
+    'no2': 'no2',
+    'so2': 'so2',
+    'co': 'co',
+    'o3': 'o3',
+    'temperature': 'temperature',
+    'humidity': 'humidity',
+    'wind_speed': 'wind_speed',
+    'hour': 'hour',
+    'day_of_week': 'day_of_week',
+    'month': 'month',
+    'pm2_5_lag1': 'pm25',
+    'pm10_lag1': 'pm10',
+    'aqi_lag1': 'aqi_lag1',
+}
+
+# Kind of driver each model feature stands for, used to group explanations
+FEATURE_GROUPS = {
+    'pm2_5': 'pollutants', 'pm10': 'pollutants', 'no2': 'pollutants',
+    'so2': 'pollutants', 'co': 'pollutants', 'o3': 'pollutants',
+    'temperature': 'weather', 'humidity': 'weather', 'wind_speed': 'weather',
+    'hour': 'time_of_day', 'is_rush_hour': 'time_of_day',
+    'day_of_week': 'day_of_week', 'is_weekend': 'day_of_week',
+    'month': 'season', 'is_winter': 'season',
+    'pm2_5_lag1': 'lag', 'pm10_lag1': 'lag', 'aqi_lag1': 'lag',
+}
+
+
+def feature_group(column):
+    '''Explanation group of a feature column; station dummies group together'''
+    if column.startswith('station_'):
+        return 'station'
+    return FEATURE_GROUPS.get(column, 'other')
+
+
+def station_key(name):
+    '''Normalise a station name or id, e.g. "R.K. Puram" -> "rk_puram"'''
+    return name.lower().replace('.', '').replace(' ', '_')
+
+
+class FeatureAssembler:
+    '''Builds model input rows from request dicts for a given feature_columns list'''
+
+    def __init__(self, feature_columns, dtype=np.float64):
+        self.feature_columns = list(feature_columns)
+        self.dtype = dtype
+        position = {name: i for i, name in enumerate(self.feature_columns)}
+
+        self.inputs = [(position[column], field) for column, field in INPUT_FIELDS.items()
+                       if column in position]
+        self.derived = {name: position.get(name)
+                        for name in ('is_weekend', 'is_rush_hour', 'is_winter')}
+
+        # Station dummies are looked up by display name or by API station id
+        self.station_position = {}
+        for name, i in position.items():
+            if name.startswith('station_'):
+                station = name[len('station_'):]
+                self.station_position[station] = i
+                self.station_position[station_key(station)] = i
+
+    def station_index(self, station):
+        if not isinstance(station, str):
+            return None
+        return self.station_position.get(station, self.station_position.get(station_key(station)))
+
+    def vector(self, data):
+        '''One feature row for a single request dict'''
+        row = np.zeros(len(self.feature_columns), dtype=self.dtype)
+        for i, field in self.inputs:
+            row[i] = data[field] if field in data else PREDICT_DEFAULTS[field]
+
+        if self.derived['is_weekend'] is not None:
+            row[self.derived['is_weekend']] = 1 if data.get('day_of_week', 0) in [5, 6] else 0
+        if self.derived['is_rush_hour'] is not None:
+            row[self.derived['is_rush_hour']] = 1 if data['hour'] in RUSH_HOURS else 0
+        if self.derived['is_winter'] is not None:
+            row[self.derived['is_winter']] = 1 if data['month'] in WINTER_MONTHS else 0
+
+        station = self.station_index(data.get('station'))
+        if station is not None:
+            row[station] = 1
+        return row
+
+    def from_columns(self, columns, n_rows):
+        '''Feature matrix from per-field arrays (missing fields take their defaults)'''
+        X = np.zeros((n_rows, len(self.feature_columns)), dtype=self.dtype)
+        for i, field in self.inputs:
+            X[:, i] = columns[field] if field in columns else PREDICT_DEFAULTS[field]
+
+        if self.derived['is_weekend'] is not None and 'day_of_week' in columns:
+            X[:, self.derived['is_weekend']] = np.isin(columns['day_of_week'], [5, 6])
+        if self.derived['is_rush_hour'] is not None:
+            X[:, self.derived['is_rush_hour']] = np.isin(columns['hour'], RUSH_HOURS)
+        if self.derived['is_winter'] is not None:
+            X[:, self.derived['is_winter']] = np.isin(columns['month'], WINTER_MONTHS)
+
+        if 'station' in columns:
+            stations = [self.station_index(s) for s in columns['station']]
+            rows = [r for r, s in enumerate(stations) if s is not None]
+            X[rows, [stations[r] for r in rows]] = 1
+        return X
+
+    def matrix(self, records):
+        '''Feature matrix for a list of request dicts'''
+        fields = {field for _, field in self.inputs} | {'station'}
+        columns = {}
+        for field in fields:
+            if any(field in record for record in records):
+                default = PREDICT_DEFAULTS.get(field)
+                columns[field] = [record.get(field, default) for record in records]
+        return self.from_columns(columns, len(records))
+
+# Bump whenever engineer_features changes what it produces; cached feature
+# matrices from older versions are then ignored
+FEATURE_SPEC_VERSION = 1
+
+# Training feature columns ahead of the station_<name> dummies
+BASE_FEATURE_COLUMNS = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3', 'temperature', 'humidity',
+                        'wind_speed', 'hour', 'day_of_week', 'month', 'is_weekend',
+                        'is_rush_hour', 'is_winter', 'pm2_5_lag1', 'pm10_lag1', 'aqi_lag1']
+
+
+def engineer_features(df):
+    '''Training features as built in script_1.py: calendar parts, rush-hour and
+    winter flags, previous-reading lags and station dummies, rows in time order
+    with the first (lagless) row dropped. Returns (frame, feature_columns).'''
+    import pandas as pd
+
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['hour'] = df['timestamp'].dt.hour
+    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['month'] = df['timestamp'].dt.month
+    df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+    df['is_rush_hour'] = df['hour'].isin(RUSH_HOURS).astype(int)
+    df['is_winter'] = df['month'].isin(WINTER_MONTHS).astype(int)
+
+    df = df.sort_values('timestamp').reset_index(drop=True)
+    df['pm2_5_lag1'] = df['pm2_5'].shift(1)
+    df['pm10_lag1'] = df['pm10'].shift(1)
+    df['aqi_lag1'] = df['aqi'].shift(1)
+
+    station_dummies = pd.get_dummies(df['station'], prefix='station')
+    df = pd.concat([df, station_dummies], axis=1).dropna().reset_index(drop=True)
+
+    return df, BASE_FEATURE_COLUMNS + list(station_dummies.columns)
@@ -0,0 +1,275 @@
+# Spatial helpers for the AirSense Delhi API
+# Projects station coordinates to a local km plane and interpolates station
+# readings onto a lat/lng grid over Delhi-NCR with inverse-distance weighting.
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Delhi-NCR bounding box as (south, west, north, east) in degrees
+DELHI_NCR_BOUNDS = (28.40, 76.84, 28.88, 77.35)
+
+# Reference latitude for the equirectangular projection (Connaught Place)
+REFERENCE_LAT = 28.6139
+
+
+def project_km(lat, lng, ref_lat=REFERENCE_LAT):
+    '''Project lat/lng in degrees to (x, y) km on a local equirectangular plane'''
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    x = np.radians(lng) * EARTH_RADIUS_KM * np.cos(np.radians(ref_lat))
+    y = np.radians(lat) * EARTH_RADIUS_KM
+    return x, y
+
+
+def valid_coordinates(lat, lng):
+    '''True where lat/lng are finite and within -90..90 / -180..180 degrees'''
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        return np.isfinite(lat) & np.isfinite(lng) & (np.abs(lat) <= 90) & (np.abs(lng) <= 180)
+
+
+def grid_axes(bounds, rows, cols):
+    '''Return the latitude and longitude of grid cell centres for a bounding box'''
+    south, west, north, east = bounds
+    return np.linspace(south, north, rows), np.linspace(west, east, cols)
+
+
+def idw_weights(cell_lat, cell_lng, station_lat, station_lng, power=2.0):
+    '''Row-normalised inverse-distance weight matrix of shape (n_cells, n_stations)'''
+    cx, cy = project_km(cell_lat, cell_lng)
+    sx, sy = project_km(station_lat, station_lng)
+    d2 = (cx[:, None] - sx[None, :]) ** 2 + (cy[:, None] - sy[None, :]) ** 2
+
+    # A cell sitting on a station (within ~1 m) takes that station's value
+    exact = d2 < 1e-6
+    with np.errstate(divide='ignore'):
+        weights = np.where(exact, 0.0, d2 ** (-power / 2.0))
+    on_station = exact.any(axis=1)
+    weights[on_station] = exact[on_station]
+
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights
+
+
+class IDWGrid:
+    '''Inverse-distance interpolator for a fixed grid and station layout.
+
+    The weight matrix only depends on geometry, so it is built once and each
+    new set of station readings is interpolated with one matrix-vector product.
+    '''
+
+    def __init__(self, station_lat, station_lng, bounds=DELHI_NCR_BOUNDS,
+                 rows=40, cols=40, power=2.0):
+        self.bounds = tuple(bounds)
+        self.rows = rows
+        self.cols = cols
+        self.power = power
+        self.lats, self.lngs = grid_axes(self.bounds, rows, cols)
+        mesh_lat, mesh_lng = np.meshgrid(self.lats, self.lngs, indexing='ij')
+        self.weights = idw_weights(mesh_lat.ravel(), mesh_lng.ravel(),
+                                   station_lat, station_lng, power)
+
+    def interpolate(self, values):
+        '''Interpolate per-station values onto the grid, shape (rows, cols)'''
+        values = np.asarray(values, dtype=np.float64)
+        return (self.weights @ values).reshape(self.rows, self.cols)
+
+    def sample(self, grid, lat, lng):
+        '''Bilinearly sample an interpolated grid at arbitrary points (clamped to bounds)'''
+        fy = np.interp(lat, self.lats, np.arange(self.rows))
+        fx = np.interp(lng, self.lngs, np.arange(self.cols))
+        y0 = np.minimum(fy.astype(np.int64), self.rows - 2)
+        x0 = np.minimum(fx.astype(np.int64), self.cols - 2)
+        ty, tx = fy - y0, fx - x0
+        top = grid[y0, x0] * (1 - tx) + grid[y0, x0 + 1] * tx
+        bottom = grid[y0 + 1, x0] * (1 - tx) + grid[y0 + 1, x0 + 1] * tx
+        return top * (1 - ty) + bottom * ty
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    '''Great-circle distance in km; array inputs broadcast against each other'''
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64))
+                              for v in (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StationIndex:
+    '''Uniform grid (geohash-style) bucket index over projected station coordinates.
+
+    Stations are sorted by bucket id so each bucket is a contiguous slice of
+    ``order``; nearest-neighbour queries scan rings of buckets outwards from
+    the query point and stop once no unvisited bucket can hold a closer station.
+    '''
+
+    MAX_BUCKETS = 1_000_000
+
+    def __init__(self, lats, lngs, cell_km=5.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        x, y = project_km(self.lats, self.lngs)
+        self.x0, self.y0 = x.min(), y.min()
+
+        extent = max(x.max() - self.x0, y.max() - self.y0, cell_km)
+        self.cell_km = max(cell_km, extent / np.sqrt(self.MAX_BUCKETS))
+        ix, iy = self._bucket(x, y)
+        self.nx, self.ny = int(ix.max()) + 1, int(iy.max()) + 1
+
+        bucket = iy * self.nx + ix
+        self.order = np.argsort(bucket, kind='stable')
+        self.bucket_start = np.searchsorted(bucket[self.order],
+                                            np.arange(self.nx * self.ny + 1))
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _bucket(self, x, y):
+        ix = np.floor((x - self.x0) / self.cell_km).astype(np.int64)
+        iy = np.floor((y - self.y0) / self.cell_km).astype(np.int64)
+        return ix, iy
+
+    def _stations_in(self, ix0, ix1, iy0, iy1):
+        '''Station indices in the (inclusive, clipped) bucket rectangle'''
+        ix0, ix1 = max(ix0, 0), min(ix1, self.nx - 1)
+        iy0, iy1 = max(iy0, 0), min(iy1, self.ny - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+        # Buckets of one grid row are contiguous, so each row is one slice
+        slices = [self.order[self.bucket_start[iy * self.nx + ix0]:
+                             self.bucket_start[iy * self.nx + ix1 + 1]]
+                  for iy in range(iy0, iy1 + 1)]
+        return np.concatenate(slices)
+
+    def nearest(self, lat, lng, k=1):
+        '''Return (indices, distances_km) of the k stations nearest to a point'''
+        if not valid_coordinates(lat, lng):
+            raise ValueError('lat/lng must be finite and within -90..90 / -180..180')
+        k = min(k, len(self))
+        qx, qy = project_km(lat, lng)
+        cx, cy = (int(v) for v in self._bucket(qx, qy))
+        if not (0 <= cx < self.nx and 0 <= cy < self.ny):
+            # Off the grid the projected ring bound is no longer a safe lower
+            # bound on great-circle distance; check every station instead
+            indices, distances = self.nearest_batch([lat], [lng], k)
+            return indices[0], distances[0]
+        # Inside the grid, at most max(nx, ny) rings reach every bucket
+        max_ring = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy)
+
+        found = []
+        n_found = 0
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                ring_stations = self._stations_in(cx, cx, cy, cy)
+            else:
+                ring_stations = np.concatenate([
+                    self._stations_in(cx - ring, cx + ring, cy - ring, cy - ring),
+                    self._stations_in(cx - ring, cx + ring, cy + ring, cy + ring),
+                    self._stations_in(cx - ring, cx - ring, cy - ring + 1, cy + ring - 1),
+                    self._stations_in(cx + ring, cx + ring, cy - ring + 1, cy + ring - 1),
+                ])
+            found.append(ring_stations)
+            n_found += len(ring_stations)
+            if n_found < k:
+                continue
+            # Anything outside rings 0..ring is at least ring * cell_km away
+            candidates = np.concatenate(found)
+            dist = haversine_km(lat, lng, self.lats[candidates], self.lngs[candidates])
+            kth = np.partition(dist, k - 1)[k - 1]
+            if kth <= ring * self.cell_km:
+                break
+
+        candidates = np.concatenate(found)
+        dist = haversine_km(lat, lng, self.lats[candidates], self.lngs[candidates])
+        best = np.argsort(dist, kind='stable')[:k]
+        return candidates[best], dist[best]
+
+    def nearest_batch(self, lats, lngs, k=1, chunk_size=4096):
+        '''Vectorised k-nearest lookup for many points; returns (indices, distances) of shape (m, k)'''
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        if not valid_coordinates(lats, lngs).all():
+            raise ValueError('lat/lng must be finite and within -90..90 / -180..180')
+        k = min(k, len(self))
+        indices = np.empty((len(lats), k), dtype=np.int64)
+        distances = np.empty((len(lats), k), dtype=np.float64)
+
+        for start in range(0, len(lats), chunk_size):
+            stop = start + chunk_size
+            dist = haversine_km(lats[start:stop, None], lngs[start:stop, None],
+                                self.lats[None, :], self.lngs[None, :])
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            part_dist = np.take_along_axis(dist, part, axis=1)
+            rank = np.argsort(part_dist, axis=1, kind='stable')
+            indices[start:stop] = np.take_along_axis(part, rank, axis=1)
+            distances[start:stop] = np.take_along_axis(part_dist, rank, axis=1)
+        return indices, distances
+
+    def within_bbox(self, south, west, north, east):
+        '''Indices of stations inside a lat/lng bounding box, e.g. a map viewport'''
+        (x_lo, x_hi), (y_lo, y_hi) = project_km([south, north], [west, east])
+        ix0, iy0 = self._bucket(x_lo, y_lo)
+        ix1, iy1 = self._bucket(x_hi, y_hi)
+        candidates = self._stations_in(int(ix0), int(ix1), int(iy0), int(iy1))
+        inside = ((self.lats[candidates] >= south) & (self.lats[candidates] <= north)
+                  & (self.lngs[candidates] >= west) & (self.lngs[candidates] <= east))
+        return np.sort(candidates[inside])
+
+
+def sample_polylines(polylines, spacing_km=0.1, max_samples=None):
+    '''Sample points along many polylines at once.
+
+    Returns (lats, lngs, weights_km, route_ids, lengths_km): one entry per
+    sample at the midpoints of equal sub-segments no longer than spacing_km,
+    where weights_km is the path length each sample stands for. Raises
+    ValueError for invalid coordinates, zero-length polylines, or more than
+    max_samples samples (checked before any are allocated).
+    '''
+    counts = np.array([len(points) for points in polylines])
+    vertices = np.concatenate([np.asarray(points, dtype=np.float64).reshape(-1, 2)
+                               for points in polylines])
+    if not valid_coordinates(vertices[:, 0], vertices[:, 1]).all():
+        raise ValueError('points must be finite lat/lng within -90..90 / -180..180')
+    vertex_route = np.repeat(np.arange(len(polylines)), counts)
+
+    # Segments join consecutive vertices of the same route
+    starts = np.flatnonzero(vertex_route[:-1] == vertex_route[1:])
+    seg_route = vertex_route[starts]
+    lat0, lng0 = vertices[starts, 0], vertices[starts, 1]
+    lat1, lng1 = vertices[starts + 1, 0], vertices[starts + 1, 1]
+    seg_km = haversine_km(lat0, lng0, lat1, lng1)
+    lengths_km = np.bincount(seg_route, weights=seg_km, minlength=len(polylines))
+    if not (lengths_km > 0).all():
+        raise ValueError('every route must have a non-zero length')
+
+    n_sub = np.maximum(np.ceil(seg_km / spacing_km), 1).astype(np.int64)
+    if max_samples is not None and n_sub.sum() > max_samples:
+        raise ValueError(f'routes are too long to sample (over {max_samples * spacing_km:,.0f} km in total)')
+    seg_of_sample = np.repeat(np.arange(len(starts)), n_sub)
+    first_sample = np.cumsum(n_sub) - n_sub
+    t = (np.arange(len(seg_of_sample)) - first_sample[seg_of_sample] + 0.5) / n_sub[seg_of_sample]
+
+    lats = lat0[seg_of_sample] + t * (lat1 - lat0)[seg_of_sample]
+    lngs = lng0[seg_of_sample] + t * (lng1 - lng0)[seg_of_sample]
+    weights_km = (seg_km / n_sub)[seg_of_sample]
+    route_ids = seg_route[seg_of_sample]
+    return lats, lngs, weights_km, route_ids, lengths_km
+
+
+def score_routes(interpolator, grid, polylines, spacing_km=0.1, max_samples=None):
+    '''Integrated AQI exposure along each polyline in one vectorised pass.
+
+    Returns (exposure, mean_aqi, max_aqi, length_km) arrays, one entry per
+    route, where exposure is the path integral of AQI in AQI-km.
+    '''
+    n_routes = len(polylines)
+    lats, lngs, weights_km, route_ids, lengths_km = sample_polylines(polylines, spacing_km, max_samples)
+    aqi = interpolator.sample(grid, lats, lngs)
+
+    exposure = np.bincount(route_ids, weights=aqi * weights_km, minlength=n_routes)
+    max_aqi = np.zeros(n_routes)
+    np.maximum.at(max_aqi, route_ids, aqi)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_aqi = np.where(lengths_km > 0, exposure / lengths_km, 0.0)
+    return exposure, mean_aqi, max_aqi, lengths_km
@@ -0,0 +1,259 @@
+# Lookup-table distillation of the AQI models for default-parameter requests
+# Most /api/predict calls only set PM2.5, PM10, NO2, hour, month and station
+# and leave every other field at its PREDICT_DEFAULTS value. For those the
+# point and quantile models are evaluated once, offline, into a memory-mapped
+# float32 table, and serving is a few array reads with no tree walk:
+#   - PM2.5 is cut at the models' own split points, so the table is exact
+#     along it (a tree ensemble is constant between consecutive thresholds);
+#   - hours and months that no split or derived flag tells apart share a slot;
+#   - PM10 and NO2 are binned on evenly spaced knots and interpolated.
+# Requests with other fields set, or outside the grid, go to the full models.
+#
+# Usage (after script_1.py has trained and exported the models):
+#   python lookup_table.py [--knots 8,4] [--output model_lut]
+import argparse
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+from feature_cache import file_sha256
+from features import INPUT_FIELDS, PREDICT_DEFAULTS, RUSH_HOURS, WINTER_MONTHS, FeatureAssembler
+from model_export import EXPORT_PATH, load_models
+from tree_arrays import narrow_thresholds
+
+LUT_VERSION = 1
+LUT_PATH = 'model_lut'
+# Request field tabulated exactly at the models' split points
+SPLIT_FIELD = 'pm25'
+# Interpolated request fields: grid range (covers the 2024 readings) and knots
+INTERPOLATED_AXES = {'pm10': (0.0, 700.0), 'no2': (0.0, 300.0)}
+DEFAULT_KNOTS = (8, 4)
+# Request fields the table answers for; anything else must be at its default
+TABLE_FIELDS = {SPLIT_FIELD, 'hour', 'month', 'station'} | set(INTERPOLATED_AXES)
+
+
+def models_digest(path=EXPORT_PATH):
+    '''Fingerprint of the model export a table was distilled from'''
+    return file_sha256(f'{path}.npz')[:16]
+
+
+def split_points(forest, feature_columns, field):
+    '''Sorted float32 thresholds of every split on a column fed by request field'''
+    columns = [i for i, name in enumerate(feature_columns) if INPUT_FIELDS.get(name) == field]
+    # Leaves carry an infinite threshold
+    split = np.isin(forest.feature, columns) & np.isfinite(forest.threshold)
+    return np.unique(narrow_thresholds(forest.threshold[split], np.float32))
+
+
+def cell_values(points):
+    '''One float32 value inside each cell (points[i-1], points[i]], plus one above the last'''
+    return np.append(points, np.nextafter(points[-1], np.float32(np.inf))) if len(points) \
+        else np.zeros(1, dtype=np.float32)
+
+
+def value_classes(values, points, flagged):
+    '''Slot per value, shared by values on the same side of every split and flag'''
+    keys = [(int(np.searchsorted(points, np.float32(v))), v in flagged) for v in values]
+    slots = {key: i for i, key in enumerate(dict.fromkeys(keys))}
+    return [slots[key] for key in keys]
+
+
+class LookupTable:
+    '''Memory-mapped (station, month slot, hour slot, pm25 cell, pm10, no2, output) table.
+
+    The station axis follows the model's station dummies plus a final slot
+    for requests without a known station; outputs follow the models the
+    table was built from (point model first, then quantiles).
+    '''
+
+    def __init__(self, table, meta, assembler):
+        self.table = table
+        self.meta = meta
+        # Scalar lookups stay in Python: per-request numpy calls would dominate
+        self.split_points = meta['split_points']
+        self.hour_slot = meta['hour_slot']
+        self.month_slot = meta['month_slot']
+        self.axis_names = list(meta['axes'])
+        self.lows = [lo for lo, _ in meta['axes'].values()]
+        self.knots = table.shape[4:6]
+        self.steps = [(hi - lo) / (n - 1) for (lo, hi), n in zip(meta['axes'].values(), self.knots)]
+        self.no_station = table.shape[0] - 1
+        # assembler station position -> station slot
+        dummies = sorted(set(assembler.station_position.values()))
+        self.station_slot = {position: slot for slot, position in enumerate(dummies)}
+        self.assembler = assembler
+
+    @classmethod
+    def load(cls, path, assembler):
+        with open(f'{path}.json') as f:
+            meta = json.load(f)
+        if meta['version'] != LUT_VERSION:
+            raise ValueError(f"Lookup table version {meta['version']} is not {LUT_VERSION}")
+        if meta['feature_columns'] != assembler.feature_columns:
+            raise ValueError('Lookup table was built for different feature columns')
+        if meta['models'] != models_digest():
+            raise ValueError('Lookup table is stale: the models changed since it was built')
+        # Plain ndarray view of the mapping: memmap slices are slow to create
+        return cls(np.asarray(np.load(f'{path}.npy', mmap_mode='r')), meta, assembler)
+
+    def covers(self, data):
+        '''True when the table can answer this request dict'''
+        for field, value in data.items():
+            if field not in TABLE_FIELDS and PREDICT_DEFAULTS.get(field, object()) != value:
+                return False
+        hour, month = data['hour'], data['month']
+        if not (type(hour) is int and type(month) is int and 0 <= hour <= 23 and 1 <= month <= 12):
+            return False
+        value = data[SPLIT_FIELD]
+        if type(value) not in (int, float) or not math.isfinite(value):
+            return False
+        for field, (lo, hi) in INTERPOLATED_AXES.items():
+            value = data[field]
+            if type(value) not in (int, float) or not lo <= value <= hi:
+                return False
+        return True
+
+    def predict(self, data):
+        '''Outputs (n_outputs,) for a request dict the table covers'''
+        position = self.assembler.station_index(data.get('station'))
+        station = self.no_station if position is None else self.station_slot[position]
+        # Models see float32 features, so the cell is found the same way
+        cell = bisect_left(self.split_points, float(np.float32(data[SPLIT_FIELD])))
+        (lo1, lo2), (step1, step2) = self.lows, self.steps
+        t1, t2 = (data[self.axis_names[0]] - lo1) / step1, (data[self.axis_names[1]] - lo2) / step2
+        i1, i2 = min(int(t1), self.knots[0] - 2), min(int(t2), self.knots[1] - 2)
+        f1, f2 = t1 - i1, t2 - i2
+        corners = self.table[station, self.month_slot[data['month'] - 1], self.hour_slot[data['hour']],
+                             cell, i1:i1 + 2, i2:i2 + 2]
+        weights = np.array([(1 - f1) * (1 - f2), (1 - f1) * f2, f1 * (1 - f2), f1 * f2], dtype=np.float32)
+        return weights @ corners.reshape(4, -1)
+
+
+def build_lookup_table(forest, feature_columns, path=LUT_PATH, knots=DEFAULT_KNOTS):
+    '''Evaluate a FlatForest of the models over the grid into {path}.npy and write {path}.json'''
+    assembler = FeatureAssembler(feature_columns, dtype=np.float32)
+    dummies = sorted(set(assembler.station_position.values()))
+    points = split_points(forest, feature_columns, SPLIT_FIELD)
+    hour_slot = value_classes(range(24), split_points(forest, feature_columns, 'hour'), RUSH_HOURS)
+    month_slot = value_classes(range(1, 13), split_points(forest, feature_columns, 'month'), WINTER_MONTHS)
+    # One representative hour and month per slot
+    hours = [hour_slot.index(slot) for slot in range(max(hour_slot) + 1)]
+    months = [month_slot.index(slot) + 1 for slot in range(max(month_slot) + 1)]
+
+    # (hour, pm25 cell, pm10 knot, no2 knot) rows of one month slot, hour-major
+    axes = [np.arange(len(hours)), cell_values(points)] + \
+        [np.linspace(lo, hi, n) for (lo, hi), n in zip(INTERPOLATED_AXES.values(), knots)]
+    mesh = [values.ravel() for values in np.meshgrid(*axes, indexing='ij')]
+    columns = dict({SPLIT_FIELD: mesh[1]}, **dict(zip(INTERPOLATED_AXES, mesh[2:])),
+                   hour=np.array(hours)[mesh[0]])
+    block_shape = (len(hours), len(axes[1]), *knots, forest.n_models)
+
+    shape = (len(dummies) + 1, len(months)) + block_shape
+    table = np.lib.format.open_memmap(f'{path}.npy.tmp', mode='w+', dtype=np.float32, shape=shape)
+    for m, month in enumerate(months):
+        X = assembler.from_columns(dict(columns, month=np.full(len(mesh[0]), month)), len(mesh[0]))
+        for slot in range(len(dummies) + 1):
+            X[:, dummies] = 0
+            if slot < len(dummies):
+                X[:, dummies[slot]] = 1
+            table[slot, m] = forest.predict(X).reshape(block_shape)
+    table.flush()
+    del table
+
+    meta = {
+        'version': LUT_VERSION,
+        'split_field': SPLIT_FIELD,
+        'split_points': points.tolist(),
+        'axes': INTERPOLATED_AXES,
+        'hour_slot': hour_slot,
+        'month_slot': month_slot,
+        'feature_columns': list(feature_columns),
+        'models': models_digest(),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(f'{path}.json.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f'{path}.npy.tmp', f'{path}.npy')
+    os.replace(f'{path}.json.tmp', f'{path}.json')
+    return meta
+
+
+def accuracy_report(table, forest, history):
+    '''LUT vs full models on the historical readings, as default-parameter requests'''
+    records = [{'pm25': float(r.pm2_5), 'pm10': float(r.pm10), 'no2': float(r.no2),
+                'hour': int(r.timestamp.hour), 'month': int(r.timestamp.month), 'station': r.station}
+               for r in history.itertuples()]
+    records = [r for r in records if table.covers(r)]
+    assembler = table.assembler
+    X = assembler.matrix(records)
+    expected = forest.predict(X)
+
+    started = time.perf_counter()
+    predicted = np.array([table.predict(r) for r in records])
+    lut_seconds = (time.perf_counter() - started) / len(records)
+    started = time.perf_counter()
+    for r in records[:500]:
+        forest.predict(assembler.vector(r).reshape(1, -1))
+    model_seconds = (time.perf_counter() - started) / min(len(records), 500)
+
+    error = predicted - expected
+    return {
+        'requests': len(records),
+        'coverage': len(records) / len(history),
+        'mae': float(np.abs(error[:, 0]).mean()),
+        'p99_abs_error': float(np.percentile(np.abs(error[:, 0]), 99)),
+        'max_abs_error': float(np.abs(error[:, 0]).max()),
+        'quantile_mae': float(np.abs(error[:, 1:]).mean()) if error.shape[1] > 1 else None,
+        'quantile_max_abs_error': float(np.abs(error[:, 1:]).max()) if error.shape[1] > 1 else None,
+        'rounded_agreement': float((np.round(predicted[:, 0]) == np.round(expected[:, 0])).mean()),
+        'lut_us_per_request': lut_seconds * 1e6,
+        'model_us_per_request': model_seconds * 1e6,
+    }
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Distill the AQI models into a lookup table')
+    parser.add_argument('--knots', default=','.join(map(str, DEFAULT_KNOTS)),
+                        help=f"interpolation knots along {','.join(INTERPOLATED_AXES)}")
+    parser.add_argument('--output', default=LUT_PATH, help='writes OUTPUT.npy and OUTPUT.json')
+    parser.add_argument('--data', default='delhi_air_quality_2024.csv', help='readings for the accuracy report')
+    args = parser.parse_args()
+    knots = tuple(int(k) for k in args.knots.split(','))
+    if len(knots) != len(INTERPOLATED_AXES) or min(knots) < 2:
+        parser.error(f'--knots needs {len(INTERPOLATED_AXES)} values of at least 2')
+
+    exported = load_models()
+    forest, feature_columns = exported.forest, exported.feature_columns
+
+    started = time.perf_counter()
+    build_lookup_table(forest, feature_columns, args.output, knots)
+    assembler = FeatureAssembler(feature_columns)
+    table = LookupTable.load(args.output, assembler)
+    print(f"🧮 Lookup table {table.table.shape} ({table.table.nbytes / 2**20:.1f} MiB) "
+          f"built in {time.perf_counter() - started:.1f}s: {args.output}.npy")
+
+    history = pd.read_csv(args.data, parse_dates=['timestamp'])
+    report = accuracy_report(table, forest, history)
+    print(f"\n📏 Accuracy on {report['requests']} historical readings as default-parameter requests "
+          f"({report['coverage']:.1%} inside the grid)")
+    print(f"  MAE {report['mae']:.3f} AQI, p99 {report['p99_abs_error']:.3f}, max {report['max_abs_error']:.3f}")
+    if report['quantile_mae'] is not None:
+        print(f"  Quantile bounds MAE {report['quantile_mae']:.3f} AQI, max {report['quantile_max_abs_error']:.3f}")
+    print(f"  Same rounded AQI as the models: {report['rounded_agreement']:.1%}")
+    print(f"  {report['lut_us_per_request']:.1f} us per request vs {report['model_us_per_request']:.1f} us "
+          f"through the models")
+    with open(f'{args.output}.json') as f:
+        meta = json.load(f)
+    meta['accuracy'] = report
+    with open(f'{args.output}.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
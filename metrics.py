@@ -0,0 +1,139 @@
+# In-process metrics with Prometheus text exposition
+# Every thread writes to its own shard, so recording a counter or histogram
+# sample never takes a lock; shards are only merged when /metrics is scraped.
+# Shards of finished threads are folded into a retired total at scrape time.
+import threading
+from bisect import bisect_left
+
+# Shard registrations between sweeps for dead threads when /metrics is never scraped
+RETIRE_EVERY = 256
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard:
+    __slots__ = ('thread', 'counters', 'histograms')
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+
+
+class MetricsRegistry:
+    '''Counters and fixed-bucket histograms keyed by metric name and label tuple'''
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retire_at = RETIRE_EVERY
+        self._retired = _Shard(None)
+        self._meta = {}
+        self._collectors = []
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+
+    def add_collector(self, collect):
+        '''Register a callable returning [(name, labels, value)] counter samples at scrape time'''
+        self._collectors.append(collect)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+                # Thread-per-request servers make a shard per request; fold the
+                # dead ones in here too so the list stays bounded without scrapes
+                if len(self._shards) >= self._retire_at:
+                    self._retire_dead()
+                    self._retire_at = len(self._shards) + RETIRE_EVERY
+        return shard
+
+    def _retire_dead(self):
+        '''Fold shards of finished threads into the retired total (caller holds _lock)'''
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                _merge(self._retired, shard)
+        self._shards = live
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the running sum
+            counts = histograms[key] = [0] * (len(self._meta[name][2]) + 2)
+        counts[bisect_left(self._meta[name][2], value)] += 1
+        counts[-1] += value
+
+    def collect(self):
+        '''Merge all shards into (counters, histograms) dicts'''
+        with self._lock:
+            self._retire_dead()
+            total = _Shard(None)
+            _merge(total, self._retired)
+            for shard in self._shards:
+                _merge(total, shard)
+        return total.counters, total.histograms
+
+    def render(self):
+        '''Prometheus text exposition format (version 0.0.4)'''
+        counters, histograms = self.collect()
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                counters[(name, labels)] = value
+
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else repr(float(bound))
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {counts[-1]}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(into, shard):
+    # list() copies are atomic under the GIL, so a writer cannot break the loop
+    for key, value in list(shard.counters.items()):
+        into.counters[key] = into.counters.get(key, 0) + value
+    for key, counts in list(shard.histograms.items()):
+        existing = into.histograms.get(key)
+        if existing is None:
+            into.histograms[key] = list(counts)
+        else:
+            for i, count in enumerate(list(counts)):
+                existing[i] += count
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
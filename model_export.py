@@ -0,0 +1,164 @@
+# Portable export of the serving models
+# A pickled scikit-learn model only loads under the scikit-learn version that
+# wrote it, and unpickling runs arbitrary code. The export is plain data: the
+# gradient boosting point and quantile models as node arrays
+# (tree_arrays.ensemble_arrays) and the linear model as coefficients, in one
+# .npz, plus versioned JSON metadata (feature columns, quantiles, importances,
+# provenance). load_models() reads it back with NumPy alone, so a serving
+# worker never imports scikit-learn and is unaffected by upgrading it.
+#
+# Usage (script_1.py exports after training; this re-exports the current pickles):
+#   python model_export.py [--output model_export]
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from feature_cache import file_sha256
+from tree_arrays import FlatForest, ensemble_arrays
+
+EXPORT_FORMAT = 'airsense-models'
+EXPORT_VERSION = 1
+EXPORT_PATH = 'model_export'
+# Arrays stored per tree ensemble, as '<output>.<key>' in the .npz
+ENSEMBLE_KEYS = ['feature', 'threshold', 'left', 'right', 'value', 'roots',
+                 'learning_rate', 'init', 'depth', 'n_features']
+
+
+class TreeModel:
+    '''One exported gradient boosting model, with the predict() of the original'''
+
+    def __init__(self, forest, feature_importances):
+        self.forest = forest
+        self.feature_importances_ = np.array(feature_importances)
+        self.n_features_in_ = forest.n_features
+
+    def predict(self, X):
+        return self.forest.predict(X)[:, 0]
+
+
+class LinearModel:
+    '''Linear regression with its StandardScaler folded into the coefficients.
+
+    coef . (x - mean) / scale + intercept is rewritten once as
+    (coef / scale) . x + (intercept - coef . mean / scale), so predict() is a
+    single dot product (GEMV over a batch) with no transform step.
+    '''
+
+    def __init__(self, coef, intercept, mean, scale, dtype=np.float64):
+        coef = np.asarray(coef, dtype=np.float64) / scale
+        self.dtype = np.dtype(dtype)
+        self.coef = coef.astype(self.dtype)
+        self.intercept = float(intercept) - float(coef @ mean)
+        self.n_features_in_ = len(coef)
+
+    @classmethod
+    def from_fitted(cls, linear, scaler=None, dtype=np.float64):
+        '''Fold a fitted LinearRegression and the StandardScaler it was trained behind'''
+        n = len(linear.coef_)
+        return cls(linear.coef_, linear.intercept_, scaler.mean_ if scaler else np.zeros(n),
+                   scaler.scale_ if scaler else np.ones(n), dtype)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=self.dtype) @ self.coef + self.intercept
+
+
+class ExportedModels:
+    '''Everything load_models() reads back from an export'''
+
+    def __init__(self, meta, point, forest, linear):
+        self.meta = meta
+        self.feature_columns = meta['feature_columns']
+        self.quantiles = meta['quantiles']
+        self.point = point
+        # Point model and every quantile in one pass (outputs in meta['outputs'] order)
+        self.forest = forest
+        self.linear = linear
+
+
+def export_models(path, model, feature_columns, quantile_models=(), quantiles=(), linear=None, scaler=None):
+    '''Write {path}.npz and {path}.json for a point model, its quantiles and the linear model'''
+    import sklearn
+
+    outputs = ['point'] + [f'p{int(round(q * 100))}' for q in quantiles]
+    arrays = {}
+    for name, ensemble in zip(outputs, [model, *quantile_models]):
+        for key, value in ensemble_arrays(ensemble).items():
+            arrays[f'{name}.{key}'] = value
+    if linear is not None:
+        arrays['linear.coef'] = np.asarray(linear.coef_, dtype=np.float64)
+        arrays['linear.intercept'] = np.float64(linear.intercept_)
+        arrays['linear.mean'] = np.asarray(scaler.mean_ if scaler else np.zeros(len(feature_columns)), dtype=np.float64)
+        arrays['linear.scale'] = np.asarray(scaler.scale_ if scaler else np.ones(len(feature_columns)), dtype=np.float64)
+
+    # np.savez appends .npz to names without it, so stage under a .npz name
+    np.savez(f'{path}.tmp.npz', **arrays)
+    meta = {
+        'format': EXPORT_FORMAT,
+        'version': EXPORT_VERSION,
+        'outputs': outputs,
+        'quantiles': list(quantiles),
+        'linear': linear is not None,
+        'feature_columns': list(feature_columns),
+        'feature_importances': [round(float(v), 6) for v in model.feature_importances_],
+        'trained_with': f'scikit-learn {sklearn.__version__}',
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'arrays_sha256': file_sha256(f'{path}.tmp.npz'),
+    }
+    with open(f'{path}.json.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f'{path}.tmp.npz', f'{path}.npz')
+    os.replace(f'{path}.json.tmp', f'{path}.json')
+    return meta
+
+
+def load_models(path=EXPORT_PATH, dtype=np.float64):
+    '''Read an export back with NumPy only (dtype as for FlatForest)'''
+    with open(f'{path}.json') as f:
+        meta = json.load(f)
+    if meta.get('format') != EXPORT_FORMAT or meta.get('version') != EXPORT_VERSION:
+        raise ValueError(f"Unsupported model export: {meta.get('format')} v{meta.get('version')}")
+    if file_sha256(f'{path}.npz') != meta['arrays_sha256']:
+        raise ValueError(f'{path}.npz does not match {path}.json; re-export the models')
+
+    with np.load(f'{path}.npz', allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    ensembles = [{key: arrays[f'{name}.{key}'] for key in ENSEMBLE_KEYS} for name in meta['outputs']]
+    point = TreeModel(FlatForest.from_arrays(ensembles[:1], dtype), meta['feature_importances'])
+    forest = FlatForest.from_arrays(ensembles, dtype)
+    linear = LinearModel(arrays['linear.coef'], arrays['linear.intercept'], arrays['linear.mean'],
+                         arrays['linear.scale'], dtype) if meta['linear'] else None
+    return ExportedModels(meta, point, forest, linear)
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Export the pickled models to the portable format')
+    parser.add_argument('--output', default=EXPORT_PATH, help='writes OUTPUT.npz and OUTPUT.json')
+    args = parser.parse_args()
+
+    with open('feature_columns.json') as f:
+        feature_columns = json.load(f)
+    model = joblib.load('model_gradient_boosting.pkl')
+    bundle = joblib.load('model_quantiles.pkl') if os.path.exists('model_quantiles.pkl') else {}
+    linear = joblib.load('model_linear_regression.pkl')
+    scaler = joblib.load('scaler_linear_regression.pkl')
+
+    meta = export_models(args.output, model, feature_columns, bundle.get('models', []),
+                         bundle.get('quantiles', []), linear, scaler)
+    print(f"✅ Exported {', '.join(meta['outputs'])} + linear ({meta['trained_with']}): "
+          f"{args.output}.npz ({os.path.getsize(f'{args.output}.npz') / 1024:.0f} KiB), {args.output}.json")
+
+    # The export must reproduce the pickles it came from
+    X = np.random.default_rng(0).uniform(0, 300, size=(1000, len(feature_columns)))
+    exported = load_models(args.output)
+    expected = np.column_stack([m.predict(X) for m in [model] + bundle.get('models', [])])
+    print(f"   max |difference| vs pickles: trees {np.abs(exported.forest.predict(X) - expected).max():.2e}, "
+          f"linear {np.abs(exported.linear.predict(X) - linear.predict(scaler.transform(X))).max():.2e}")
+
+
+if __name__ == '__main__':
+    main()
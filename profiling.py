@@ -0,0 +1,105 @@
+# Opt-in stack-sampling profiler for production requests
+# While at least one request is being profiled, a background thread samples
+# that request's Python stack every `interval` seconds and counts identical
+# stacks. Output is the collapsed-stack format read by flamegraph.pl and
+# speedscope ("root;caller;callee count"). When no request is profiled there
+# is no sampler thread and the per-request cost is one attribute check.
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class RequestProfiler:
+    '''Samples the stacks of selected request threads and aggregates them in memory'''
+
+    def __init__(self, interval=0.001, max_stacks=20000, idle_timeout=1.0):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.idle_timeout = idle_timeout
+        self.sample_rate = 0.0
+        self.profiled_requests = 0
+        self.dropped_samples = 0
+        self._stacks = Counter()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    def should_profile(self):
+        '''Decide whether to profile the current request from the sample rate'''
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, label):
+        '''Start sampling the calling thread; label becomes the root frame'''
+        with self._lock:
+            self._active[threading.get_ident()] = label
+            self.profiled_requests += 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._sampler.start()
+
+    def stop(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        idle_since = None
+        while True:
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > self.idle_timeout:
+                        self._sampler = None
+                        return
+                else:
+                    idle_since = None
+
+            if active:
+                frames = sys._current_frames()
+                for thread_id, label in active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._record(label, frame)
+            time.sleep(self.interval)
+
+    def _record(self, label, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        stack.append(label)
+        key = ';'.join(reversed(stack))
+
+        with self._lock:
+            if key in self._stacks or len(self._stacks) < self.max_stacks:
+                self._stacks[key] += 1
+            else:
+                self.dropped_samples += 1
+
+    def collapsed(self):
+        '''Aggregated samples as collapsed-stack text, heaviest stacks first'''
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+    def status(self):
+        with self._lock:
+            return {
+                'sample_rate': self.sample_rate,
+                'interval_ms': self.interval * 1000,
+                'profiled_requests': self.profiled_requests,
+                'unique_stacks': len(self._stacks),
+                'samples': sum(self._stacks.values()),
+                'dropped_samples': self.dropped_samples,
+                'active': len(self._active),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.profiled_requests = 0
+            self.dropped_samples = 0
@@ -0,0 +1,170 @@
+# Streaming anomaly detection and alarm handling for feeder telemetry
+# EWMADetector keeps an exponentially weighted mean and variance for every
+# feeder x channel and scores each incoming frame against those control
+# limits in one vectorised step. AlarmManager deduplicates alarms (one active
+# alarm per feeder/condition until it clears), rate-limits them per feeder
+# and fleet-wide, and pushes raised alarms to subscriber queues.
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+def normal_confidence(z):
+    '''P(|Z| < |z|) for a standard normal, i.e. erf(|z| / sqrt(2)), vectorised.
+
+    Uses the Abramowitz & Stegun 7.1.26 approximation (abs error < 1.5e-7).
+    '''
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return 1.0 - poly * np.exp(-x * x)
+
+
+class EWMADetector:
+    '''EWMA control limits for every feeder and channel at once.
+
+    A reading is anomalous when it is more than `threshold` EWMA standard
+    deviations from the EWMA mean; the condition clears below `clear_threshold`
+    (hysteresis). Anomalous readings do not update the baseline, so a
+    sustained fault does not become the new normal. A raised condition only
+    becomes active once acknowledge() confirms its alarm was recorded, so one
+    the alarm rate limits suppressed is raised again on the next frame.
+    NaN marks a channel missing from the frame: it is neither scored nor learned.
+    '''
+
+    def __init__(self, shape, alpha=0.05, threshold=5.0, clear_threshold=3.0,
+                 warmup=30, min_std=None):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.clear_threshold = clear_threshold
+        self.warmup = warmup
+        self.mean = np.zeros(shape)
+        self.var = np.zeros(shape)
+        self.count = np.zeros(shape)
+        self.active = np.zeros(shape, dtype=bool)
+        # Floor on the standard deviation (per channel) so flat signals do not alarm on noise
+        self.min_std = np.broadcast_to(np.asarray(min_std if min_std is not None else 1e-6, dtype=np.float64), shape)
+
+    def update(self, frame):
+        '''Score a frame; returns (z, raised, cleared) where raised/cleared are (feeder, channel) index arrays'''
+        frame = np.asarray(frame, dtype=np.float64)
+        valid = ~np.isnan(frame)
+        std = np.maximum(np.sqrt(self.var), self.min_std)
+        z = np.where(valid & (self.count >= self.warmup), (frame - self.mean) / std, 0.0)
+
+        anomalous = np.abs(z) >= self.threshold
+        raised = anomalous & ~self.active
+        cleared = self.active & valid & (np.abs(z) < self.clear_threshold)
+        self.active &= ~cleared
+
+        # Update the baseline with in-control readings only
+        learn = valid & ~anomalous
+        first = learn & (self.count == 0)
+        delta = np.where(learn, frame - self.mean, 0.0)
+        self.mean = np.where(first, frame, self.mean + self.alpha * delta)
+        self.var = np.where(learn & ~first,
+                            (1 - self.alpha) * (self.var + self.alpha * delta * delta), self.var)
+        self.count += learn
+        return z, np.nonzero(raised), np.nonzero(cleared)
+
+    def acknowledge(self, feeder, channel):
+        '''Mark a raised condition active once its alarm has been recorded'''
+        self.active[feeder, channel] = True
+
+
+class AlarmManager:
+    '''Alarm list with deduplication, per-feeder and fleet-wide rate limits, and subscribers'''
+
+    def __init__(self, max_alarms=500, feeder_burst=3, feeder_refill_seconds=60.0,
+                 storm_limit=50, storm_window=10.0, subscriber_queue_size=1000):
+        self.alarms = deque(maxlen=max_alarms)
+        self.active = {}
+        self.feeder_burst = feeder_burst
+        self.feeder_refill_seconds = feeder_refill_seconds
+        self.storm_limit = storm_limit
+        self.storm_window = storm_window
+        self.subscriber_queue_size = subscriber_queue_size
+        self.suppressed = 0
+        self.dropped = 0
+        self._tokens = {}
+        self._recent = deque()
+        self._counter = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def _allow(self, feeder, now):
+        '''Token bucket per feeder plus a sliding-window cap for the whole fleet'''
+        while self._recent and now - self._recent[0] > self.storm_window:
+            self._recent.popleft()
+        if len(self._recent) >= self.storm_limit:
+            return False
+
+        tokens, updated = self._tokens.get(feeder, (self.feeder_burst, now))
+        tokens = min(self.feeder_burst, tokens + (now - updated) / self.feeder_refill_seconds)
+        if tokens < 1:
+            self._tokens[feeder] = (tokens, now)
+            return False
+        self._tokens[feeder] = (tokens - 1, now)
+        self._recent.append(now)
+        return True
+
+    def raise_alarm(self, key, feeder, alarm_type, severity, confidence, **details):
+        '''Raise an alarm unless the same condition is active or the rate limits say no'''
+        now = time.time()
+        with self._lock:
+            if key in self.active:
+                return None
+            if not self._allow(feeder, now):
+                self.suppressed += 1
+                return None
+            self._counter += 1
+            alarm = dict({
+                'id': f'ALM{self._counter:03d}',
+                'feeder': feeder,
+                'type': alarm_type,
+                'severity': severity,
+                'time': datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'ml_confidence': round(float(confidence) * 100, 1)
+            }, **details)
+            self.active[key] = alarm
+            self.alarms.appendleft(alarm)
+            subscribers = list(self._subscribers)
+
+        dropped = 0
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(alarm)
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            with self._lock:
+                self.dropped += dropped
+        return alarm
+
+    def clear(self, key):
+        with self._lock:
+            return self.active.pop(key, None)
+
+    def list(self, severity=None):
+        with self._lock:
+            return [a for a in self.alarms if not severity or a['severity'] == severity]
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {'total_alarms': len(self.alarms), 'active_conditions': len(self.active),
+                    'suppressed': self.suppressed, 'dropped_deliveries': self.dropped,
+                    'subscribers': len(self._subscribers)}
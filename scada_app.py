@@ -0,0 +1,546 @@
+from flask import Flask, Response, request, render_template_string
+from flask_cors import CORS
+import joblib
+import numpy as np
+from datetime import datetime, timezone
+import queue
+import threading
+import time
+import os
+
+from serialization import json_response, dumps
+from scada_anomaly import AlarmManager, EWMADetector, normal_confidence
+from scada_telemetry import TelemetryStore
+from scada_topology import KIND_NAMES, build_network
+from scada_model import (CHANNELS, CHANNEL_INDEX, FAULT_TYPES, FEEDERS, MODEL_PATH, NO_FAULT,
+                         FeederFleet, FleetSimulator, synthetic_feeders)
+
+app = Flask(__name__)
+CORS(app)  # Enable CORS for all domains
+
+# Cycle settings; telemetry is simulated unless SCADA_SIMULATE=0
+CYCLE_SECONDS = float(os.environ.get('SCADA_CYCLE_SECONDS', 2))
+SIMULATE = os.environ.get('SCADA_SIMULATE', '1') == '1'
+SYNTHETIC_FEEDERS = int(os.environ.get('SCADA_SYNTHETIC_FEEDERS', 0))
+MAX_ALARMS = 500
+
+# Load the fault classifier built by `python scada_model.py` (a deploy step);
+# without it telemetry, anomalies and topology still run but nothing is classified
+try:
+    bundle = joblib.load(MODEL_PATH)
+    print("✅ Fault classifier loaded successfully")
+except FileNotFoundError:
+    print(f"⚠️ {MODEL_PATH} not found, fault classification disabled (build it with python scada_model.py)")
+    bundle = None
+
+FAULT_BY_CODE = {fault['code']: fault for fault in FAULT_TYPES}
+
+fleet = FeederFleet(FEEDERS + synthetic_feeders(SYNTHETIC_FEEDERS))
+simulator = FleetSimulator(fleet, seed=42)
+store = TelemetryStore(len(fleet), CHANNELS)
+network = build_network(fleet.feeders)
+FEEDER_NODES = np.array([network.index[feeder_id] for feeder_id in fleet.ids])
+MAX_TREND_POINTS = 2000
+
+# Noise floor per channel for the anomaly detector (V, A, MW, degC)
+CHANNEL_MIN_STD = {'voltage_a': 20.0, 'voltage_b': 20.0, 'voltage_c': 20.0,
+                   'current_a': 2.0, 'current_b': 2.0, 'current_c': 2.0,
+                   'neutral_current': 1.0, 'power': 0.02, 'temperature': 0.2}
+SSE_KEEPALIVE_SECONDS = 15
+
+state_lock = threading.Lock()
+alarm_manager = AlarmManager(max_alarms=MAX_ALARMS)
+# Feeders in a fault class whose alarm has not been raised yet
+pending_faults = set()
+detector = EWMADetector((len(fleet), len(CHANNELS)),
+                        min_std=np.array([CHANNEL_MIN_STD[c] for c in CHANNELS]))
+cycle_stats = {'cycles': 0, 'last_cycle_ms': 0.0, 'last_cycle_at': None, 'total_predictions': 0}
+_cycle_thread = None
+_cycle_lock = threading.Lock()
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def prediction_status(code):
+    '''Human-readable prediction, matching the dashboard's runMLPrediction output'''
+    if code == NO_FAULT:
+        return 'Normal Operation'
+    return f"{FAULT_BY_CODE[code]['name']} Fault Detected"
+
+
+def anomaly_alarm_type(channel, z):
+    '''Operator-facing name for a telemetry anomaly'''
+    high = z > 0
+    if channel.startswith('voltage'):
+        return f"Voltage {'Swell' if high else 'Sag'} on Phase {channel[-1].upper()}"
+    if channel.startswith('current'):
+        return f"{'Overcurrent' if high else 'Current Drop'} on Phase {channel[-1].upper()}"
+    if channel == 'neutral_current':
+        return 'Neutral Current Anomaly'
+    if channel == 'temperature':
+        return 'High Temperature Warning' if high else 'Temperature Sensor Anomaly'
+    return f"Power {'Surge' if high else 'Loss'} Detected"
+
+
+def anomaly_severity(z):
+    return 'critical' if abs(z) >= 10 else 'major' if abs(z) >= 7 else 'minor'
+
+
+def raise_fault_alarms(previous, prediction, confidence):
+    '''Raise an alarm for each feeder whose prediction moved into a fault class.
+
+    A fault alarm the rate limits suppress stays pending and is retried every
+    cycle until it is raised or the feeder's prediction changes.
+    '''
+    for i in np.flatnonzero(prediction != previous):
+        pending_faults.discard(i)
+        if previous[i] != NO_FAULT:
+            alarm_manager.clear(('fault', i, previous[i]))
+        if prediction[i] != NO_FAULT:
+            pending_faults.add(i)
+
+    for i in sorted(pending_faults):
+        fault = FAULT_BY_CODE[prediction[i]]
+        alarm = alarm_manager.raise_alarm(('fault', i, prediction[i]), fleet.ids[i], f"{fault['name']} Fault",
+                                          fault['severity'], confidence[i], fault_code=fault['code'])
+        if alarm is not None:
+            pending_faults.discard(i)
+
+
+def detect_anomalies(frame):
+    '''Score a telemetry frame for every feeder and channel; alarm on new excursions'''
+    frame = np.where(fleet.isolated[:, None], np.nan, frame)
+    z, raised, cleared = detector.update(frame)
+    confidence = normal_confidence(z[raised])
+
+    for f, c, conf in zip(*raised, confidence):
+        channel = CHANNELS[c]
+        alarm = alarm_manager.raise_alarm(('anomaly', f, c), fleet.ids[f], anomaly_alarm_type(channel, z[f, c]),
+                                          anomaly_severity(z[f, c]), conf, channel=channel,
+                                          value=round(float(frame[f, c]), 2), z_score=round(float(z[f, c]), 2))
+        # Suppressed by the rate limits: left inactive, so the next frame retries it
+        if alarm is not None:
+            detector.acknowledge(f, c)
+    for f, c in zip(*cleared):
+        alarm_manager.clear(('anomaly', f, c))
+
+
+def run_cycle():
+    '''One SCADA cycle: refresh telemetry (if simulated) and classify every feeder in one batch'''
+    started = time.perf_counter()
+    with state_lock:
+        if SIMULATE:
+            frame = simulator.step()
+            store.append(time.time(), frame)
+            detect_anomalies(frame)
+        if bundle is not None:
+            previous = fleet.prediction.copy()
+            prediction, confidence = fleet.classify(bundle)
+            raise_fault_alarms(previous, prediction, confidence)
+            cycle_stats['total_predictions'] += len(fleet)
+
+        cycle_stats['cycles'] += 1
+        cycle_stats['last_cycle_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        cycle_stats['last_cycle_at'] = utc_now()
+
+
+def cycle_loop():
+    while True:
+        started = time.monotonic()
+        try:
+            run_cycle()
+        except Exception:
+            app.logger.exception('SCADA cycle failed')
+        time.sleep(max(0.0, CYCLE_SECONDS - (time.monotonic() - started)))
+
+
+def start_cycle():
+    '''Start the background classification cycle once per process'''
+    global _cycle_thread
+    with _cycle_lock:
+        if _cycle_thread is None:
+            _cycle_thread = threading.Thread(target=cycle_loop, name='scada-cycle', daemon=True)
+            _cycle_thread.start()
+
+
+@app.before_request
+def ensure_cycle_started():
+    start_cycle()
+
+
+def feeder_payload(i, status):
+    '''Dashboard view of one feeder (same keys as the KSEBSystem feeder objects)'''
+    telemetry = fleet.telemetry[i]
+    return {
+        'id': fleet.ids[i],
+        'name': fleet.feeders[i]['name'],
+        'voltage': round(float(telemetry[0:3].mean()), 1),
+        'current': round(float(telemetry[3:6].mean()), 1),
+        'power': round(float(telemetry[CHANNEL_INDEX['power']]), 2),
+        'temperature': round(float(telemetry[CHANNEL_INDEX['temperature']]), 1),
+        'status': status[i],
+        'prediction': {
+            'fault_code': None if fleet.prediction[i] == NO_FAULT else fleet.prediction[i],
+            'status': prediction_status(fleet.prediction[i]),
+            'confidence': round(float(fleet.confidence[i]) * 100, 1)
+        }
+    }
+
+
+def sync_isolation():
+    '''Feeders whose breaker node lost supply in the topology are isolated'''
+    fleet.isolated = ~network.energised[FEEDER_NODES]
+
+
+def node_summary(nodes):
+    '''Counts by kind and affected feeders for a set of topology nodes'''
+    kinds = np.bincount(network.kinds[nodes], minlength=len(KIND_NAMES))
+    feeders = sorted({network.node_ids[n].split('-')[0] for n in nodes
+                      if network.node_ids[n].split('-')[0] in fleet.index})
+    return {'total_nodes': int(len(nodes)), 'by_kind': dict(zip(KIND_NAMES, kinds.tolist())),
+            'feeders': feeders}
+
+
+def lookup_node(node_id):
+    node = network.index.get(node_id)
+    if node is None:
+        return None, (json_response({'error': f'Unknown topology node: {node_id}'}), 404)
+    return node, None
+
+
+@app.route('/')
+def home():
+    '''API Documentation Home Page'''
+    docs_html = '''<!DOCTYPE html>
+<html>
+<head>
+    <title>KSEB ML-SCADA API</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 40px; }}
+        .endpoint {{ background: #f5f5f5; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+        .method {{ color: #007bff; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <h1>⚡ KSEB Hybrid ML-SCADA API</h1>
+    <p>Feeder telemetry, fault classification and alarms</p>
+
+    <h2>Available Endpoints:</h2>
+
+    <div class="endpoint">
+        <div class="method">GET /api/feeders</div>
+        <p>All feeders with latest telemetry, status and ML prediction</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/feeders/&lt;feeder_id&gt;</div>
+        <p>One feeder with every telemetry channel</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/feeders/&lt;feeder_id&gt;/trend</div>
+        <p>Channel history (raw, 1 s, 1 min or 15 min min/max/mean tiers)</p>
+        <pre>Query: ?channel=voltage_a&amp;window=3600&amp;max_points=500 (or start/end epoch seconds)</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">POST /api/telemetry</div>
+        <p>Ingest feeder telemetry; classified on the next cycle</p>
+        <pre>Body: {{"readings": [{{"feeder": "FDR001", "voltage_a": 11020, "current_a": 250, ...}}]}}</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/predictions</div>
+        <p>Latest fault classification for every feeder</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/alarms</div>
+        <p>Alarms raised by the fault classifier and telemetry anomaly detector</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/alarms/stream</div>
+        <p>New alarms as server-sent events</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/topology</div>
+        <p>Substations, feeders, switches and buses with switch state and supply</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/topology/impact/&lt;node_id&gt;</div>
+        <p>Nodes that lose supply if this breaker or switch trips</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/topology/isolate/&lt;node_id&gt;</div>
+        <p>Switch that isolates a fault at this node, the outage and restoring ties</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">POST /api/topology/switch/&lt;node_id&gt;</div>
+        <p>Open or close a breaker or switch</p>
+        <pre>Body: {{"closed": false}}</pre>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/fault-types</div>
+        <p>Fault classes (AG ... ABC)</p>
+    </div>
+
+    <div class="endpoint">
+        <div class="method">GET /api/ml/metrics</div>
+        <p>Classifier hold-out metrics and cycle statistics</p>
+    </div>
+
+    <p><strong>Feeders:</strong> {feeders} &middot; <strong>Cycle:</strong> {cycle}s</p>
+    <p><strong>Last Updated:</strong> {timestamp}</p>
+</body>
+</html>'''.format(feeders=len(fleet), cycle=CYCLE_SECONDS,
+                  timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S IST'))
+
+    return render_template_string(docs_html)
+
+
+@app.route('/api/feeders')
+def get_feeders():
+    '''Get all feeders with latest telemetry, status and prediction'''
+    with state_lock:
+        status = fleet.status()
+        feeders = [feeder_payload(i, status) for i in range(len(fleet))]
+    return json_response({'feeders': feeders, 'total_feeders': len(feeders), 'timestamp': utc_now()})
+
+
+@app.route('/api/feeders/<feeder_id>')
+def get_feeder(feeder_id):
+    '''Get one feeder with every telemetry channel'''
+    i = fleet.index.get(feeder_id)
+    if i is None:
+        return json_response({'error': f'Unknown feeder: {feeder_id}'}), 404
+
+    with state_lock:
+        payload = feeder_payload(i, fleet.status())
+        payload['telemetry'] = dict(zip(CHANNELS, np.round(fleet.telemetry[i], 3).tolist()))
+        payload['rated_current'] = float(fleet.rated_current[i])
+        payload['updated_at'] = float(fleet.updated_at[i])
+    return json_response(payload)
+
+
+@app.route('/api/feeders/<feeder_id>/trend')
+def get_feeder_trend(feeder_id):
+    '''Get one channel's history from the finest telemetry tier that fits the window'''
+    i = fleet.index.get(feeder_id)
+    if i is None:
+        return json_response({'error': f'Unknown feeder: {feeder_id}'}), 404
+
+    channel = request.args.get('channel', 'voltage_a')
+    if channel not in CHANNEL_INDEX:
+        return json_response({'error': f'channel must be one of {CHANNELS}'}), 400
+    try:
+        end = float(request.args.get('end', time.time()))
+        start = float(request.args.get('start', end - float(request.args.get('window', 600))))
+        max_points = int(request.args.get('max_points', 500))
+    except ValueError:
+        return json_response({'error': 'start, end, window and max_points must be numeric'}), 400
+    if start >= end or not 1 <= max_points <= MAX_TREND_POINTS:
+        return json_response({'error': f'Need start < end and 1 <= max_points <= {MAX_TREND_POINTS}'}), 400
+
+    with state_lock:
+        tier, resolution, times, lo, hi, mean = store.query(i, channel, start, end, max_points)
+
+    payload = {'feeder': feeder_id, 'channel': channel, 'tier': tier, 'resolution': resolution,
+               'start': start, 'end': end, 'times': times}
+    if tier == 'raw':
+        payload['values'] = mean
+    else:
+        payload.update({'min': lo, 'max': hi, 'mean': mean})
+    return json_response(payload)
+
+
+@app.route('/api/telemetry', methods=['POST'])
+def ingest_telemetry():
+    '''Ingest telemetry readings for one or more feeders'''
+    readings = (request.json or {}).get('readings')
+    if not isinstance(readings, list) or not readings:
+        return json_response({'error': 'Provide {"readings": [{"feeder": ..., <channel>: value}]}'}), 400
+
+    if not all(isinstance(r, dict) for r in readings):
+        return json_response({'error': 'Each reading must be an object with a "feeder" id'}), 400
+    unknown = [r.get('feeder') for r in readings
+               if not isinstance(r.get('feeder'), str) or r['feeder'] not in fleet.index]
+    if unknown:
+        return json_response({'error': f'Unknown feeders: {unknown[:10]}'}), 400
+
+    rows = np.array([fleet.index[r['feeder']] for r in readings])
+    with state_lock:
+        # Unreported channels stay NaN: history records only samples that arrived
+        values = np.full((len(rows), len(CHANNELS)), np.nan)
+        try:
+            for c, channel in enumerate(CHANNELS):
+                for j, reading in enumerate(readings):
+                    if channel in reading:
+                        # bool is an int subclass, and "nan"/"inf" strings parse as floats
+                        value = np.nan if isinstance(reading[channel], bool) else float(reading[channel])
+                        if not np.isfinite(value):
+                            raise ValueError(channel)
+                        values[j, c] = value
+        except (TypeError, ValueError):
+            return json_response({'error': 'Telemetry values must be finite numbers'}), 400
+        fleet.ingest(rows, values)
+        store.append(time.time(), values, rows)
+        frame = np.full(fleet.telemetry.shape, np.nan)
+        frame[rows] = values
+        detect_anomalies(frame)
+
+    return json_response({'accepted': len(readings), 'timestamp': utc_now()})
+
+
+@app.route('/api/predictions')
+def get_predictions():
+    '''Get the latest fault classification for every feeder'''
+    with state_lock:
+        predictions = [{
+            'feeder': fleet.ids[i],
+            'fault_code': None if fleet.prediction[i] == NO_FAULT else fleet.prediction[i],
+            'status': prediction_status(fleet.prediction[i]),
+            'confidence': round(float(fleet.confidence[i]) * 100, 1)
+        } for i in range(len(fleet))]
+    return json_response({'predictions': predictions, 'cycle': cycle_stats['cycles'], 'timestamp': utc_now()})
+
+
+@app.route('/api/alarms')
+def get_alarms():
+    '''Get alarms raised by the fault classifier and anomaly detector, newest first'''
+    selected = alarm_manager.list(request.args.get('severity'))
+    return json_response(dict(alarm_manager.stats(), alarms=selected, total_alarms=len(selected),
+                              timestamp=utc_now()))
+
+
+@app.route('/api/alarms/stream')
+def stream_alarms():
+    '''Push new alarms to the client as server-sent events'''
+    subscriber = alarm_manager.subscribe()
+
+    def events():
+        try:
+            while True:
+                try:
+                    alarm = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"id: {alarm['id']}\nevent: alarm\ndata: {dumps(alarm).decode()}\n\n"
+        finally:
+            alarm_manager.unsubscribe(subscriber)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/topology')
+def get_topology():
+    '''Get the network topology with switch states and supply'''
+    with state_lock:
+        nodes = {
+            'id': network.node_ids,
+            'kind': [KIND_NAMES[k] for k in network.kinds],
+            'closed': network.closed,
+            'energised': network.energised,
+            'parent': [network.node_ids[p] if p >= 0 and p != i else None
+                       for i, p in enumerate(network.parent)],
+        }
+        edges = [[network.node_ids[a], network.node_ids[b]] for a, b in network.edges]
+        radial = bool(network.radial)
+    return json_response({'nodes': nodes, 'edges': edges, 'radial': radial,
+                          'total_nodes': len(network), 'timestamp': utc_now()})
+
+
+@app.route('/api/topology/impact/<node_id>')
+def get_topology_impact(node_id):
+    '''Get the downstream nodes that lose supply if this node trips'''
+    node, error = lookup_node(node_id)
+    if error:
+        return error
+    started = time.perf_counter()
+    with state_lock:
+        lost = network.downstream(node)
+        payload = dict(node_summary(lost), node=node_id, nodes=[network.node_ids[n] for n in lost])
+    payload['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return json_response(payload)
+
+
+@app.route('/api/topology/isolate/<node_id>')
+def get_topology_isolation(node_id):
+    '''Get the switching plan that isolates a fault at this node'''
+    node, error = lookup_node(node_id)
+    if error:
+        return error
+    started = time.perf_counter()
+    with state_lock:
+        plan = network.isolate(node)
+        if plan is None:
+            return json_response({'error': f'{node_id} has no upstream switching device'}), 400
+        names = lambda nodes: [network.node_ids[n] for n in nodes]
+        payload = {
+            'fault_node': node_id,
+            'isolating_switch': network.node_ids[plan['device']],
+            'open_downstream': names(plan['boundary']),
+            'outage': node_summary(plan['outage']),
+            'restorable': dict(node_summary(plan['restorable']), nodes=names(plan['restorable'])),
+            'tie_switches': names(plan['tie_switches']),
+        }
+    payload['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return json_response(payload)
+
+
+@app.route('/api/topology/switch/<node_id>', methods=['POST'])
+def operate_switch(node_id):
+    '''Open or close a feeder breaker or switch and recompute supply'''
+    node, error = lookup_node(node_id)
+    if error:
+        return error
+    closed = (request.json or {}).get('closed')
+    if not isinstance(closed, bool):
+        return json_response({'error': 'Provide {"closed": true|false}'}), 400
+    if KIND_NAMES[network.kinds[node]] not in ('feeder', 'switch'):
+        return json_response({'error': f'{node_id} is not a breaker or switch'}), 400
+
+    with state_lock:
+        network.set_closed(node, closed)
+        sync_isolation()
+        dead = np.flatnonzero(~network.energised)
+        payload = dict(node_summary(dead), node=node_id, closed=closed, radial=bool(network.radial))
+    payload['de_energised'] = payload.pop('total_nodes')
+    return json_response(payload)
+
+
+@app.route('/api/fault-types')
+def get_fault_types():
+    '''Get the fault classes the classifier distinguishes'''
+    return json_response({'fault_types': FAULT_TYPES})
+
+
+@app.route('/api/ml/metrics')
+def get_ml_metrics():
+    '''Get classifier hold-out metrics and cycle statistics'''
+    if bundle is None:
+        return json_response({'error': 'Fault classifier not available'}), 500
+    return json_response(dict(bundle['metrics'],
+                              trained_at=bundle.get('trained_at'),
+                              total_feeders=len(fleet),
+                              **cycle_stats))
+
+
+if __name__ == '__main__':
+    print("🚀 Starting KSEB ML-SCADA API...")
+    print(f"⚡ {len(fleet)} feeders, classification cycle every {CYCLE_SECONDS}s")
+    print(f"📈 Telemetry store: {store.nbytes / 1e6:.1f} MB across {len(store.rings)} tiers")
+    print(f"🔌 Topology: {len(network)} nodes, {len(network.edges)} lines")
+    port = int(os.environ.get('PORT', 5001))
+    print(f"🌐 API will be available at: http://localhost:{port}")
+    start_cycle()
+    app.run(debug=False, host='0.0.0.0', port=port)
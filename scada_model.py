@@ -0,0 +1,232 @@
+# Fault classification for the KSEB hybrid ML-SCADA dashboard
+# Synthetic three-phase feeder telemetry, the fault classifier trained on it
+# and the FeederFleet state that classifies every feeder in one batch.
+#
+# Train and save the classifier with:  python scada_model.py
+import json
+import time
+
+import joblib
+import numpy as np
+
+MODEL_PATH = 'model_fault_classifier.pkl'
+
+NOMINAL_VOLTAGE = 11000.0  # line voltage, V
+POWER_FACTOR = 0.9
+
+# Telemetry channels, in column order
+CHANNELS = ['voltage_a', 'voltage_b', 'voltage_c', 'current_a', 'current_b', 'current_c',
+            'neutral_current', 'power', 'temperature']
+CHANNEL_INDEX = {name: i for i, name in enumerate(CHANNELS)}
+
+FAULT_TYPES = [
+    {"code": "AG", "name": "Phase A to Ground", "severity": "major"},
+    {"code": "BG", "name": "Phase B to Ground", "severity": "major"},
+    {"code": "CG", "name": "Phase C to Ground", "severity": "major"},
+    {"code": "AB", "name": "Phase A to Phase B", "severity": "critical"},
+    {"code": "AC", "name": "Phase A to Phase C", "severity": "critical"},
+    {"code": "BC", "name": "Phase B to Phase C", "severity": "critical"},
+    {"code": "ABG", "name": "Phase AB to Ground", "severity": "critical"},
+    {"code": "ACG", "name": "Phase AC to Ground", "severity": "critical"},
+    {"code": "BCG", "name": "Phase BC to Ground", "severity": "critical"},
+    {"code": "ABC", "name": "Three Phase Fault", "severity": "critical"}
+]
+NO_FAULT = 'NONE'
+CLASSES = [NO_FAULT] + [fault['code'] for fault in FAULT_TYPES]
+
+FEEDERS = [
+    {"id": "FDR001", "name": "Trivandrum North", "lat": 8.5241, "lon": 76.9366, "rated_current": 450},
+    {"id": "FDR002", "name": "Kochi Industrial", "lat": 9.9312, "lon": 76.2673, "rated_current": 500},
+    {"id": "FDR003", "name": "Kozhikode City", "lat": 11.2588, "lon": 75.7804, "rated_current": 400},
+    {"id": "FDR004", "name": "Thrissur Central", "lat": 10.5276, "lon": 76.2144, "rated_current": 450},
+    {"id": "FDR005", "name": "Kollam Coastal", "lat": 8.8932, "lon": 76.6141, "rated_current": 400},
+    {"id": "FDR006", "name": "Palakkad Rural", "lat": 10.7867, "lon": 76.6548, "rated_current": 350},
+    {"id": "FDR007", "name": "Malappuram Town", "lat": 11.0510, "lon": 76.0711, "rated_current": 400},
+    {"id": "FDR008", "name": "Kannur Port", "lat": 11.8745, "lon": 75.3704, "rated_current": 400},
+    {"id": "FDR009", "name": "Idukki Hills", "lat": 9.8312, "lon": 76.9366, "rated_current": 350},
+    {"id": "FDR010", "name": "Wayanad Valley", "lat": 11.6854, "lon": 76.1320, "rated_current": 350}
+]
+
+# Operating limits used for the warning status
+TEMPERATURE_WARNING = 50.0
+VOLTAGE_TOLERANCE = 0.05
+CURRENT_WARNING = 0.95  # share of rated current
+
+
+def power_mw(voltage, current):
+    '''Three-phase active power in MW from mean line voltage and phase current'''
+    return np.sqrt(3) * voltage * current * POWER_FACTOR / 1e6
+
+
+def simulate_telemetry(labels, rated_current, rng):
+    '''Telemetry rows (n, len(CHANNELS)) for the given fault class labels'''
+    n = len(labels)
+    load = rng.uniform(0.25, 0.95, n) * rated_current
+    voltage = rng.normal(NOMINAL_VOLTAGE, 120, (n, 3)) * rng.normal(1.0, 0.01, (n, 1))
+    current = load[:, None] * rng.normal(1.0, 0.05, (n, 3))
+    neutral = np.abs(rng.normal(0.02, 0.01, n)) * load
+    temperature = rng.uniform(25, 45, n) + 10 * load / rated_current
+
+    for code in CLASSES[1:]:
+        rows = np.flatnonzero(labels == code)
+        if len(rows) == 0:
+            continue
+        phases = ['ABC'.index(p) for p in code if p in 'ABC']
+        grounded = code.endswith('G')
+        for phase in phases:
+            if len(phases) == 3:
+                v_drop, i_rise = rng.uniform(0.05, 0.5, len(rows)), rng.uniform(4, 10, len(rows))
+            elif grounded:
+                v_drop, i_rise = rng.uniform(0.05, 0.6, len(rows)), rng.uniform(3, 10, len(rows))
+            else:
+                v_drop, i_rise = rng.uniform(0.4, 0.8, len(rows)), rng.uniform(3, 8, len(rows))
+            voltage[rows, phase] *= v_drop
+            current[rows, phase] *= i_rise
+        if grounded:
+            # Ground faults return through the neutral
+            excess = current[rows][:, phases].sum(axis=1) - len(phases) * load[rows]
+            neutral[rows] = excess * rng.uniform(0.6, 1.0, len(rows))
+        temperature[rows] += rng.uniform(2, 15, len(rows))
+
+    power = power_mw(voltage.mean(axis=1), current.mean(axis=1))
+    return np.column_stack([voltage, current, neutral, power, temperature])
+
+
+def telemetry_features(telemetry, rated_current):
+    '''Scale-free classifier features: per-unit voltages, currents and neutral current'''
+    rated_current = np.asarray(rated_current, dtype=np.float64)
+    voltage_pu = telemetry[:, 0:3] / NOMINAL_VOLTAGE
+    current_pu = telemetry[:, 3:6] / rated_current[:, None]
+    neutral_pu = telemetry[:, 6:7] / rated_current[:, None]
+    mean_current = np.maximum(telemetry[:, 3:6].mean(axis=1, keepdims=True), 1e-6)
+    imbalance = telemetry[:, 3:6] / mean_current
+    return np.hstack([voltage_pu, current_pu, neutral_pu, imbalance, telemetry[:, 8:9]])
+
+
+def train_fault_classifier(n_samples=60000, fault_share=0.5, seed=42):
+    '''Train the fault classifier on simulated telemetry; returns the model bundle'''
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+    from sklearn.model_selection import train_test_split
+
+    rng = np.random.default_rng(seed)
+    faults = rng.choice(CLASSES[1:], n_samples)
+    labels = np.where(rng.random(n_samples) < fault_share, faults, NO_FAULT)
+    rated_current = rng.choice([350.0, 400.0, 450.0, 500.0], n_samples)
+    X = telemetry_features(simulate_telemetry(labels, rated_current, rng), rated_current)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, labels, test_size=0.2,
+                                                        random_state=seed, stratify=labels)
+    model = HistGradientBoostingClassifier(max_iter=200, random_state=seed)
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average='macro')
+    metrics = {
+        'accuracy': round(accuracy_score(y_test, y_pred) * 100, 2),
+        'precision': round(precision * 100, 2),
+        'recall': round(recall * 100, 2),
+        'f1_score': round(f1 * 100, 2),
+        'test_samples': int(len(y_test)),
+        'correct_predictions': int((y_test == y_pred).sum()),
+    }
+    return {'model': model, 'classes': list(model.classes_), 'channels': CHANNELS,
+            'metrics': metrics, 'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+class FeederFleet:
+    '''Latest telemetry for every feeder, held as one (n_feeders, n_channels) array'''
+
+    def __init__(self, feeders):
+        self.feeders = list(feeders)
+        self.ids = [feeder['id'] for feeder in self.feeders]
+        self.index = {feeder_id: i for i, feeder_id in enumerate(self.ids)}
+        self.rated_current = np.array([feeder['rated_current'] for feeder in self.feeders], dtype=np.float64)
+        self.telemetry = np.zeros((len(self.feeders), len(CHANNELS)))
+        self.updated_at = np.zeros(len(self.feeders))
+        self.prediction = np.array([NO_FAULT] * len(self.feeders), dtype=object)
+        self.confidence = np.zeros(len(self.feeders))
+        self.isolated = np.zeros(len(self.feeders), dtype=bool)
+
+    def __len__(self):
+        return len(self.feeders)
+
+    def ingest(self, rows, values, timestamp=None):
+        '''Store telemetry for the given feeder rows (indices) in one write; NaN keeps the last value'''
+        self.telemetry[rows] = np.where(np.isnan(values), self.telemetry[rows], values)
+        self.updated_at[rows] = timestamp or time.time()
+
+    def classify(self, bundle):
+        '''Classify every reporting feeder in one predict_proba call'''
+        prediction = np.array([NO_FAULT] * len(self.feeders), dtype=object)
+        confidence = np.zeros(len(self.feeders))
+        # Feeders that never reported have no telemetry to classify, and
+        # isolated feeders carry no load
+        rows = np.flatnonzero((self.updated_at > 0) & ~self.isolated)
+        if len(rows):
+            proba = bundle['model'].predict_proba(telemetry_features(self.telemetry[rows], self.rated_current[rows]))
+            best = proba.argmax(axis=1)
+            prediction[rows] = np.asarray(bundle['classes'], dtype=object)[best]
+            confidence[rows] = proba[np.arange(len(best)), best]
+        confidence[self.isolated] = 1.0
+        self.prediction, self.confidence = prediction, confidence
+        return prediction, confidence
+
+    def status(self):
+        '''Per-feeder status: isolated, fault, warning or normal'''
+        voltage = self.telemetry[:, 0:3].mean(axis=1)
+        current = self.telemetry[:, 3:6].max(axis=1)
+        warning = ((self.telemetry[:, CHANNEL_INDEX['temperature']] > TEMPERATURE_WARNING)
+                   | (np.abs(voltage / NOMINAL_VOLTAGE - 1) > VOLTAGE_TOLERANCE)
+                   | (current > CURRENT_WARNING * self.rated_current))
+        status = np.where(warning, 'warning', 'normal').astype(object)
+        status[self.prediction != NO_FAULT] = 'fault'
+        status[self.isolated] = 'isolated'
+        return status
+
+
+class FleetSimulator:
+    '''Stands in for field telemetry: a smooth random walk per feeder plus rare faults'''
+
+    def __init__(self, fleet, seed=None, fault_rate=0.002, clear_rate=0.05):
+        self.fleet = fleet
+        self.rng = np.random.default_rng(seed)
+        self.fault_rate = fault_rate
+        self.clear_rate = clear_rate
+        self.faults = np.array([NO_FAULT] * len(fleet), dtype=object)
+
+    def step(self):
+        '''Produce the next telemetry frame for all feeders and ingest it'''
+        fleet, rng, n = self.fleet, self.rng, len(self.fleet)
+        previous_faults = self.faults.copy()
+        starting = (self.faults == NO_FAULT) & (rng.random(n) < self.fault_rate)
+        self.faults[starting] = rng.choice(CLASSES[1:], starting.sum())
+        clearing = (self.faults != NO_FAULT) & ~starting & (rng.random(n) < self.clear_rate)
+        self.faults[clearing] = NO_FAULT
+
+        frame = simulate_telemetry(self.faults, fleet.rated_current, rng)
+        # Feeders that stayed healthy drift smoothly from their previous reading
+        drifting = (self.faults == NO_FAULT) & (previous_faults == NO_FAULT) & (fleet.updated_at > 0)
+        frame[drifting] = 0.9 * fleet.telemetry[drifting] + 0.1 * frame[drifting]
+
+        temperature = CHANNEL_INDEX['temperature']
+        frame[fleet.isolated, :temperature] = 0.0
+        fleet.ingest(slice(None), frame)
+        return frame
+
+
+def synthetic_feeders(count, seed=7):
+    '''Extra feeders for load testing the batch classifier at fleet scale'''
+    rng = np.random.default_rng(seed)
+    return [{"id": f"FDR{i:05d}", "name": f"Synthetic Feeder {i}",
+             "lat": float(rng.uniform(8.2, 12.8)), "lon": float(rng.uniform(74.9, 77.4)),
+             "rated_current": float(rng.choice([350, 400, 450, 500]))}
+            for i in range(len(FEEDERS) + 1, len(FEEDERS) + count + 1)]
+
+
+if __name__ == '__main__':
+    print("🔧 Training fault classifier on simulated feeder telemetry...")
+    bundle = train_fault_classifier()
+    joblib.dump(bundle, MODEL_PATH)
+    print(f"✅ Fault classifier saved: {MODEL_PATH}")
+    print(json.dumps(bundle['metrics'], indent=2))
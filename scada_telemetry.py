@@ -0,0 +1,214 @@
+# Tiered in-memory telemetry store for SCADA trend and history charts
+# Raw frames land in a fixed-size NumPy ring; each frame is folded into an
+# open 1 s bucket, closed buckets cascade into 1 min and then 15 min tiers
+# as (min, max, sum, count). Every tier keeps one ring per feeder, with its
+# own write head, so a chatty feeder never evicts another feeder's history
+# and a query reads at most one tier's window instead of scanning raw samples.
+#
+# Channels a frame does not report are stored as NaN, never as a carried-over
+# value. A feeder's rings are allocated on its first report (storage grows by
+# doubling), so memory follows the feeders that actually send telemetry:
+# about 0.6 MB per reporting feeder with DEFAULT_TIERS and nine channels,
+# dominated by the long tiers (shorten them via `tiers` for very large fleets).
+import numpy as np
+
+# (name, bucket seconds, capacity); resolution 0 marks the raw tier
+DEFAULT_TIERS = [
+    ('raw', 0, 600),
+    ('1s', 1, 900),         # 15 minutes
+    ('1min', 60, 1440),     # 1 day
+    ('15min', 900, 2976),   # 31 days
+]
+# Feeder rows allocated by a ring's first write
+INITIAL_ROWS = 16
+
+
+class _Ring:
+    '''Fixed-capacity ring of buckets per feeder, oldest overwritten first.
+
+    The raw tier stores one `value` field (min, max and mean are the sample);
+    aggregated tiers store `min`, `max` and `mean`.
+    '''
+
+    def __init__(self, name, resolution, capacity, n_feeders, n_channels):
+        self.name = name
+        self.resolution = resolution
+        self.capacity = capacity
+        self.n_channels = n_channels
+        self.fields = ('value',) if resolution == 0 else ('min', 'max', 'mean')
+        # Storage row of each feeder, -1 until it first reports
+        self.row = np.full(n_feeders, -1, dtype=np.int64)
+        self.n_rows = 0
+        self.times = np.empty((0, capacity))
+        self.data = {field: np.empty((0, capacity, n_channels), dtype=np.float32) for field in self.fields}
+        self.head = np.zeros(0, dtype=np.int64)  # next slot to write, per row
+        self.size = np.zeros(0, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + sum(values.nbytes for values in self.data.values())
+
+    def _grow(self, needed):
+        allocated = len(self.times)
+        if needed <= allocated:
+            return
+        extra = max(needed, 2 * allocated, INITIAL_ROWS) - allocated
+        self.times = np.concatenate([self.times, np.full((extra, self.capacity), np.nan)])
+        for field, values in self.data.items():
+            self.data[field] = np.concatenate(
+                [values, np.full((extra, self.capacity, self.n_channels), np.nan, dtype=np.float32)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.int64)])
+        self.size = np.concatenate([self.size, np.zeros(extra, dtype=np.int64)])
+
+    def _rows(self, feeders):
+        '''Storage rows for feeder indices, allocating rows for first-time feeders'''
+        new = np.unique(feeders[self.row[feeders] < 0])
+        if len(new):
+            self._grow(self.n_rows + len(new))
+            self.row[new] = np.arange(self.n_rows, self.n_rows + len(new))
+            self.n_rows += len(new)
+        return self.row[feeders]
+
+    def write(self, t, feeders, **values):
+        '''Write one bucket at time t for each of the given feeders (field=(len(feeders), n_channels))'''
+        rows = self._rows(feeders)
+        slots = self.head[rows]
+        self.times[rows, slots] = t
+        for field, value in values.items():
+            self.data[field][rows, slots] = value
+        self.head[rows] = (slots + 1) % self.capacity
+        self.size[rows] = np.minimum(self.size[rows] + 1, self.capacity)
+
+    def filled(self, feeder):
+        row = self.row[feeder]
+        return 0 if row < 0 else int(self.size[row])
+
+    def oldest(self, feeder):
+        row = self.row[feeder]
+        if row < 0 or self.size[row] == 0:
+            return np.inf
+        return self.times[row, (self.head[row] - self.size[row]) % self.capacity]
+
+    def window(self, feeder, start, end):
+        '''(row, chronological slot indices) of one feeder's buckets with start <= t < end'''
+        row = self.row[feeder]
+        if row < 0:
+            return row, np.empty(0, dtype=np.int64)
+        order = (self.head[row] - self.size[row] + np.arange(self.size[row])) % self.capacity
+        times = self.times[row, order]
+        lo, hi = np.searchsorted(times, [start, end])
+        return row, order[lo:hi]
+
+
+class _Bucket:
+    '''Open aggregation bucket: running min/max/sum/count per feeder and channel'''
+
+    def __init__(self, shape):
+        self.start = None
+        self.min = np.full(shape, np.nan)
+        self.max = np.full(shape, np.nan)
+        self.sum = np.zeros(shape)
+        self.count = np.zeros(shape)
+
+    def add(self, feeders, lo, hi, total, count):
+        if len(np.unique(feeders)) < len(feeders):
+            # Unbuffered ufunc.at so a feeder reported twice in one frame counts twice
+            np.fmin.at(self.min, feeders, lo)
+            np.fmax.at(self.max, feeders, hi)
+            np.add.at(self.sum, feeders, total)
+            np.add.at(self.count, feeders, count)
+            return
+        self.min[feeders] = np.fmin(self.min[feeders], lo)
+        self.max[feeders] = np.fmax(self.max[feeders], hi)
+        self.sum[feeders] += total
+        self.count[feeders] += count
+
+    def close(self):
+        '''(start, feeders with data, min, max, mean, sum, count) for those feeders; resets the bucket'''
+        feeders = np.flatnonzero(self.count.any(axis=1))
+        count = self.count[feeders]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sum[feeders] / count
+        result = (self.start, feeders, self.min[feeders], self.max[feeders], mean, self.sum[feeders], count)
+        self.min.fill(np.nan)
+        self.max.fill(np.nan)
+        self.sum.fill(0)
+        self.count.fill(0)
+        return result
+
+
+class TelemetryStore:
+    '''Tiered telemetry history with a ring per feeder and tier'''
+
+    def __init__(self, n_feeders, channels, tiers=DEFAULT_TIERS):
+        self.channels = list(channels)
+        self.channel_index = {name: i for i, name in enumerate(self.channels)}
+        shape = (n_feeders, len(self.channels))
+        self.shape = shape
+        self.rings = [_Ring(name, resolution, capacity, *shape) for name, resolution, capacity in tiers]
+        # One open bucket per aggregated tier
+        self.buckets = [_Bucket(shape) for _ in self.rings[1:]]
+        self.last_time = -np.inf
+
+    @property
+    def nbytes(self):
+        return sum(ring.nbytes for ring in self.rings)
+
+    def append(self, t, values, rows=None):
+        '''Add one telemetry frame at epoch time t; rows limits it to some feeders.
+
+        NaN marks a channel the frame did not report; feeders with no
+        reported channel are not written at all.
+        '''
+        # Rings are kept in time order, so late frames are stamped with the last time
+        t = self.last_time = max(float(t), self.last_time)
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.shape[1])
+        feeders = np.arange(self.shape[0]) if rows is None else np.asarray(rows, dtype=np.int64)
+
+        valid = ~np.isnan(values)
+        reported = valid.any(axis=1)
+        feeders, values, valid = feeders[reported], values[reported], valid[reported]
+        if not len(feeders):
+            return
+        self.rings[0].write(t, feeders, value=values)
+        self._fold(0, t, feeders, values, values, np.where(valid, values, 0.0), valid.astype(np.float64))
+
+    def _fold(self, level, t, feeders, lo, hi, total, count):
+        '''Fold data into tier level+1's open bucket, closing and cascading finished buckets'''
+        if level >= len(self.buckets):
+            return
+        ring = self.rings[level + 1]
+        bucket = self.buckets[level]
+        start = np.floor(t / ring.resolution) * ring.resolution
+
+        if bucket.start is not None and start != bucket.start:
+            closed_start, c_feeders, c_lo, c_hi, c_mean, c_sum, c_count = bucket.close()
+            if len(c_feeders):
+                ring.write(closed_start, c_feeders, min=c_lo, max=c_hi, mean=c_mean)
+                self._fold(level + 1, closed_start, c_feeders, c_lo, c_hi, c_sum, c_count)
+        bucket.start = start
+        bucket.add(feeders, lo, hi, total, count)
+
+    def query(self, feeder, channel, start, end, max_points=500):
+        '''Series for one feeder/channel over [start, end) from the finest tier that fits.
+
+        Returns (tier_name, resolution, times, min, max, mean); for the raw
+        tier min, max and mean are the same samples.
+        '''
+        c = self.channel_index[channel] if isinstance(channel, str) else channel
+        chosen = self.rings[-1]
+        for ring in self.rings:
+            # A ring that has never wrapped holds everything this feeder recorded
+            covers = (ring.filled(feeder) < ring.capacity or ring.oldest(feeder) <= start
+                      or ring is self.rings[-1])
+            if covers and len(ring.window(feeder, start, end)[1]) <= max_points:
+                chosen = ring
+                break
+
+        row, slots = chosen.window(feeder, start, end)
+        times = chosen.times[row, slots] if len(slots) else np.empty(0)
+        series = {field: values[row, slots, c] if len(slots) else np.empty(0, dtype=np.float32)
+                  for field, values in chosen.data.items()}
+        if 'value' in series:
+            return chosen.name, chosen.resolution, times, series['value'], series['value'], series['value']
+        return chosen.name, chosen.resolution, times, series['min'], series['max'], series['mean']
@@ -0,0 +1,224 @@
+# Distribution network topology for the ML-SCADA backend
+# Substations, feeder breakers, switches and buses are nodes; lines are
+# undirected edges stored as CSR arrays (indptr, indices). Supply is traced
+# with a level-synchronous BFS from the substations that never passes an
+# open switch or tripped breaker. For a radial network every energised node
+# also gets a preorder interval (tin, size) in the supply tree, so "what loses
+# supply if X opens" is a slice of one array.
+import numpy as np
+
+SUBSTATION, FEEDER, SWITCH, BUS = 0, 1, 2, 3
+KIND_NAMES = ['substation', 'feeder', 'switch', 'bus']
+
+# Substation each dashboard feeder is supplied from
+FEEDER_SUBSTATIONS = {
+    'FDR001': 'SS-TVM', 'FDR005': 'SS-TVM', 'FDR009': 'SS-TVM',
+    'FDR002': 'SS-EKM', 'FDR004': 'SS-EKM', 'FDR006': 'SS-EKM', 'FDR007': 'SS-EKM',
+    'FDR003': 'SS-KKD', 'FDR008': 'SS-KKD', 'FDR010': 'SS-KKD',
+}
+
+
+def _expand_ranges(starts, counts):
+    '''Concatenation of arange(start, start + count) for each pair, vectorised'''
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(counts.sum()) - offsets + np.repeat(starts, counts)
+
+
+class Network:
+    '''Node/edge topology with switch states and the supply tree derived from them'''
+
+    def __init__(self, node_ids, kinds, edges, closed=None):
+        self.node_ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.closed = np.ones(len(self.node_ids), dtype=bool) if closed is None else np.asarray(closed, dtype=bool)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        # CSR adjacency over both edge directions
+        n = len(self.node_ids)
+        src = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        dst = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        order = np.argsort(src, kind='stable')
+        self.indices = dst[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.sources = np.flatnonzero(self.kinds == SUBSTATION)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def neighbours(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def _bfs(self, blocked=None):
+        '''Energised mask, BFS parent and BFS levels from all substations'''
+        n = len(self)
+        conducting = self.closed.copy()
+        if blocked is not None:
+            conducting[blocked] = False
+        parent = np.full(n, -1, dtype=np.int64)
+        energised = np.zeros(n, dtype=bool)
+
+        frontier = self.sources[conducting[self.sources]]
+        energised[frontier] = True
+        parent[frontier] = frontier
+        levels = [frontier]
+        while frontier.size:
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            neighbours = self.indices[_expand_ranges(starts, counts)]
+            via = np.repeat(frontier, counts)
+            keep = ~energised[neighbours] & conducting[neighbours]
+            frontier, first = np.unique(neighbours[keep], return_index=True)
+            parent[frontier] = via[keep][first]
+            energised[frontier] = True
+            if frontier.size:
+                levels.append(frontier)
+        return energised, parent, levels
+
+    def refresh(self):
+        '''Recompute supply state after a topology or switch change'''
+        self.energised, self.parent, levels = self._bfs()
+
+        # Radial if the energised part is a forest: one edge fewer than nodes per substation
+        live_edges = (self.energised[self.edges[:, 0]] & self.energised[self.edges[:, 1]]).sum()
+        live_sources = self.energised[self.sources].sum()
+        self.radial = live_edges == self.energised.sum() - live_sources
+
+        n = len(self)
+        self.size = np.where(self.energised, 1, 0).astype(np.int64)
+        self.tin = np.full(n, -1, dtype=np.int64)
+        if not self.radial:
+            return
+
+        for level in reversed(levels[1:]):
+            np.add.at(self.size, self.parent[level], self.size[level])
+
+        roots = levels[0]
+        self.tin[roots] = np.cumsum(self.size[roots]) - self.size[roots]
+        for level in levels[1:]:
+            # Children of one parent take consecutive intervals after the parent
+            level = level[np.argsort(self.parent[level], kind='stable')]
+            parents, sizes = self.parent[level], self.size[level]
+            before = np.cumsum(sizes) - sizes
+            new_group = np.r_[True, parents[1:] != parents[:-1]]
+            group = np.cumsum(new_group) - 1
+            self.tin[level] = self.tin[parents] + 1 + before - before[new_group][group]
+
+        self.preorder = np.empty(self.energised.sum(), dtype=np.int64)
+        self.preorder[self.tin[self.energised]] = np.flatnonzero(self.energised)
+
+    def downstream(self, node):
+        '''Nodes (including node) that lose supply if node opens or trips'''
+        if not self.energised[node]:
+            return np.empty(0, dtype=np.int64)
+        if self.radial:
+            return self.preorder[self.tin[node]:self.tin[node] + self.size[node]]
+        energised, _, _ = self._bfs(blocked=node)
+        return np.flatnonzero(self.energised & ~energised)
+
+    def upstream_device(self, node):
+        '''Nearest closed switch or feeder breaker above node on its supply path'''
+        current = self.parent[node]
+        while current >= 0 and self.parent[current] != current:
+            if self.kinds[current] in (SWITCH, FEEDER):
+                return int(current)
+            current = self.parent[current]
+        return None
+
+    def isolate(self, node):
+        '''Switching plan for a fault at node.
+
+        Opening the nearest upstream device de-energises its whole subtree;
+        the faulted section ends at the first switches below the device, and
+        anything beyond them can be restored through open tie switches.
+        '''
+        device = self.upstream_device(node)
+        if device is None:
+            return None
+        outage = self.downstream(device)
+        in_outage = np.zeros(len(self), dtype=bool)
+        in_outage[outage] = True
+
+        # The faulted section runs from the device down to the next switching devices
+        boundary = []
+        faulted = np.zeros(len(self), dtype=bool)
+        faulted[device] = True
+        stack = [device]
+        while stack:
+            current = stack.pop()
+            for child in self.neighbours(current):
+                if self.parent[child] != current or faulted[child]:
+                    continue
+                if self.kinds[child] in (SWITCH, FEEDER):
+                    boundary.append(int(child))
+                else:
+                    faulted[child] = True
+                    stack.append(child)
+        restorable = in_outage & ~faulted
+        restorable[boundary] = False
+
+        # Open tie switches with a restorable node on one side and healthy supply on the other
+        healthy = self.energised & ~in_outage
+        open_switch = (self.kinds == SWITCH) & ~self.closed
+        touches_restorable = np.zeros(len(self), dtype=bool)
+        touches_healthy = np.zeros(len(self), dtype=bool)
+        for a, b in ((self.edges[:, 0], self.edges[:, 1]), (self.edges[:, 1], self.edges[:, 0])):
+            touches_restorable[a[open_switch[a] & restorable[b]]] = True
+            touches_healthy[a[open_switch[a] & healthy[b]]] = True
+
+        return {
+            'device': device,
+            'outage': outage,
+            'boundary': boundary,
+            'restorable': np.flatnonzero(restorable),
+            'tie_switches': np.flatnonzero(touches_restorable & touches_healthy),
+        }
+
+    def set_closed(self, node, closed):
+        self.closed[node] = closed
+        self.refresh()
+
+
+def build_network(feeders, sections=8, laterals=2, switch_every=3):
+    '''Network for the given feeders: breaker, a main line of bus sections with
+    sectionalising switches, lateral buses, and normally-open ties between
+    the ends of neighbouring feeders on the same substation.'''
+    node_ids, kinds, closed, edges = [], [], [], []
+
+    def add(node_id, kind, is_closed=True):
+        node_ids.append(node_id)
+        kinds.append(kind)
+        closed.append(is_closed)
+        return len(node_ids) - 1
+
+    substations = {}
+    feeder_ends = {}
+    substation_names = sorted(set(FEEDER_SUBSTATIONS.values()))
+    for k, feeder in enumerate(feeders):
+        name = FEEDER_SUBSTATIONS.get(feeder['id'], substation_names[k % len(substation_names)])
+        if name not in substations:
+            substations[name] = add(name, SUBSTATION)
+        breaker = add(feeder['id'], FEEDER)
+        edges.append((substations[name], breaker))
+
+        previous = breaker
+        for s in range(1, sections + 1):
+            if s > 1 and (s - 1) % switch_every == 0:
+                switch = add(f"{feeder['id']}-SW{s}", SWITCH)
+                edges.append((previous, switch))
+                previous = switch
+            bus = add(f"{feeder['id']}-B{s}", BUS)
+            edges.append((previous, bus))
+            for lateral in range(1, laterals + 1):
+                edges.append((bus, add(f"{feeder['id']}-B{s}-L{lateral}", BUS)))
+            previous = bus
+        feeder_ends.setdefault(name, []).append((feeder['id'], previous))
+
+    for name, ends in feeder_ends.items():
+        for (a_id, a_end), (b_id, b_end) in zip(ends, ends[1:]):
+            tie = add(f'TIE-{a_id}-{b_id}', SWITCH, is_closed=False)
+            edges.extend([(a_end, tie), (tie, b_end)])
+
+    return Network(node_ids, kinds, edges, closed)
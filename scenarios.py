@@ -0,0 +1,212 @@
+# What-if scenarios for policy interventions (GRAP stages, traffic curbs, ...)
+# A scenario cuts the activity of one or more emission sources. Source
+# attribution (share of each pollutant per source, by station and month)
+# turns those cuts into pollutant multipliers, which are applied to the
+# historical feature matrix; the model re-scores every scenario x reading
+# combination in fixed-size batches spread over a thread pool.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SOURCES = ['vehicles', 'industry', 'dust', 'stubble']
+POLLUTANTS = ['pm2_5', 'pm10', 'no2', 'so2', 'co']
+
+# Share of each pollutant (columns follow POLLUTANTS) attributed to each source
+# (rows follow SOURCES); whatever is left over is background and regional transport
+DEFAULT_SHARES = np.array([
+    [0.30, 0.20, 0.60, 0.10, 0.55],  # vehicles
+    [0.15, 0.12, 0.25, 0.70, 0.15],  # industry
+    [0.15, 0.40, 0.00, 0.00, 0.00],  # dust
+    [0.20, 0.12, 0.02, 0.05, 0.15],  # stubble
+])
+# Stubble burning only matters around the Oct-Dec paddy harvest
+STUBBLE_MONTH_WEIGHT = {10: 0.8, 11: 1.0, 12: 0.6}
+
+# Model feature -> pollutant whose multiplier scales it. AQI is PM-driven here,
+# so last hour's AQI follows PM2.5.
+SCALED_FEATURES = {
+    'pm2_5': 'pm2_5', 'pm10': 'pm10', 'no2': 'no2', 'so2': 'so2', 'co': 'co',
+    'pm2_5_lag1': 'pm2_5', 'pm10_lag1': 'pm10', 'aqi_lag1': 'pm2_5',
+}
+
+ALL_MONTHS = list(range(1, 13))
+GRAP_MONTHS = [10, 11, 12, 1, 2]
+
+# Source activity cuts for each intervention
+INTERVENTIONS = {
+    'GRAP Stage I': {'reductions': {'dust': 0.10, 'vehicles': 0.02}, 'months': GRAP_MONTHS},
+    'GRAP Stage II': {'reductions': {'dust': 0.20, 'vehicles': 0.05, 'industry': 0.05}, 'months': GRAP_MONTHS},
+    'GRAP Stage III': {'reductions': {'dust': 0.50, 'vehicles': 0.15, 'industry': 0.15}, 'months': GRAP_MONTHS},
+    'GRAP Stage IV': {'reductions': {'dust': 0.60, 'vehicles': 0.30, 'industry': 0.40}, 'months': GRAP_MONTHS},
+    'Enhanced Road Cleaning': {'reductions': {'dust': 0.25}, 'months': ALL_MONTHS},
+    'Industrial Emission Monitoring': {'reductions': {'industry': 0.20}, 'months': ALL_MONTHS},
+    'Odd-Even Vehicle Rationing': {'reductions': {'vehicles': 0.25}, 'months': ALL_MONTHS},
+    'Stubble Burning Enforcement': {'reductions': {'stubble': 0.40}, 'months': [10, 11, 12]},
+}
+
+DELTA_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def default_attribution(n_stations):
+    '''Source shares for every station and month, shape (n_stations, 12, sources, pollutants)'''
+    shares = np.broadcast_to(DEFAULT_SHARES, (12,) + DEFAULT_SHARES.shape).copy()
+    stubble = SOURCES.index('stubble')
+    weight = np.array([STUBBLE_MONTH_WEIGHT.get(month, 0.0) for month in ALL_MONTHS])
+    shares[:, stubble] *= weight[:, None]
+    return np.broadcast_to(shares, (n_stations,) + shares.shape).copy()
+
+
+def history_matrix(history, assembler, station_names):
+    '''Feature matrix, station positions, months and hours for the historical readings.
+
+    Lag features are the previous reading in time order, as in training.
+    '''
+    timestamps = history['timestamp'].dt
+    columns = {
+        'pm25': history['pm2_5'].to_numpy(), 'pm10': history['pm10'].to_numpy(),
+        'no2': history['no2'].to_numpy(), 'so2': history['so2'].to_numpy(),
+        'co': history['co'].to_numpy(), 'o3': history['o3'].to_numpy(),
+        'temperature': history['temperature'].to_numpy(), 'humidity': history['humidity'].to_numpy(),
+        'wind_speed': history['wind_speed'].to_numpy(),
+        'hour': timestamps.hour.to_numpy(), 'day_of_week': timestamps.dayofweek.to_numpy(),
+        'month': timestamps.month.to_numpy(), 'station': history['station'].tolist(),
+    }
+    X = assembler.from_columns(columns, len(history))
+    position = {name: i for i, name in enumerate(assembler.feature_columns)}
+    for lag, column in (('pm2_5_lag1', 'pm2_5'), ('pm10_lag1', 'pm10'), ('aqi_lag1', 'aqi')):
+        if lag in position:
+            values = history[column].to_numpy(dtype=np.float64)
+            X[:, position[lag]] = np.r_[values[:1], values[:-1]]
+
+    lookup = {name: i for i, name in enumerate(station_names)}
+    stations = np.array([lookup.get(name, 0) for name in history['station']])
+    return X, stations, columns['month'], columns['hour']
+
+
+def parse_scenario(spec):
+    '''(name, source reduction vector, months) for a scenario request dict.
+
+    Interventions and explicit source reductions combine multiplicatively on the
+    remaining activity, e.g. 20% then 25% less traffic leaves 60% of it.
+    '''
+    if not isinstance(spec, dict):
+        raise ValueError('Each scenario must be an object')
+    interventions = spec.get('interventions', [])
+    reductions = spec.get('reductions', {})
+    if not isinstance(interventions, list) or not all(isinstance(name, str) for name in interventions):
+        raise ValueError('interventions must be a list of intervention names')
+    if not isinstance(reductions, dict):
+        raise ValueError('reductions must be an object of {source: fraction}')
+    if not isinstance(spec.get('name', ''), str):
+        raise ValueError('name must be a string')
+
+    remaining = np.ones(len(SOURCES))
+    months = set()
+    for name in interventions:
+        if name not in INTERVENTIONS:
+            raise ValueError(f'Unknown intervention: {name}')
+        for source, cut in INTERVENTIONS[name]['reductions'].items():
+            remaining[SOURCES.index(source)] *= 1 - cut
+        months.update(INTERVENTIONS[name]['months'])
+    for source, cut in reductions.items():
+        if source not in SOURCES:
+            raise ValueError(f'Unknown source: {source} (expected one of {SOURCES})')
+        # bool is an int subclass but not a fraction
+        if isinstance(cut, bool) or not isinstance(cut, (int, float)) or not 0 <= cut <= 1:
+            raise ValueError(f'Reduction for {source} must be a fraction between 0 and 1')
+        remaining[SOURCES.index(source)] *= 1 - cut
+
+    if 'months' in spec:
+        months = spec['months']
+        if (not isinstance(months, list) or not months
+                or not all(isinstance(m, int) and not isinstance(m, bool) and 1 <= m <= 12 for m in months)):
+            raise ValueError('months must be a non-empty list of integers 1-12')
+    name = spec.get('name') or ' + '.join(interventions + [f'{int(cut * 100)}% less {source}'
+                                                           for source, cut in reductions.items()])
+    return name or 'Baseline', 1 - remaining, sorted(months or ALL_MONTHS)
+
+
+class ScenarioEngine:
+    '''Re-scores the historical feature matrix under source-reduction scenarios.
+
+    predict must release the GIL for the thread pool to use several cores;
+    FlatForest's NumPy tree walk does, as its time goes into whole-batch
+    gathers and comparisons.
+    '''
+
+    def __init__(self, predict, X, stations, months, hours, feature_columns, station_names,
+                 attribution=None, batch_rows=65536, workers=None):
+        self.predict = predict
+        self.X = X
+        self.stations = stations
+        self.months = months
+        self.hours = hours
+        self.station_names = list(station_names)
+        self.attribution = default_attribution(len(self.station_names)) if attribution is None else attribution
+        self.batch_rows = batch_rows
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                       thread_name_prefix='scenario')
+
+        position = {name: i for i, name in enumerate(feature_columns)}
+        scaled = [(position[f], POLLUTANTS.index(p)) for f, p in SCALED_FEATURES.items() if f in position]
+        self.scaled_columns = np.array([c for c, _ in scaled], dtype=np.intp)
+        self.scaled_pollutants = np.array([p for _, p in scaled], dtype=np.intp)
+
+        self.baseline = np.concatenate(list(self.pool.map(
+            self.predict, np.array_split(X, max(1, -(-len(X) // batch_rows))))))
+
+    def _score(self, batch, multipliers):
+        '''AQI change for one batch of (scenario, reading) pairs'''
+        scenario, rows = batch
+        X = self.X[rows]
+        factor = multipliers[scenario, self.stations[rows], self.months[rows] - 1]
+        X[:, self.scaled_columns] *= factor[:, self.scaled_pollutants]
+        return self.predict(X) - self.baseline[rows]
+
+    def run(self, scenarios):
+        '''Distribution of AQI changes for each (name, reductions, months) scenario'''
+        reductions = np.array([r for _, r, _ in scenarios]).reshape(len(scenarios), len(SOURCES))
+        # (scenario, station, month, pollutant) multiplier on measured concentrations
+        multipliers = 1 - np.einsum('ks,nmsp->knmp', reductions, self.attribution)
+
+        # Every (scenario, reading) pair, scenario-major, cut into equal batches
+        selected = [np.flatnonzero(np.isin(self.months, months)) for _, _, months in scenarios]
+        owner = np.repeat(np.arange(len(scenarios)), [len(rows) for rows in selected])
+        rows = np.concatenate(selected) if selected else np.empty(0, dtype=np.intp)
+        n_batches = max(1, -(-len(rows) // self.batch_rows))
+        batches = zip(np.array_split(owner, n_batches), np.array_split(rows, n_batches))
+        delta = np.concatenate(list(self.pool.map(lambda b: self._score(b, multipliers), batches)))
+
+        bounds = np.cumsum([0] + [len(r) for r in selected])
+        return [self._summarise(name, reduction, months, rows[a:b], delta[a:b])
+                for (name, reduction, months), a, b in zip(scenarios, bounds[:-1], bounds[1:])]
+
+    def _summarise(self, name, reduction, months, rows, delta):
+        if len(rows) == 0:
+            return {'name': name, 'months': months, 'combinations': 0}
+        baseline = self.baseline[rows]
+        stations, hours = self.stations[rows], self.hours[rows]
+        n_stations = len(self.station_names)
+        station_count = np.bincount(stations, minlength=n_stations)
+        station_delta = np.bincount(stations, delta, minlength=n_stations)
+        hour_delta = np.bincount(hours, delta, minlength=24) / np.maximum(np.bincount(hours, minlength=24), 1)
+        percentiles = np.percentile(delta, DELTA_PERCENTILES)
+        return {
+            'name': name,
+            'months': months,
+            'reductions': {s: round(float(r), 4) for s, r in zip(SOURCES, reduction) if r > 0},
+            'combinations': int(len(rows)),
+            'baseline_mean_aqi': round(float(baseline.mean()), 1),
+            'scenario_mean_aqi': round(float((baseline + delta).mean()), 1),
+            'aqi_change': dict({
+                'mean': round(float(delta.mean()), 2),
+                'std': round(float(delta.std()), 2),
+                'min': round(float(delta.min()), 2),
+                'max': round(float(delta.max()), 2),
+            }, **{f'p{p}': round(float(v), 2) for p, v in zip(DELTA_PERCENTILES, percentiles)}),
+            'relative_change_pct': round(float(delta.sum() / baseline.sum() * 100), 2),
+            'by_station': {self.station_names[s]: round(float(station_delta[s] / station_count[s]), 2)
+                           for s in np.flatnonzero(station_count)},
+            'by_hour': np.round(hour_delta, 2),
+        }
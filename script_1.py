@@ -4,49 +4,31 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler
+import pandas as pd
+import numpy as np
 import joblib
+import json
+import time
 
-# Load the data
-df = pd.read_csv('delhi_air_quality_2024.csv')
-df['timestamp'] = pd.to_datetime(df['timestamp'])
+from feature_cache import load_features
+from model_export import EXPORT_PATH, LinearModel, export_models
 
-# Feature engineering for time-based patterns
-df['hour'] = df['timestamp'].dt.hour
-df['day_of_week'] = df['timestamp'].dt.dayofweek
-df['month'] = df['timestamp'].dt.month
-df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-
-# Create rush hour indicator
-df['is_rush_hour'] = df['hour'].isin([7, 8, 9, 17, 18, 19, 20]).astype(int)
-
-# Create winter season indicator (high pollution months)
-df['is_winter'] = df['month'].isin([11, 12, 1, 2]).astype(int)
-
-# Create lagged features (previous hour values)
-df = df.sort_values('timestamp').reset_index(drop=True)
-df['pm2_5_lag1'] = df['pm2_5'].shift(1)
-df['pm10_lag1'] = df['pm10'].shift(1)
-df['aqi_lag1'] = df['aqi'].shift(1)
-
-# Station encoding
-station_dummies = pd.get_dummies(df['station'], prefix='station')
-df = pd.concat([df, station_dummies], axis=1)
-
-# Drop rows with NaN values (due to lagging)
-df = df.dropna().reset_index(drop=True)
+# Feature engineering (hour, day_of_week, month, is_weekend, is_rush_hour,
+# is_winter, lag features, station dummies) is a cached stage: it only reruns
+# when the CSV or FEATURE_SPEC_VERSION changes
+started = time.perf_counter()
+feature_set = load_features('delhi_air_quality_2024.csv')
+feature_columns = feature_set.feature_columns
 
 print("Dataset after feature engineering:")
-print(f"Shape: {df.shape}")
-print(f"Features created: hour, day_of_week, month, is_weekend, is_rush_hour, is_winter, lag features, station dummies")
+print(f"Shape: {feature_set.X.shape}")
+print(f"Features {'loaded from cache' if feature_set.cached else 'engineered'} "
+      f"({feature_set.key}) in {(time.perf_counter() - started) * 1000:.1f} ms")
 
 # Prepare features and targets
-feature_columns = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3', 'temperature', 'humidity', 
-                  'wind_speed', 'hour', 'day_of_week', 'month', 'is_weekend', 
-                  'is_rush_hour', 'is_winter', 'pm2_5_lag1', 'pm10_lag1', 'aqi_lag1'] + list(station_dummies.columns)
-
-X = df[feature_columns]
-y_aqi = df['aqi']
-y_pm25 = df['pm2_5']
+X = feature_set.frame()
+y_aqi = pd.Series(feature_set.targets['aqi'], name='aqi')
+y_pm25 = pd.Series(feature_set.targets['pm2_5'], name='pm2_5')
 
 # Split data (80% train, 20% test)
 X_train, X_test, y_aqi_train, y_aqi_test = train_test_split(X, y_aqi, test_size=0.2, random_state=42, shuffle=False)
@@ -108,6 +90,22 @@ print(f"\n🏆 Best Model: {best_model_name}")
 print(f"Best RMSE: {results[best_model_name]['RMSE']:.2f}")
 print(f"Best R²: {results[best_model_name]['R2']:.3f}")
 
+# Quantile models for prediction intervals (served next to the point model)
+quantiles = [0.1, 0.5, 0.9]
+quantile_models = []
+for alpha in quantiles:
+    print(f"\nTraining Gradient Boosting p{int(alpha * 100)} for AQI intervals...")
+    quantile_model = GradientBoostingRegressor(loss='quantile', alpha=alpha, n_estimators=100, random_state=42)
+    quantile_model.fit(X_train, y_aqi_train)
+    quantile_models.append(quantile_model)
+
+quantile_preds = np.sort(np.column_stack([m.predict(X_test) for m in quantile_models]), axis=1)
+coverage = np.mean((y_aqi_test >= quantile_preds[:, 0]) & (y_aqi_test <= quantile_preds[:, -1]))
+print(f"p10-p90 interval coverage on test set: {coverage:.1%} (target 80%)")
+print(f"Mean interval width: {np.mean(quantile_preds[:, -1] - quantile_preds[:, 0]):.1f} AQI")
+
+joblib.dump({'quantiles': quantiles, 'models': quantile_models, 'coverage': coverage}, 'model_quantiles.pkl')
+
 # Feature importance for the best model (if it supports it)
 if hasattr(best_model, 'feature_importances_'):
     feature_importance = pd.DataFrame({
@@ -118,6 +116,9 @@ if hasattr(best_model, 'feature_importances_'):
     print("\nTop 10 Most Important Features:")
     print(feature_importance)
 
+# Linear regression with its scaler folded in: one dot product per prediction
+linear_fast = LinearModel.from_fitted(models['Linear Regression'], scaler)
+
 # Create a prediction function
 def predict_aqi(pm25, pm10, no2, so2, co, o3, temp, humidity, wind_speed, 
                hour, month, station='Anand Vihar'):
@@ -156,9 +157,7 @@ def predict_aqi(pm25, pm10, no2, so2, co, o3, temp, humidity, wind_speed,
     
     # Use the best model for prediction
     if best_model_name == 'Linear Regression':
-        scaler = joblib.load('scaler_linear_regression.pkl')
-        input_scaled = scaler.transform(input_data.reshape(1, -1))
-        prediction = best_model.predict(input_scaled)[0]
+        prediction = linear_fast.predict(input_data)
     else:
         prediction = best_model.predict(input_data.reshape(1, -1))[0]
     
@@ -178,6 +177,11 @@ print(f"Predicted AQI: {sample_prediction}")
 with open('feature_columns.json', 'w') as f:
     json.dump(feature_columns, f)
 
+# Portable export for serving: plain arrays + JSON that app.py loads without scikit-learn
+export_models(EXPORT_PATH, models['Gradient Boosting'], feature_columns, quantile_models, quantiles,
+              models['Linear Regression'], scaler)
+
 print("\n✅ Model training completed!")
 print(f"✅ Best model saved: model_{best_model_name.lower().replace(' ', '_')}.pkl")
-print("✅ Feature columns saved: feature_columns.json")
\ No newline at end of file
+print("✅ Feature columns saved: feature_columns.json")
+print(f"✅ Portable model export saved: {EXPORT_PATH}.npz, {EXPORT_PATH}.json")
\ No newline at end of file
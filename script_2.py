@@ -485,7 +485,7 @@ print("✅ Flask API backend created: app.py")
 # Create requirements.txt for the Flask app
 requirements_content = '''Flask==2.3.3
 Flask-CORS==4.0.0
-scikit-learn==1.3.0
+scikit-learn==1.6.1
 pandas==2.0.3
 numpy==1.24.3
 joblib==1.3.2
@@ -0,0 +1,124 @@
+# Fast JSON responses for the AirSense Delhi API
+# Uses orjson when installed (falls back to the standard json module), handles
+# NumPy values natively, splices pre-encoded fragments for static records and
+# negotiates gzip/brotli compression per request. brotli is optional: without
+# it only gzip is offered.
+import gzip
+import json
+from datetime import date, datetime
+
+import numpy as np
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Small bodies are not worth the compression CPU or the extra header bytes
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _default(obj):
+    '''Encode NumPy and datetime values the base encoder does not know about'''
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _stdlib_dumps(payload):
+    return json.dumps(payload, default=_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(payload):
+        '''Encode a payload to compact JSON bytes'''
+        try:
+            return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # orjson only encodes 64-bit integers; larger ones (echoed client input) are valid JSON
+            return _stdlib_dumps(payload)
+else:
+    def dumps(payload):
+        '''Encode a payload to compact JSON bytes'''
+        return _stdlib_dumps(payload)
+
+
+class StaticFragments:
+    '''Pre-encoded JSON prefixes for static records such as station metadata.
+
+    ``encode(i, fields)`` emits record i's static fields followed by the given
+    per-request fields without re-encoding the static part.
+    '''
+
+    def __init__(self, records, fields):
+        self.fields = tuple(fields)
+        self.prefixes = [dumps({field: record[field] for field in self.fields})[:-1]
+                         for record in records]
+
+    def encode(self, index, dynamic):
+        if not dynamic:
+            return self.prefixes[index] + b'}'
+        return self.prefixes[index] + b',' + dumps(dynamic)[1:]
+
+    def encode_list(self, indices, dynamics):
+        return b'[' + b','.join(self.encode(i, d) for i, d in zip(indices, dynamics)) + b']'
+
+
+def encode_object(fields, raw_fields):
+    '''Encode a dict and splice in values that are already JSON-encoded bytes'''
+    parts = [dumps(key) + b':' + value for key, value in raw_fields.items()]
+    if fields:
+        parts.append(dumps(fields)[1:-1])
+    return b'{' + b','.join(parts) + b'}'
+
+
+def negotiate_encoding(accept_encodings, size):
+    '''Pick the response Content-Encoding for a body of the given size'''
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def bytes_response(body, mimetype, status=200, headers=None):
+    '''Response for an encoded body, compressed if the client accepts it'''
+    encoding = negotiate_encoding(request.accept_encodings, len(body))
+
+    response = Response(compress(body, encoding), status=status,
+                        mimetype=mimetype, headers=headers)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def json_response(payload, status=200, headers=None):
+    '''Drop-in replacement for jsonify; accepts a payload or pre-encoded bytes'''
+    body = payload if isinstance(payload, bytes) else dumps(payload)
+    return bytes_response(body, 'application/json', status, headers)
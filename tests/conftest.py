@@ -0,0 +1,36 @@
+import os
+import sys
+import warnings
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def scada_module():
+    os.environ.setdefault('SCADA_SIMULATE', '0')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        import scada_app
+    return scada_app
+
+
+@pytest.fixture
+def scada_client(scada_module):
+    return scada_module.app.test_client()
@@ -0,0 +1,91 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from admission import DEGRADED, NORMAL, SHED, AdmissionController
+
+REQUEST = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11, 'station': 'anand_vihar'}
+
+
+def reading_cycle_counts(app_module):
+    counters, _ = app_module.metrics.collect()
+    return {result: counters.get(('airsense_cache_requests_total',
+                                  (('cache', 'reading_cycle'), ('result', result))), 0)
+            for result in ('hit', 'miss', 'stale')}
+
+
+def test_stale_reading_cycle_is_counted_as_stale(app_module):
+    key, timestamp, _ = app_module.get_reading_cycle()
+    later = timestamp + timedelta(seconds=app_module.READING_CYCLE_SECONDS * 3)
+    before = reading_cycle_counts(app_module)
+
+    # Degraded requests reuse the outdated cycle instead of rebuilding it
+    stale_key, _, _ = app_module.get_reading_cycle(later, allow_stale=True)
+    assert stale_key == key
+    after_stale = reading_cycle_counts(app_module)
+    assert after_stale['stale'] == before['stale'] + 1
+    assert after_stale['hit'] == before['hit'] and after_stale['miss'] == before['miss']
+
+    fresh_key, _, _ = app_module.get_reading_cycle(later)
+    assert fresh_key != key
+    assert reading_cycle_counts(app_module)['miss'] == after_stale['miss'] + 1
+
+
+def test_levels_follow_in_flight_and_free_slots():
+    admission = AdmissionController(capacity=2, degrade_in_flight=2, max_queue_seconds=0.01)
+    assert admission.admit()[0] == NORMAL
+    assert admission.admit()[0] == DEGRADED
+    assert admission.admit()[0] == SHED
+    admission.release()
+    assert admission.admit()[0] == DEGRADED
+    assert admission.status()['requests'] == {NORMAL: 1, DEGRADED: 2, SHED: 1}
+    assert admission.status()['in_flight'] == 2
+
+
+def test_queueing_latency_degrades():
+    admission = AdmissionController(capacity=1, degrade_in_flight=10, degrade_queue_seconds=0.01,
+                                    max_queue_seconds=1, smoothing=1)
+    admission.admit()
+    threading.Timer(0.05, admission.release).start()
+    level, waited = admission.admit()
+    assert level == DEGRADED and waited >= 0.04
+    admission.release()
+    # The average recovers once requests stop waiting
+    assert admission.admit()[0] == NORMAL
+
+
+@pytest.fixture
+def overloaded(app_module, monkeypatch):
+    '''Swap in a controller that marks every guarded request as degraded'''
+    admission = AdmissionController(capacity=4, degrade_in_flight=1, max_queue_seconds=0.01)
+    monkeypatch.setattr(app_module, 'admission', admission)
+    return admission
+
+
+def test_degraded_predict_uses_the_cheap_tiers(app_module, client, overloaded):
+    if app_module.linear_model is None:
+        pytest.skip('linear model not exported')
+    response = client.post('/api/predict', json=dict(REQUEST, aqi_lag1=200))
+    assert response.status_code == 200 and response.headers['X-AirSense-Load'] == DEGRADED
+    assert response.get_json()['model'] == 'Linear Regression'
+    if app_module.lookup_table is not None:
+        # Requests the lookup table covers keep the boosted models' answer
+        assert client.post('/api/predict', json=REQUEST).get_json()['model'] == 'Gradient Boosting Regressor'
+    assert overloaded.in_flight == 0
+
+
+def test_shed_requests_get_stale_data_or_503(client, overloaded):
+    client.get('/api/current')
+    held = [overloaded.admit() for _ in range(overloaded.capacity)]
+    try:
+        response = client.post('/api/predict', json=REQUEST)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(overloaded.retry_after)
+        # /api/current still has the snapshot from the earlier request
+        current = client.get('/api/current')
+        assert current.status_code == 200 and current.headers['X-AirSense-Load'] == SHED
+    finally:
+        for _ in held:
+            overloaded.release()
+    assert overloaded.in_flight == 0
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('bbox', ['nan,nan,nan,nan', '28.4,76.8,inf,77.4', '-100,76.8,28.9,77.4',
+                                  '28.4,76.8,28.9,200', '28.9,76.8,28.4,77.4', '28.4,76.8,28.9'])
+def test_invalid_bbox_is_rejected(client, bbox):
+    assert client.get(f'/api/stations?bbox={bbox}').status_code == 400
+    assert client.get(f'/api/grid?bbox={bbox}').status_code == 400
+
+
+def test_valid_bbox(client):
+    assert client.get('/api/stations?bbox=28.4,76.8,28.9,77.4').status_code == 200
+    assert client.get('/api/grid?bbox=28.4,76.8,28.9,77.4&rows=10&cols=10').status_code == 200
+
+
+@pytest.mark.parametrize('lat,lng', [('nan', '77.2'), ('28.6', 'inf'), ('1000', '77.2'), ('28.6', '-181')])
+def test_nearest_rejects_invalid_point(client, lat, lng):
+    assert client.get(f'/api/nearest?lat={lat}&lng={lng}').status_code == 400
+
+
+def test_nearest_batch_rejects_invalid_points(client):
+    response = client.post('/api/nearest', json={'locations': [[28.6, 77.2], [float('nan'), 77.2]]})
+    assert response.status_code == 400
+    response = client.post('/api/nearest', json={'locations': [[28.6, 77.2], [95, 77.2]]})
+    assert response.status_code == 400
+
+
+def test_nearest_far_point_matches_brute_force(app_module):
+    index = app_module.STATION_INDEX
+    indices, _ = index.nearest(-89.9, -179.9, k=3)
+    brute, _ = index.nearest_batch([-89.9], [-179.9], k=3)
+    assert list(indices) == list(brute[0])
+
+
+ROUTE = [[28.63, 77.22], [28.57, 77.19]]
+
+
+@pytest.mark.parametrize('points', [
+    [[28.63, 77.22], [float('nan'), 77.19]],
+    [[-90, -180], [90, 180]],
+    [[28.63, 77.22], [28.63, 77.22]],
+])
+def test_route_scoring_rejects_invalid_routes(client, points):
+    response = client.post('/api/routes/score', json={'routes': [{'id': 'bad', 'points': points}]})
+    assert response.status_code == 400
+
+
+def test_route_scoring_caps_total_samples(client):
+    zigzag = [[28.41, 76.85], [28.87, 77.34]] * 2500
+    response = client.post('/api/routes/score', json={'routes': [{'id': i, 'points': zigzag} for i in range(100)]})
+    assert response.status_code == 400
+
+
+def test_route_scoring(client):
+    response = client.post('/api/routes/score', json={'routes': [{'id': 'a', 'points': ROUTE}]})
+    assert response.status_code == 200
+    assert response.get_json()['routes'][0]['length_km'] > 0
+
+
+def test_history_rejects_duplicate_fields(client):
+    assert client.get('/api/history?fields=aqi,aqi').status_code == 400
+
+
+def test_binary_series_headers_exposed_cross_origin(client):
+    response = client.get('/api/forecast?format=binary', headers={'Origin': 'https://dashboard.example'})
+    assert response.status_code == 200
+    exposed = {h.strip() for h in response.headers['Access-Control-Expose-Headers'].split(',')}
+    assert {'X-Series-Start', 'X-Series-Step', 'X-Series-Count', 'X-Series-Columns'} <= exposed
+
+
+def test_admin_denied_without_configured_token(client, monkeypatch, app_module):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', None)
+    assert client.get('/admin/profile?format=status').status_code == 403
+    assert client.get('/admin/admission', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_admin_requires_matching_token(client, monkeypatch, app_module):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 's3cret')
+    assert client.get('/admin/admission', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/admission', headers={'X-Admin-Token': 's3cret'}).status_code == 200
+
+
+PREDICT_BASE = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11}
+
+
+@pytest.fixture
+def predicted_rows(app_module, monkeypatch):
+    '''Feature rows /api/predict hands to the model'''
+    rows = []
+
+    class Recorder:
+        def predict(self, X):
+            rows.append(np.asarray(X).reshape(-1))
+            return np.array([100.0])
+
+    monkeypatch.setattr(app_module, 'model', Recorder())
+    # Route every request to the model, past the lookup table and interval models
+    monkeypatch.setattr(app_module, 'lookup_table', None, raising=False)
+    monkeypatch.setattr(app_module, 'interval_forest', None, raising=False)
+    return rows
+
+
+def test_predict_defaults_for_optional_fields(app_module, client, predicted_rows):
+    assert client.post('/api/predict', json=PREDICT_BASE).status_code == 200
+    row, column = predicted_rows[0], app_module.feature_columns.index
+    assert row[column('day_of_week')] == 0 and row[column('is_weekend')] == 0
+    assert row[column('aqi_lag1')] == 150
+    assert row[column('pm2_5_lag1')] == 85 and row[column('is_rush_hour')] == 1
+    assert not any(value for name, value in zip(app_module.feature_columns, row) if name.startswith('station_'))
+
+
+@pytest.mark.parametrize('station', ['Anand Vihar', 'anand_vihar'])
+def test_predict_honors_station_day_of_week_and_aqi_lag1(app_module, client, predicted_rows, station):
+    body = dict(PREDICT_BASE, station=station, day_of_week=6, aqi_lag1=300)
+    assert client.post('/api/predict', json=body).status_code == 200
+    row, column = predicted_rows[0], app_module.feature_columns.index
+    assert row[column('day_of_week')] == 6 and row[column('is_weekend')] == 1
+    assert row[column('aqi_lag1')] == 300
+    dummies = {name: value for name, value in zip(app_module.feature_columns, row) if name.startswith('station_')}
+    assert dummies.pop('station_Anand Vihar') == 1 and not any(dummies.values())
+
+
+def test_predict_ignores_unknown_station(app_module, client, predicted_rows):
+    assert client.post('/api/predict', json=dict(PREDICT_BASE, station='Nowhere')).status_code == 200
+    row = predicted_rows[0]
+    assert not any(value for name, value in zip(app_module.feature_columns, row) if name.startswith('station_'))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from apportionment import SOURCE_SIGNATURES, apportion_sources, factorize, label_factors
+from scenarios import DEFAULT_SHARES, POLLUTANTS, SOURCES
+
+STATIONS = ['Anand Vihar', 'IGI Airport', 'R.K. Puram']
+
+
+@pytest.fixture(scope='module')
+def synthetic_history():
+    '''Readings mixed from the reference source profiles with known hourly activity'''
+    rng = np.random.default_rng(0)
+    n = 24 * 365
+    activity = rng.gamma(2.0, 1.0, size=(n, len(SOURCES)))
+    timestamp = pd.date_range('2024-01-01', periods=n, freq='h')
+    # Stubble only burns in Oct-Dec, and so its share should peak there
+    activity[:, SOURCES.index('stubble')] *= np.where(timestamp.month >= 10, 3.0, 0.1)
+    readings = activity @ (DEFAULT_SHARES * 100)
+    frame = pd.DataFrame(readings, columns=POLLUTANTS)
+    frame['timestamp'] = timestamp
+    frame['station'] = np.array(STATIONS)[np.arange(n) % len(STATIONS)]
+    return frame
+
+
+def test_label_factors_recovers_permuted_signatures():
+    order = [2, 0, 3, 1]
+    shuffled = DEFAULT_SHARES[order]
+    assert [order[i] for i in label_factors(shuffled)] == list(range(len(SOURCES)))
+
+
+def test_apportionment_recovers_known_sources(synthetic_history):
+    result = apportion_sources(synthetic_history)
+    assert result.stations == STATIONS
+    assert result.explained_variance > 0.99
+
+    # NMF is only unique up to mixing, so profiles match their signatures closely, not exactly
+    profiles = result.profiles / np.linalg.norm(result.profiles, axis=1, keepdims=True)
+    assert (np.sum(profiles * SOURCE_SIGNATURES, axis=1) > 0.85).all()
+
+    assert result.attribution.shape == (len(STATIONS), 12, len(SOURCES), len(POLLUTANTS))
+    assert result.pm25_share.shape == (len(STATIONS) + 1, 12, len(SOURCES))
+    assert np.allclose(result.pm25_share.sum(axis=2), 100)
+    stubble = result.pm25_share[-1, :, SOURCES.index('stubble')]
+    assert stubble[9:].min() > stubble[:9].max()
+
+
+def test_factorize_matches_scikit_learn_cd_solver():
+    decomposition = pytest.importorskip('sklearn.decomposition')
+    rng = np.random.default_rng(1)
+    V = rng.random((500, 4)) @ rng.random((4, 6)) + 0.01 * rng.random((500, 6))
+    W, H = factorize(V, 4, max_iter=1000)
+    nmf = decomposition.NMF(4, init='nndsvda', max_iter=1000)
+    W_ref = nmf.fit_transform(V)
+    assert (W >= 0).all() and (H >= 0).all()
+    assert np.allclose(W @ H, W_ref @ nmf.components_, atol=1e-6)
+
+
+def test_policy_sources_endpoint(app_module, client):
+    app_module.apportionment_job.result(timeout=300)
+    city = client.get('/api/policy/sources?month=11').get_json()
+    assert city['station'] == 'All stations' and city['month'] == 11
+    assert [s['source'] for s in city['sources']] == SOURCES
+    assert sum(s['contribution'] for s in city['sources']) == pytest.approx(100, abs=0.5)
+
+    station = client.get('/api/policy/sources?station=anand_vihar&month=11').get_json()
+    assert station['station'] == 'Anand Vihar'
+    assert client.get('/api/policy/sources?station=nowhere').status_code == 404
+    assert client.get('/api/policy/sources?month=x').status_code == 400
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from tree_arrays import FlatForest
+
+REQUEST = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11, 'station': 'anand_vihar'}
+
+
+@pytest.fixture(scope='module')
+def toy_models():
+    ensemble = pytest.importorskip('sklearn.ensemble')
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    y = 3 * X[:, 0] + np.where(X[:, 2] > 0, 2.0, 0.0)  # features 1 and 3 carry nothing
+    point = ensemble.GradientBoostingRegressor(n_estimators=30, max_depth=2, random_state=0).fit(X, y)
+    upper = ensemble.GradientBoostingRegressor(loss='quantile', alpha=0.9, n_estimators=30, max_depth=3,
+                                                random_state=0).fit(X, y)
+    return X, point, upper
+
+
+def test_contributions_add_up_to_each_models_prediction(toy_models):
+    X, point, upper = toy_models
+    forest = FlatForest([point, upper])
+    for model, fitted in enumerate((point, upper)):
+        bias, contributions = forest.contributions(X, model=model)
+        assert contributions.shape == X.shape
+        assert np.allclose(bias + contributions.sum(axis=1), fitted.predict(X))
+
+
+def test_unused_features_get_no_credit(toy_models):
+    X, point, _ = toy_models
+    used = np.unique(np.concatenate([tree.tree_.feature[tree.tree_.feature >= 0]
+                                     for tree in point.estimators_[:, 0]]))
+    _, contributions = FlatForest([point]).contributions(X)
+    unused = np.setdiff1d(np.arange(X.shape[1]), used)
+    assert (contributions[:, unused] == 0).all()
+    # The dominant feature carries most of the attribution
+    assert np.abs(contributions[:, 0]).mean() > np.abs(contributions[:, 1:]).mean(axis=0).max()
+
+
+def test_explain_single_request(app_module, client):
+    body = client.post('/api/predict/explain', json=REQUEST).get_json()
+    total = body['base_value'] + sum(c['contribution'] for c in body['contributions'])
+    assert abs(total - body['predicted_aqi']) <= 1
+    assert abs(sum(body['groups'].values()) + body['base_value'] - total) < 0.1
+    assert set(body['groups']) == set(app_module.FEATURE_GROUP_NAMES)
+    contributions = [abs(c['contribution']) for c in body['contributions']]
+    assert contributions == sorted(contributions, reverse=True)
+
+
+def test_explain_batch_is_columnar(app_module, client):
+    records = [REQUEST, dict(REQUEST, pm25=300, hour=20)]
+    body = client.post('/api/predict/explain', json={'records': records}).get_json()
+    assert body['count'] == 2 and body['features'] == app_module.feature_columns
+    contributions = np.array(body['contributions'])
+    assert contributions.shape == (2, len(app_module.feature_columns))
+    assert np.allclose(body['base_value'] + contributions.sum(axis=1), body['predictions'], atol=0.05)
+    assert body['predictions'][1] > body['predictions'][0]
+
+
+@pytest.mark.parametrize('body', [
+    {'pm25': 85},
+    {'records': []},
+    {'records': {'pm25': 85}},
+    {'records': [REQUEST, 'x']},
+    {'records': [dict(REQUEST, pm25='high')]},
+])
+def test_explain_rejects_malformed_input(client, body):
+    assert client.post('/api/predict/explain', json=body).status_code == 400
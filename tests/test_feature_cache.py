@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import feature_cache
+from conftest import ROOT
+from features import engineer_features
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'readings.csv'
+    pd.read_csv(os.path.join(ROOT, 'delhi_air_quality_2024.csv'), nrows=200).to_csv(path, index=False)
+    return path
+
+
+def test_second_load_reuses_the_cached_matrix(data_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    built = feature_cache.load_features(data_path, cache_dir)
+    cached = feature_cache.load_features(data_path, cache_dir)
+    assert not built.cached and cached.cached and cached.key == built.key
+    assert isinstance(cached.X, np.memmap)
+    assert cached.feature_columns == built.feature_columns
+    assert np.array_equal(cached.X, built.X)
+    assert np.array_equal(cached.targets['aqi'], built.targets['aqi'])
+
+    # Same matrix engineer_features() builds from the CSV directly
+    df, columns = engineer_features(pd.read_csv(data_path))
+    assert columns == cached.feature_columns
+    assert np.array_equal(cached.X, df[columns].to_numpy(dtype=np.float64))
+
+
+def test_editing_the_csv_changes_the_key(data_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    first = feature_cache.load_features(data_path, cache_dir)
+    frame = pd.read_csv(data_path)
+    frame.loc[0, 'pm2_5'] += 1
+    frame.to_csv(data_path, index=False)
+    edited = feature_cache.load_features(data_path, cache_dir)
+    assert edited.key != first.key and not edited.cached
+
+
+def test_spec_version_bump_invalidates_the_cache(data_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    first = feature_cache.load_features(data_path, cache_dir)
+    monkeypatch.setattr(feature_cache, 'FEATURE_SPEC_VERSION', feature_cache.FEATURE_SPEC_VERSION + 1)
+    bumped = feature_cache.load_features(data_path, cache_dir)
+    assert bumped.key != first.key and not bumped.cached
+    assert bumped.key.endswith(f'-v{feature_cache.FEATURE_SPEC_VERSION}')
+
+
+def test_partial_entry_is_rebuilt(data_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    key = feature_cache.load_features(data_path, cache_dir).key
+    # An entry without meta.json (a crashed writer) is never read
+    (cache_dir / key / 'meta.json').unlink()
+    assert not feature_cache.load_features(data_path, cache_dir).cached
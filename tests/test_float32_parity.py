@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeatureAssembler
+from model_export import EXPORT_PATH, load_models
+from scenarios import history_matrix
+
+# AQI bound float32 serving must hold against float64 (bench_float32.py --max-error default)
+MAX_AQI_ERROR = 0.01
+
+
+@pytest.fixture(scope='module')
+def history():
+    frame = pd.read_csv('delhi_air_quality_2024.csv', parse_dates=['timestamp'])
+    return frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def matrices(history):
+    columns = load_models(EXPORT_PATH).feature_columns
+    stations = sorted(history['station'].unique())
+    return {dtype: history_matrix(history, FeatureAssembler(columns, dtype=dtype), stations)[0]
+            for dtype in (np.float64, np.float32)}
+
+
+@pytest.fixture(scope='module')
+def forests():
+    return {dtype: load_models(EXPORT_PATH, dtype=dtype).forest for dtype in (np.float64, np.float32)}
+
+
+def test_float32_batch_predictions_within_bound(matrices, forests):
+    wide = forests[np.float64].predict(matrices[np.float64])
+    narrow = forests[np.float32].predict(matrices[np.float32])
+    assert wide.shape == narrow.shape == (len(matrices[np.float64]), forests[np.float64].n_models)
+    assert np.abs(wide - narrow).max() <= MAX_AQI_ERROR
+    assert (np.round(wide) == np.round(narrow)).mean() > 0.999
+
+
+def test_float32_request_sized_predictions_within_bound(matrices, forests):
+    rows = np.random.default_rng(0).choice(len(matrices[np.float64]), 200, replace=False)
+    for i in rows:
+        wide = forests[np.float64].predict(matrices[np.float64][i:i + 1])
+        narrow = forests[np.float32].predict(matrices[np.float32][i:i + 1])
+        assert np.abs(wide - narrow).max() <= MAX_AQI_ERROR
+
+
+def test_float32_level_walk_within_bound(matrices, forests):
+    # The node-array walk used for trees too deep for comparison-code tables
+    X64, X32 = matrices[np.float64][:2000], matrices[np.float32][:2000]
+    wide = forests[np.float64]._walk(X64)
+    narrow = forests[np.float32]._walk(X32)
+    assert np.abs(wide - forests[np.float64].predict(X64)).max() <= 1e-9
+    assert np.abs(wide - narrow).max() <= MAX_AQI_ERROR
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeatureAssembler
+from scenarios import history_matrix
+
+# aqi_lag1 is not a lookup-table field, so this request is answered by the models
+MODEL_REQUEST = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11, 'aqi_lag1': 200}
+
+
+def test_predict_returns_ordered_interval(app_module, client):
+    if app_module.interval_forest is None:
+        pytest.skip('quantile models not exported')
+    body = client.post('/api/predict', json=MODEL_REQUEST).get_json()
+    interval = body['interval']
+    assert list(interval) == app_module.quantile_labels == ['p10', 'p50', 'p90']
+    assert interval['p10'] <= interval['p50'] <= interval['p90']
+    assert body['confidence'] == f"80% interval {interval['p10']}-{interval['p90']}"
+
+
+def test_linear_model_has_no_interval(app_module, client):
+    if app_module.linear_model is None:
+        pytest.skip('linear model not exported')
+    body = client.post('/api/predict?model=linear', json=MODEL_REQUEST).get_json()
+    assert body['interval'] is None and body['model'] == 'Linear Regression'
+
+
+def test_intervals_are_sorted_and_cover_most_readings(app_module):
+    if app_module.interval_forest is None:
+        pytest.skip('quantile models not exported')
+    history = pd.read_csv('delhi_air_quality_2024.csv', parse_dates=['timestamp'])
+    history = history.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    stations = sorted(history['station'].unique())
+    X = history_matrix(history, FeatureAssembler(app_module.feature_columns), stations)[0]
+    point, bounds = app_module.predict_with_interval(X)
+
+    assert bounds.shape == (len(X), len(app_module.quantiles))
+    assert (np.diff(bounds, axis=1) >= 0).all()
+    aqi = history['aqi'].to_numpy()
+    covered = (aqi >= bounds[:, 0]) & (aqi <= bounds[:, -1])
+    # p10-p90 is an 80% interval; allow for the in-sample rows and the time split
+    assert 0.6 <= covered.mean() <= 0.97
+    assert np.median(np.abs(point - bounds[:, 1])) < np.median(bounds[:, -1] - bounds[:, 0])
@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+
+from features import PREDICT_DEFAULTS, FeatureAssembler
+from lookup_table import INTERPOLATED_AXES, LookupTable, build_lookup_table
+from model_export import load_models
+
+REQUEST = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11, 'station': 'anand_vihar'}
+
+
+@pytest.fixture(scope='module')
+def exported():
+    return load_models()
+
+
+@pytest.fixture(scope='module')
+def table_path(exported, tmp_path_factory):
+    # Two knots per interpolated axis keeps the build to a few seconds
+    path = str(tmp_path_factory.mktemp('lut') / 'lut')
+    build_lookup_table(exported.forest, exported.feature_columns, path, knots=(2, 2))
+    return path
+
+
+@pytest.fixture(scope='module')
+def table(exported, table_path):
+    return LookupTable.load(table_path, FeatureAssembler(exported.feature_columns))
+
+
+@pytest.mark.parametrize('request_data, covered', [
+    (REQUEST, True),
+    (dict(REQUEST, station='nowhere'), True),
+    (dict(REQUEST, aqi_lag1=PREDICT_DEFAULTS['aqi_lag1']), True),
+    (dict(REQUEST, aqi_lag1=200), False),
+    (dict(REQUEST, hour=9.5), False),
+    (dict(REQUEST, month=13), False),
+    (dict(REQUEST, pm25=float('nan')), False),
+    (dict(REQUEST, pm10=701), False),
+    (dict(REQUEST, no2='45'), False),
+])
+def test_covers_only_default_parameter_requests_inside_the_grid(table, request_data, covered):
+    assert table.covers(request_data) is covered
+
+
+def test_table_matches_the_models_at_the_knots(table, exported):
+    rng = np.random.default_rng(0)
+    stations = ['anand_vihar', 'igi_airport', 'nowhere', None]
+    records = [{'pm25': float(rng.uniform(0, 500)), 'hour': int(rng.integers(24)), 'month': int(rng.integers(1, 13)),
+                'station': stations[i % len(stations)],
+                **{field: float(rng.choice(bounds)) for field, bounds in INTERPOLATED_AXES.items()}}
+               for i in range(300)]
+    expected = exported.forest.predict(table.assembler.matrix(records))
+    predicted = np.array([table.predict(r) for r in records])
+    # PM2.5 is cut at the split points and hours/months share slots only when no split tells them apart
+    assert np.allclose(predicted, expected, atol=1e-2)
+
+
+def test_interpolates_between_the_knots(table):
+    (lo1, hi1), (lo2, hi2) = INTERPOLATED_AXES.values()
+    corners = [table.predict(dict(REQUEST, pm10=pm10, no2=no2)) for pm10 in (lo1, hi1) for no2 in (lo2, hi2)]
+    middle = table.predict(dict(REQUEST, pm10=(lo1 + hi1) / 2, no2=(lo2 + hi2) / 2))
+    assert np.allclose(middle, np.mean(corners, axis=0), atol=1e-3)
+
+
+def test_stale_table_is_rejected(table_path, exported, tmp_path):
+    with open(f'{table_path}.json') as f:
+        meta = json.load(f)
+    for change in ({'models': '0' * 16}, {'version': meta['version'] + 1}):
+        path = tmp_path / 'edited'
+        with open(f'{path}.json', 'w') as f:
+            json.dump(dict(meta, **change), f)
+        with pytest.raises(ValueError):
+            LookupTable.load(str(path), FeatureAssembler(exported.feature_columns))
+
+
+def test_predict_uses_the_table_only_for_covered_requests(app_module, client, table, monkeypatch):
+    sentinel = np.array([999.0] * (1 + len(app_module.quantiles)), dtype=np.float32)
+    monkeypatch.setattr(app_module, 'lookup_table', table)
+    monkeypatch.setattr(table, 'predict', lambda data: sentinel)
+    assert client.post('/api/predict', json=REQUEST).get_json()['predicted_aqi'] == 999
+    fallback = client.post('/api/predict', json=dict(REQUEST, aqi_lag1=200)).get_json()
+    assert fallback['predicted_aqi'] != 999
+
+    # Without a table every request is answered by the models
+    monkeypatch.setattr(app_module, 'lookup_table', None)
+    body = client.post('/api/predict', json=REQUEST).get_json()
+    assert body['predicted_aqi'] != 999 and body['model'] == 'Gradient Boosting Regressor'
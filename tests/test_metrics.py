@@ -0,0 +1,15 @@
+import threading
+
+from metrics import RETIRE_EVERY, MetricsRegistry
+
+
+def test_dead_thread_shards_are_retired_without_scrapes():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests')
+    for _ in range(RETIRE_EVERY * 4):
+        thread = threading.Thread(target=registry.inc, args=('requests_total',))
+        thread.start()
+        thread.join()
+    assert len(registry._shards) <= RETIRE_EVERY
+    counters, _ = registry.collect()
+    assert counters[('requests_total', ())] == RETIRE_EVERY * 4
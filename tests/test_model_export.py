@@ -0,0 +1,120 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from model_export import LinearModel, export_models, load_models
+
+ensemble = pytest.importorskip('sklearn.ensemble')
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 300, size=(500, 6))
+    y = X @ rng.uniform(0, 1, size=6) + np.where(X[:, 1] > 150, 40.0, 0.0)
+    point = ensemble.GradientBoostingRegressor(n_estimators=40, max_depth=3, random_state=0).fit(X, y)
+    quantiles = [ensemble.GradientBoostingRegressor(loss='quantile', alpha=q, n_estimators=40, max_depth=3,
+                                                    random_state=0).fit(X, y) for q in (0.1, 0.9)]
+    return X, point, quantiles
+
+
+@pytest.fixture
+def exported_path(fitted, tmp_path):
+    X, point, quantiles = fitted
+    path = str(tmp_path / 'export')
+    export_models(path, point, [f'f{i}' for i in range(X.shape[1])], quantiles, [0.1, 0.9])
+    return path
+
+
+def test_round_trip_reproduces_the_fitted_models(fitted, exported_path):
+    X, point, quantiles = fitted
+    exported = load_models(exported_path)
+    assert exported.meta['outputs'] == ['point', 'p10', 'p90'] and exported.quantiles == [0.1, 0.9]
+    assert exported.linear is None
+    expected = np.column_stack([m.predict(X) for m in [point, *quantiles]])
+    assert np.allclose(exported.forest.predict(X), expected)
+    assert np.allclose(exported.point.predict(X), point.predict(X))
+    assert np.allclose(exported.point.feature_importances_, point.feature_importances_, atol=1e-6)
+
+
+def test_mismatched_arrays_are_rejected(exported_path, fitted):
+    X, point, _ = fitted
+    # Re-exporting a different model under the same name leaves the old metadata's digest stale
+    with open(f'{exported_path}.json') as f:
+        meta = f.read()
+    export_models(exported_path, point, [f'f{i}' for i in range(X.shape[1])])
+    with open(f'{exported_path}.json', 'w') as f:
+        f.write(meta)
+    with pytest.raises(ValueError, match='does not match'):
+        load_models(exported_path)
+
+
+def test_other_format_versions_are_rejected(exported_path):
+    with open(f'{exported_path}.json') as f:
+        meta = json.load(f)
+    with open(f'{exported_path}.json', 'w') as f:
+        json.dump(dict(meta, version=meta['version'] + 1), f)
+    with pytest.raises(ValueError, match='Unsupported'):
+        load_models(exported_path)
+
+
+def test_shipped_export_matches_the_pickles():
+    joblib = pytest.importorskip('joblib')
+    if not os.path.exists('model_gradient_boosting.pkl'):
+        pytest.skip('models not trained')
+    with open('feature_columns.json') as f:
+        columns = json.load(f)
+    X = pd.DataFrame(np.random.default_rng(0).uniform(0, 300, size=(200, len(columns))), columns=columns)
+    exported = load_models()
+    assert np.allclose(exported.point.predict(X.to_numpy()), joblib.load('model_gradient_boosting.pkl').predict(X))
+    scaler = joblib.load('scaler_linear_regression.pkl')
+    linear = joblib.load('model_linear_regression.pkl')
+    assert np.allclose(exported.linear.predict(X.to_numpy()), linear.predict(scaler.transform(X)))
+
+
+def test_loading_does_not_import_scikit_learn():
+    code = ('import sys, model_export; model_export.load_models(); '
+            "assert 'sklearn' not in sys.modules, 'sklearn imported'")
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+
+
+@pytest.fixture(scope='module')
+def linear_fit():
+    linear_model = pytest.importorskip('sklearn.linear_model')
+    preprocessing = pytest.importorskip('sklearn.preprocessing')
+    rng = np.random.default_rng(2)
+    # Same width as the tree models, on very different scales
+    X = rng.normal(loc=[100, 5, 0.5, 20, 1000, 0], scale=[40, 2, 0.1, 8, 300, 1], size=(300, 6))
+    y = X @ np.array([1.5, -3.0, 40.0, 0.2, 0.01, 5.0]) + rng.normal(size=300)
+    scaler = preprocessing.StandardScaler().fit(X)
+    return X, scaler, linear_model.LinearRegression().fit(scaler.transform(X), y)
+
+
+def test_folded_scaler_matches_the_pipeline(linear_fit):
+    X, scaler, linear = linear_fit
+    folded = LinearModel.from_fitted(linear, scaler)
+    assert np.allclose(folded.predict(X), linear.predict(scaler.transform(X)), rtol=1e-10)
+    # float32 serving stays within rounding of the float64 result
+    single = LinearModel.from_fitted(linear, scaler, dtype=np.float32)
+    assert single.coef.dtype == np.float32
+    assert np.allclose(single.predict(X), folded.predict(X), rtol=1e-4)
+
+
+def test_linear_model_without_a_scaler(linear_fit):
+    X, _, _ = linear_fit
+    plain = pytest.importorskip('sklearn.linear_model').LinearRegression().fit(X, X[:, 0] * 2 + 1)
+    assert np.allclose(LinearModel.from_fitted(plain).predict(X), plain.predict(X))
+
+
+def test_exported_linear_model_round_trips(fitted, linear_fit, tmp_path):
+    _, point, _ = fitted
+    X, scaler, linear = linear_fit
+    path = str(tmp_path / 'export')
+    export_models(path, point, [f'f{i}' for i in range(point.n_features_in_)], linear=linear, scaler=scaler)
+    assert np.allclose(load_models(path).linear.predict(X), linear.predict(scaler.transform(X)))
@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+
+from scada_anomaly import AlarmManager, EWMADetector
+
+
+def score(detector, manager, frame):
+    '''What scada_app.detect_anomalies does with each frame'''
+    z, raised, cleared = detector.update(frame)
+    alarms = []
+    for f, c in zip(*raised):
+        alarm = manager.raise_alarm(('anomaly', f, c), f, 'anomaly', 'high', 0.99)
+        if alarm is not None:
+            detector.acknowledge(f, c)
+            alarms.append(alarm)
+    for f, c in zip(*cleared):
+        manager.clear(('anomaly', f, c))
+    return alarms
+
+
+def test_rate_limited_condition_alarms_once_allowed():
+    rng = np.random.default_rng(0)
+    detector = EWMADetector((1, 2), warmup=10, min_std=1.0)
+    manager = AlarmManager(feeder_burst=1, feeder_refill_seconds=0.05)
+    for _ in range(20):
+        score(detector, manager, 100 + rng.normal(size=(1, 2)))
+
+    # Both channels go out of control; only one alarm fits the feeder's burst
+    assert len(score(detector, manager, np.array([[200.0, 200.0]]))) == 1
+    time.sleep(0.1)
+    # The suppressed condition is retried while it lasts, not silenced
+    assert len(score(detector, manager, np.array([[200.0, 200.0]]))) == 1
+    assert len(score(detector, manager, np.array([[200.0, 200.0]]))) == 0
+    assert len(manager.active) == 2
+
+
+def test_missing_channels_are_not_learned():
+    detector = EWMADetector((1, 2), warmup=5, min_std=1e-6)
+    for value in [10.0, 12.0, 9.0, 11.0, 10.0, 12.0]:
+        detector.update(np.array([[value, value]]))
+    var, count = detector.var[0, 1], detector.count[0, 1]
+    for _ in range(100):
+        detector.update(np.array([[10.0, np.nan]]))
+    assert detector.var[0, 1] == var and detector.count[0, 1] == count
+
+
+def test_partial_posts_do_not_feed_old_values_to_detector(scada_client, scada_module):
+    feeder = scada_module.fleet.ids[0]
+    channel = scada_module.CHANNEL_INDEX['current_a']
+    count = scada_module.detector.count[0, channel]
+    for _ in range(20):
+        response = scada_client.post('/api/telemetry', json={'readings': [{'feeder': feeder, 'voltage_a': 11000}]})
+        assert response.status_code == 200
+    assert scada_module.detector.count[0, channel] == count
+
+
+def test_suppressed_fault_alarm_is_retried(scada_module, monkeypatch):
+    manager = AlarmManager(feeder_burst=1, feeder_refill_seconds=0.05)
+    monkeypatch.setattr(scada_module, 'alarm_manager', manager)
+    monkeypatch.setattr(scada_module, 'pending_faults', set())
+    feeder = scada_module.fleet.ids[0]
+    code = scada_module.FAULT_TYPES[0]['code']
+    healthy = np.array([scada_module.NO_FAULT] * len(scada_module.fleet), dtype=object)
+    faulted = healthy.copy()
+    faulted[0] = code
+    confidence = np.full(len(healthy), 0.9)
+
+    with scada_module.state_lock:
+        # An earlier alarm used up the feeder's burst, so the fault alarm is suppressed
+        manager.raise_alarm(('other',), feeder, 'other', 'minor', 0.5)
+        scada_module.raise_fault_alarms(healthy, faulted, confidence)
+        assert ('fault', 0, code) not in manager.active
+        assert scada_module.pending_faults == {0}
+
+        # The prediction has not changed, but the pending fault is retried once tokens refill
+        time.sleep(0.1)
+        scada_module.raise_fault_alarms(faulted, faulted, confidence)
+        assert manager.active[('fault', 0, code)]['fault_code'] == code
+        assert not scada_module.pending_faults
+
+        # A fault that clears before it is raised is no longer pending
+        scada_module.raise_fault_alarms(faulted, healthy, confidence)
+        scada_module.raise_fault_alarms(healthy, faulted, confidence)
+        assert scada_module.pending_faults == {0}
+        scada_module.raise_fault_alarms(faulted, healthy, confidence)
+        assert not scada_module.pending_faults
+
+
+def test_dropped_deliveries_are_counted():
+    manager = AlarmManager(subscriber_queue_size=1)
+    manager.subscribe()
+    for n in range(3):
+        manager.raise_alarm(('anomaly', n), f'FDR{n}', 'anomaly', 'minor', 0.5)
+    assert manager.stats()['dropped_deliveries'] == 2
@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize('readings', [
+    ['FDR-X'],
+    [{'feeder': ['FDR-X']}],
+    [{'feeder': 'nope'}],
+])
+def test_malformed_readings_are_rejected(scada_client, readings):
+    assert scada_client.post('/api/telemetry', json={'readings': readings}).status_code == 400
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', float('nan'), True, 'abc', [1]])
+def test_non_finite_values_are_rejected(scada_client, scada_module, value):
+    feeder = scada_module.fleet.ids[0]
+    before = scada_module.fleet.telemetry[0].copy()
+    response = scada_client.post('/api/telemetry', json={'readings': [{'feeder': feeder, 'voltage_a': value}]})
+    assert response.status_code == 400
+    assert (scada_module.fleet.telemetry[0] == before).all()
@@ -0,0 +1,51 @@
+import numpy as np
+
+from scada_model import CHANNELS, CLASSES, FEEDERS, NO_FAULT, FeederFleet
+
+
+class Recorder:
+    '''Stands in for the classifier: records its inputs, always answers the last class'''
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, X):
+        self.batches.append(X)
+        proba = np.zeros((len(X), len(CLASSES)))
+        proba[:, -1] = 0.8
+        proba[:, 0] = 0.2
+        return proba
+
+
+def test_classify_skips_feeders_that_never_reported():
+    fleet = FeederFleet(FEEDERS)
+    model = Recorder()
+    bundle = {'model': model, 'classes': CLASSES}
+
+    prediction, confidence = fleet.classify(bundle)
+    assert not model.batches
+    assert (prediction == NO_FAULT).all() and (confidence == 0).all()
+
+    fleet.ingest(np.array([1]), np.full((1, len(CHANNELS)), 100.0))
+    prediction, confidence = fleet.classify(bundle)
+    assert [len(X) for X in model.batches] == [1]
+    assert prediction[1] == CLASSES[-1] and confidence[1] == 0.8
+    assert (np.delete(prediction, 1) == NO_FAULT).all()
+
+
+def test_isolated_feeders_are_not_classified():
+    fleet = FeederFleet(FEEDERS)
+    model = Recorder()
+    fleet.ingest(slice(None), np.full((len(fleet), len(CHANNELS)), 100.0))
+    fleet.isolated[0] = True
+    prediction, confidence = fleet.classify({'model': model, 'classes': CLASSES})
+    assert len(model.batches[0]) == len(fleet) - 1
+    assert prediction[0] == NO_FAULT and confidence[0] == 1.0
+
+
+def test_cycle_without_classifier_skips_classification(scada_module, scada_client, monkeypatch):
+    monkeypatch.setattr(scada_module, 'bundle', None)
+    predictions = scada_module.cycle_stats['total_predictions']
+    scada_module.run_cycle()
+    assert scada_module.cycle_stats['total_predictions'] == predictions
+    assert scada_client.get('/api/ml/metrics').status_code == 500
@@ -0,0 +1,45 @@
+import numpy as np
+
+from scada_telemetry import TelemetryStore
+
+CHANNELS = ['voltage', 'current']
+
+
+def test_unreported_channels_are_not_recorded():
+    store = TelemetryStore(3, CHANNELS)
+    store.append(100.0, [[230.0, np.nan]], rows=[1])
+    _, _, times, _, _, voltage = store.query(1, 'voltage', 0, 200)
+    _, _, _, _, _, current = store.query(1, 'current', 0, 200)
+    assert list(times) == [100.0] and list(voltage) == [230.0]
+    assert np.isnan(current).all()
+    # Feeders that did not report have no samples at all
+    assert len(store.query(0, 'voltage', 0, 200)[2]) == 0
+
+
+def test_feeders_have_independent_rings():
+    store = TelemetryStore(2, CHANNELS, tiers=[('raw', 0, 10), ('1s', 1, 10)])
+    store.append(0.0, [[1.0, 1.0]], rows=[0])
+    for t in range(1, 50):
+        store.append(float(t), [[2.0, 2.0]], rows=[1])
+    # Feeder 1 wrapped its ring many times; feeder 0 still has its only raw sample
+    tier, _, times, _, _, values = store.query(0, 'voltage', 0, 1)
+    assert tier == 'raw' and list(times) == [0.0] and list(values) == [1.0]
+    assert len(store.query(1, 'voltage', 0, 100, max_points=10)[2]) <= 10
+
+
+def test_aggregates_cascade_per_feeder():
+    store = TelemetryStore(2, CHANNELS, tiers=[('raw', 0, 4), ('1s', 1, 100)])
+    for t, value in [(0.1, 1.0), (0.5, 3.0), (1.2, 5.0), (2.0, 0.0)]:
+        store.append(t, [[value, np.nan]], rows=[0])
+    tier, _, times, lo, hi, mean = store.query(0, 'voltage', 0, 2, max_points=2)
+    assert tier == '1s'
+    assert list(times) == [0.0, 1.0]
+    assert list(lo) == [1.0, 5.0] and list(hi) == [3.0, 5.0] and list(mean) == [2.0, 5.0]
+
+
+def test_memory_follows_reporting_feeders():
+    store = TelemetryStore(5000, CHANNELS)
+    empty = store.nbytes
+    store.append(0.0, [[1.0, 1.0]], rows=[42])
+    assert empty == 0
+    assert store.nbytes < 5000 * 2 * 600 * 4
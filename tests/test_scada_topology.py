@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from scada_model import FEEDERS
+from scada_topology import BUS, FEEDER, SWITCH, build_network
+
+
+@pytest.fixture
+def network():
+    return build_network(FEEDERS)
+
+
+def lost_supply(network, node):
+    '''Brute force: nodes energised now and not once node stops conducting'''
+    energised, _, _ = network._bfs(blocked=node)
+    return set(np.flatnonzero(network.energised & ~energised).tolist())
+
+
+def test_radial_downstream_matches_bfs(network):
+    ties = np.array([node_id.startswith('TIE-') for node_id in network.node_ids])
+    # Normally-open ties carry no supply; everything else is fed
+    assert network.radial and network.energised.sum() == (~ties).sum()
+    for node in np.flatnonzero(network.energised):
+        assert set(network.downstream(node).tolist()) == lost_supply(network, node)
+
+
+def test_meshed_downstream_falls_back_to_bfs(network):
+    tie = next(i for i, node_id in enumerate(network.node_ids) if node_id.startswith('TIE-'))
+    network.set_closed(tie, True)
+    assert not network.radial
+    breaker = network.index['FDR001']
+    # With the tie closed, opening one breaker leaves its feeder fed from its neighbour
+    assert set(network.downstream(breaker).tolist()) == lost_supply(network, breaker)
+    assert len(network.downstream(breaker)) < len(build_network(FEEDERS).downstream(breaker))
+
+
+def test_opening_a_breaker_de_energises_its_feeder(network):
+    breaker = network.index['FDR002']
+    feeder_nodes = [i for i, node_id in enumerate(network.node_ids) if node_id.startswith('FDR002-')]
+    network.set_closed(breaker, False)
+    assert not network.energised[feeder_nodes].any()
+    assert network.energised[network.index['FDR001']]
+
+
+def test_isolate_fault_at_end_of_feeder(network):
+    plan = network.isolate(network.index['FDR001-B5'])
+    device = network.node_ids[plan['device']]
+    assert device == 'FDR001-SW4' and network.kinds[plan['device']] == SWITCH
+    outage = {network.node_ids[i] for i in plan['outage']}
+    assert {'FDR001-B5', 'FDR001-B8-L2'} <= outage and 'FDR001-B3' not in outage
+
+    # The section past the next switch is restorable through the tie to the neighbouring feeder
+    assert [network.node_ids[i] for i in plan['boundary']] == ['FDR001-SW7']
+    restorable = {network.node_ids[i] for i in plan['restorable']}
+    assert 'FDR001-B8' in restorable and 'FDR001-B5' not in restorable
+    assert [network.node_ids[i] for i in plan['tie_switches']] == ['TIE-FDR001-FDR005']
+
+
+def test_isolate_at_breaker_section(network):
+    plan = network.isolate(network.index['FDR003-B1-L1'])
+    assert network.kinds[plan['device']] == FEEDER and network.node_ids[plan['device']] == 'FDR003'
+    assert all(network.kinds[i] in (BUS, SWITCH, FEEDER) for i in plan['outage'])
+    assert network.isolate(network.index['SS-TVM']) is None
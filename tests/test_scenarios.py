@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scenarios import INTERVENTIONS, parse_scenario
+
+
+@pytest.mark.parametrize('spec', [
+    {'reductions': [1, 2]},
+    {'months': 5},
+    {'months': []},
+    {'months': [True]},
+    {'interventions': [[1]]},
+    {'interventions': 'GRAP Stage IV'},
+    {'reductions': {'vehicles': True}},
+    {'reductions': {'vehicles': 1.5}},
+    {'name': ['x']},
+    [],
+])
+def test_malformed_scenarios_raise_value_error(spec):
+    with pytest.raises(ValueError):
+        parse_scenario(spec)
+
+
+def test_scenario_name_and_months():
+    intervention = next(iter(INTERVENTIONS))
+    name, reduction, months = parse_scenario({'interventions': [intervention], 'reductions': {'vehicles': 0.2},
+                                              'months': [11, 12]})
+    assert name == f'{intervention} + 20% less vehicles'
+    assert months == [11, 12] and reduction.max() > 0
+
+
+@pytest.mark.parametrize('spec', [{'reductions': [1, 2]}, {'months': 5}, {'interventions': [[1]]}])
+def test_malformed_scenarios_are_400(client, spec):
+    assert client.post('/api/policy/scenarios', json={'scenarios': [spec]}).status_code == 400
+
+
+def test_concurrent_first_requests_build_one_engine(app_module, monkeypatch):
+    built = []
+
+    def slow_build():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    monkeypatch.setattr(app_module, '_scenarios', {'engine': None, 'effects': None})
+    monkeypatch.setattr(app_module, 'build_scenario_engine', slow_build)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        engines = list(pool.map(lambda _: app_module.get_scenario_engine(), range(8)))
+    assert len(built) == 1 and all(engine is built[0] for engine in engines)
+
+
+def test_intervention_effects_are_warmed_at_startup(app_module, client):
+    app_module.scenario_warmup.result(timeout=300)
+    assert set(app_module._scenarios['effects']) == set(INTERVENTIONS)
+    assert client.get('/api/policy/interventions').status_code == 200
@@ -0,0 +1,24 @@
+import json
+
+import numpy as np
+import pytest
+
+from serialization import dumps
+
+
+@pytest.mark.parametrize('value', [2 ** 64, -2 ** 63 - 1, 10 ** 30])
+def test_integers_beyond_64_bits_are_encoded(value):
+    payload = {'value': value, 'array': np.arange(2), 'nested': [value]}
+    assert json.loads(dumps(payload)) == {'value': value, 'array': [0, 1], 'nested': [value]}
+
+
+def test_unserializable_values_still_raise():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_oversized_integer_input_is_not_a_server_error(client):
+    body = {'pm25': 85, 'pm10': 120, 'no2': 45, 'hour': 9, 'month': 11, 'so2': 2 ** 70}
+    response = client.post('/api/predict', json=body)
+    assert response.status_code == 200
+    assert response.get_json()['input_data']['so2'] == 2 ** 70
@@ -0,0 +1,39 @@
+import sys
+
+import numpy as np
+import pytest
+
+import train_stream
+from conftest import ROOT
+
+
+class Mean:
+    def predict(self, X):
+        return np.full(len(X), 100.0)
+
+
+def test_streamed_metrics_match_whole_array():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(250, 3)), rng.normal(100, 10, size=250)
+    scores = train_stream.streamed_metrics(Mean(), X, y, train_stream.chunks(50, 250, 64))
+    error = 100.0 - y[50:]
+    assert scores['rows'] == 200
+    assert scores['mae'] == pytest.approx(np.abs(error).mean())
+    assert scores['rmse'] == pytest.approx(np.sqrt((error ** 2).mean()))
+
+
+def test_empty_hold_out_raises_value_error():
+    X, y = np.zeros((10, 3)), np.zeros(10)
+    with pytest.raises(ValueError, match='hold-out'):
+        train_stream.streamed_metrics(Mean(), X, y, train_stream.chunks(10, 10, 4))
+
+
+def test_test_share_leaving_no_hold_out_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    with open(f'{ROOT}/delhi_air_quality_2024.csv') as source:
+        (tmp_path / 'small.csv').write_text(''.join(next(source) for _ in range(21)))
+    monkeypatch.chdir(tmp_path)
+    # 1 - 1e-17 rounds to 1.0, so every row would be training data
+    monkeypatch.setattr(sys, 'argv', ['train_stream.py', '--data', 'small.csv', '--test-share', '1e-17'])
+    with pytest.raises(SystemExit):
+        train_stream.main()
+    assert 'no training or no hold-out rows' in capsys.readouterr().err
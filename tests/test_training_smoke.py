@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import ROOT
+from model_export import load_models
+
+FIXTURE_ROWS = 300
+
+
+def test_training_script_runs_on_small_fixture(tmp_path):
+    # script_1.py reads its CSV and writes its models relative to the working directory
+    with open(os.path.join(ROOT, 'delhi_air_quality_2024.csv')) as source:
+        lines = [next(source) for _ in range(FIXTURE_ROWS + 1)]
+    (tmp_path / 'delhi_air_quality_2024.csv').write_text(''.join(lines))
+
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'script_1.py')], cwd=tmp_path,
+                            env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    assert 'Model training completed' in result.stdout
+
+    for name in ('model_gradient_boosting.pkl', 'model_quantiles.pkl', 'feature_columns.json',
+                 'model_export.npz', 'model_export.json'):
+        assert (tmp_path / name).exists(), name
+    models = load_models(str(tmp_path / 'model_export'))
+    row = np.zeros((1, len(models.feature_columns)))
+    assert np.isfinite(models.forest.predict(row)).all()
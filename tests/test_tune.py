@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+import feature_cache
+import tune
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    return X, X @ rng.normal(size=5) + rng.normal(scale=0.1, size=400)
+
+
+def test_interrupted_search_keeps_finished_folds(data, tmp_path, monkeypatch):
+    X, y = data
+    configs = tune.candidate_params(tune.SEARCH_SPACES['ridge'], 'grid', 0, 0)[:2]
+    folds = tune.rolling_origin_folds(len(X), 3, 50)
+    evaluate = tune.evaluate_fold
+    calls = []
+
+    def crash_on_fourth_fit(*args):
+        calls.append(args)
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return evaluate(*args)
+
+    monkeypatch.setattr(tune, 'evaluate_fold', crash_on_fourth_fit)
+    with pytest.raises(KeyboardInterrupt):
+        tune.run_search('ridge', configs, folds, X, y, 'key', str(tmp_path), n_jobs=1)
+    saved = os.listdir(tmp_path / 'folds')
+    assert len(saved) == 3 and all(name.endswith('.json') for name in saved)
+
+    # The rerun only fits the folds that were not saved
+    calls.clear()
+    leaderboard = tune.run_search('ridge', configs, folds, X, y, 'key', str(tmp_path), n_jobs=1)
+    assert len(calls) == 3
+    assert len(leaderboard) == 2 and all(len(entry['folds']) == 3 for entry in leaderboard)
+
+
+def test_fold_cache_is_keyed_on_data(data, tmp_path):
+    X, y = data
+    configs = [{'alpha': 1.0}]
+    folds = tune.rolling_origin_folds(len(X), 2, 50)
+    tune.run_search('ridge', configs, folds, X, y, 'key-a', str(tmp_path), n_jobs=1)
+    tune.run_search('ridge', configs, folds, X, y, 'key-b', str(tmp_path), n_jobs=1)
+    assert len(os.listdir(tmp_path / 'folds')) == 4
+
+
+def test_spec_version_bump_refits_every_fold(data, tmp_path, monkeypatch):
+    X, y = data
+    csv = tmp_path / 'readings.csv'
+    csv.write_text('station,aqi\na,1\n')
+    configs = [{'alpha': 1.0}]
+    folds = tune.rolling_origin_folds(len(X), 2, 50)
+    tune.run_search('ridge', configs, folds, X, y, feature_cache.feature_key(csv), str(tmp_path), n_jobs=1)
+    monkeypatch.setattr(feature_cache, 'FEATURE_SPEC_VERSION', feature_cache.FEATURE_SPEC_VERSION + 1)
+    tune.run_search('ridge', configs, folds, X, y, feature_cache.feature_key(csv), str(tmp_path), n_jobs=1)
+    assert len(os.listdir(tmp_path / 'folds')) == 4
+
+
+def test_rolling_origin_folds_never_train_on_the_future():
+    folds = tune.rolling_origin_folds(1000, 4, 100, gap=24)
+    assert len(folds) == 4 and folds[-1][2] == 1000
+    for train_end, test_start, test_end in folds:
+        assert train_end == test_start - 24 and test_end - test_start == 100
+    assert [fold[2] for fold in folds] == sorted(fold[2] for fold in folds)
+    with pytest.raises(ValueError):
+        tune.rolling_origin_folds(100, 4, 50)
@@ -0,0 +1,59 @@
+# Compact encodings for time-series responses (forecast, history)
+# "rows" is the original array of objects; "columnar" sends parallel arrays
+# with epoch timestamps as start + step (or integer offsets when irregular);
+# "binary" sends the same columns as packed little-endian float32.
+import numpy as np
+
+SERIES_FORMATS = ('rows', 'columnar', 'binary')
+# Layout headers of the binary format (cross-origin clients need them exposed)
+SERIES_HEADERS = ['X-Series-Start', 'X-Series-Step', 'X-Series-Count', 'X-Series-Columns', 'X-Series-Offsets']
+
+
+def epoch_axis(epoch_seconds):
+    '''Describe timestamps as start/step, falling back to offsets if irregular'''
+    epoch_seconds = np.asarray(epoch_seconds, dtype=np.int64)
+    if len(epoch_seconds) == 0:
+        return {'start': None, 'step': None}
+
+    start = int(epoch_seconds[0])
+    deltas = np.diff(epoch_seconds)
+    if len(deltas) == 0 or (deltas == deltas[0]).all():
+        return {'start': start, 'step': int(deltas[0]) if len(deltas) else 0}
+
+    # Offsets are in units of the smallest gap so they stay small integers
+    step = int(np.gcd.reduce(deltas)) or 1
+    return {'start': start, 'step': step, 'offsets': (epoch_seconds - start) // step}
+
+
+def columnar_payload(epoch_seconds, columns, categories=None):
+    '''Parallel-array representation of a series'''
+    payload = epoch_axis(epoch_seconds)
+    payload['count'] = len(epoch_seconds)
+    payload['columns'] = {name: np.asarray(values) for name, values in columns.items()}
+    if categories is not None:
+        payload['categories'] = categories
+    return payload
+
+
+def binary_body(epoch_seconds, columns):
+    '''Packed float32 columns plus headers describing the layout.
+
+    The body is the columns back to back (column-major), so a client can view
+    each one as a Float32Array of length count at offset i * count * 4.
+    '''
+    axis = epoch_axis(epoch_seconds)
+    body = np.stack([np.asarray(values, dtype='<f4') for values in columns.values()]) \
+        if columns else np.empty((0, 0), dtype='<f4')
+
+    headers = {
+        'X-Series-Start': str(axis['start']),
+        'X-Series-Step': str(axis['step']),
+        'X-Series-Count': str(len(epoch_seconds)),
+        'X-Series-Columns': ','.join(columns),
+    }
+    if 'offsets' in axis:
+        # Irregular series carry their int32 offsets as the first block
+        offsets = np.asarray(axis['offsets'], dtype='<i4')
+        headers['X-Series-Offsets'] = 'int32'
+        return offsets.tobytes() + body.tobytes(), headers
+    return body.tobytes(), headers
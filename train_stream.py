@@ -0,0 +1,92 @@
+# Out-of-core training for datasets larger than memory
+# Features come from feature_cache.stream_features() as a float32 memory-mapped
+# matrix, and the model only ever sees one chunk of rows at a time: one
+# partial_fit pass for the StandardScaler statistics, then SGDRegressor epochs
+# over the training chunks in shuffled order. The last --test-share of rows
+# (in time order) is held out and scored chunk by chunk.
+#
+# Usage:
+#   python train_stream.py [--data delhi_air_quality_2024.csv] [--chunk-rows 100000] [--epochs 5]
+import argparse
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from feature_cache import STREAM_CHUNK_ROWS, stream_features
+
+MODEL_PATH = 'model_sgd_streaming.pkl'
+
+
+def chunks(start, stop, size):
+    return [(i, min(i + size, stop)) for i in range(start, stop, size)]
+
+
+def streamed_metrics(model, X, y, bounds):
+    '''MAE, RMSE and R² accumulated chunk by chunk'''
+    n, abs_sum, sq_sum, y_sum, y_sq_sum = 0, 0.0, 0.0, 0.0, 0.0
+    for start, stop in bounds:
+        y_true = np.asarray(y[start:stop], dtype=np.float64)
+        error = model.predict(np.asarray(X[start:stop])) - y_true
+        n += len(y_true)
+        abs_sum += np.abs(error).sum()
+        sq_sum += (error ** 2).sum()
+        y_sum += y_true.sum()
+        y_sq_sum += (y_true ** 2).sum()
+    if n == 0:
+        raise ValueError('No hold-out rows to score; raise --test-share or use more data')
+    total = y_sq_sum - y_sum ** 2 / n
+    return {'mae': abs_sum / n, 'rmse': np.sqrt(sq_sum / n), 'r2': 1 - sq_sum / total, 'rows': n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunked out-of-core training of the AQI model')
+    parser.add_argument('--data', default='delhi_air_quality_2024.csv')
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--test-share', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=MODEL_PATH)
+    args = parser.parse_args()
+    if args.epochs < 1 or args.chunk_rows < 1:
+        parser.error('--epochs and --chunk-rows must be at least 1')
+    if not 0 < args.test_share < 1:
+        parser.error('--test-share must be between 0 and 1')
+
+    started = time.perf_counter()
+    feature_set = stream_features(args.data, chunk_rows=args.chunk_rows)
+    X, y = feature_set.X, feature_set.targets['aqi']
+    print(f"📦 {X.shape[0]} rows x {X.shape[1]} float32 features "
+          f"({'cached' if feature_set.cached else 'streamed from CSV'}, {X.nbytes / 1e6:.1f} MB on disk) "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    split = int(len(X) * (1 - args.test_share))
+    if not 0 < split < len(X):
+        parser.error(f'--test-share {args.test_share} leaves no training or no hold-out rows out of {len(X)}')
+    train_chunks = chunks(0, split, args.chunk_rows)
+    test_chunks = chunks(split, len(X), args.chunk_rows)
+
+    scaler = StandardScaler()
+    for start, stop in train_chunks:
+        scaler.partial_fit(X[start:stop])
+
+    regressor = SGDRegressor(eta0=0.01, alpha=1e-4, random_state=args.seed)
+    rng = np.random.default_rng(args.seed)
+    for epoch in range(1, args.epochs + 1):
+        for k in rng.permutation(len(train_chunks)):
+            start, stop = train_chunks[k]
+            rows = rng.permutation(stop - start)
+            regressor.partial_fit(scaler.transform(X[start:stop])[rows], y[start:stop][rows])
+        model = make_pipeline(scaler, regressor)
+        scores = streamed_metrics(model, X, y, test_chunks)
+        print(f"  epoch {epoch}: hold-out RMSE {scores['rmse']:.2f}, MAE {scores['mae']:.2f}, R² {scores['r2']:.3f}")
+
+    joblib.dump(model, args.output)
+    print(f"✅ Streaming model saved: {args.output} ({time.perf_counter() - started:.1f}s total)")
+
+
+if __name__ == '__main__':
+    main()
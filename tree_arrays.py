@@ -0,0 +1,202 @@
+# Flattened tree ensembles for batched inference
+# The trees of several gradient boosting regressors (e.g. the point model and
+# its p10/p50/p90 quantile models) are packed into one set of node arrays and
+# evaluated together, instead of one predict() call per model.
+#
+# Each tree is padded to a perfect binary tree; all of its split comparisons
+# for a row become the bits of one small integer, and a per-tree table maps
+# that integer to the leaf value. A batch is then a column gather, one
+# comparison, a weighted sum and a table lookup with no per-level gathers:
+# faster than scikit-learn's compiled predict() for shallow boosted trees,
+# from single requests to full-history batches. Deeper trees walk the node
+# arrays one level at a time. Nothing here needs scikit-learn once the arrays
+# exist, so an exported model (see model_export.py) is served through
+# from_arrays() alone.
+#
+# With dtype=np.float32 thresholds and leaf values are stored at half width
+# for memory-bound serving (indices stay intp; narrower ones are recast on every gather).
+# Thresholds are rounded down to the nearest float32, so float32 features take
+# exactly the same branches as in scikit-learn; only leaf values are rounded.
+#
+# The same arrays give per-feature attributions (Saabas path attribution):
+# walking a row down a tree, each split credits its feature with the change
+# in node value, so bias + contributions equals the prediction exactly.
+import numpy as np
+
+# Deepest trees given comparison-code tables (2 ** (2 ** depth - 1) entries per tree)
+CODE_MAX_DEPTH = 3
+# Rows per chunk in batch evaluation (keeps the (splits, rows) comparison block in cache)
+BATCH_CHUNK_ROWS = 512
+# Rows per chunk when attributing large batches (bounds the (rows, trees) work arrays)
+CONTRIBUTION_CHUNK_ROWS = 4096
+
+
+def narrow_thresholds(threshold, dtype):
+    '''Thresholds in dtype such that float32 x <= result exactly when x <= threshold'''
+    if dtype != np.float32:
+        return threshold.astype(dtype)
+    narrow = threshold.astype(np.float32)
+    # Rounding up would send features in (threshold, narrow] the wrong way
+    return np.where(narrow > threshold, np.nextafter(narrow, np.float32(-np.inf)), narrow)
+
+
+def ensemble_arrays(model):
+    '''Node arrays of one fitted GradientBoostingRegressor, its trees concatenated.
+
+    Leaves get feature 0, threshold +inf and themselves as both children, so
+    extra descent steps are no-ops.
+    '''
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        leaf = tree.children_left < 0
+        own = np.arange(tree.node_count) + offset
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        lefts.append(np.where(leaf, own, tree.children_left + offset))
+        rights.append(np.where(leaf, own, tree.children_right + offset))
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+
+    init = getattr(model, 'init_', 'zero')
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'learning_rate': np.float64(model.learning_rate),
+        'init': np.float64(0.0 if init == 'zero' else init.predict(np.zeros((1, model.n_features_in_)))[0]),
+        'depth': np.int32(max(e.tree_.max_depth for e in model.estimators_[:, 0])),
+        'n_features': np.int32(model.n_features_in_),
+    }
+
+
+class FlatForest:
+    '''Node arrays for the trees of one or more fitted GradientBoostingRegressors.
+
+    predict(X) returns (n_rows, n_models) raw predictions, matching each
+    model's own predict() (scikit-learn compares float32 features against
+    float64 thresholds, and so does this). dtype=np.float32 stores
+    thresholds and values in float32 with the same branching.
+    '''
+
+    def __init__(self, models, dtype=np.float64):
+        self._pack([ensemble_arrays(model) for model in models], dtype)
+
+    @classmethod
+    def from_arrays(cls, ensembles, dtype=np.float64):
+        '''FlatForest over ensemble_arrays() dicts, e.g. read back from an export'''
+        forest = cls.__new__(cls)
+        forest._pack(ensembles, dtype)
+        return forest
+
+    def _pack(self, ensembles, dtype):
+        self.dtype = np.dtype(dtype)
+        self.n_models = len(ensembles)
+        self.n_features = int(ensembles[0]['n_features'])
+        self.depth = max(int(e['depth']) for e in ensembles)
+        offsets = np.cumsum([0] + [len(e['feature']) for e in ensembles])
+
+        self.feature = np.concatenate([e['feature'] for e in ensembles]).astype(np.intp)
+        self.threshold = narrow_thresholds(np.concatenate([e['threshold'] for e in ensembles]), self.dtype)
+        self.left = np.concatenate([e['left'] + o for e, o in zip(ensembles, offsets)]).astype(np.intp)
+        self.right = np.concatenate([e['right'] + o for e, o in zip(ensembles, offsets)]).astype(np.intp)
+        self.value = np.concatenate([e['value'] for e in ensembles]).astype(self.dtype)
+        self.roots = np.concatenate([e['roots'] + o for e, o in zip(ensembles, offsets)]).astype(np.intp)
+        # Trees are stored model by model; reduceat sums each model's slice
+        self.owner = np.repeat(np.arange(self.n_models), [len(e['roots']) for e in ensembles])
+        self.starts = np.flatnonzero(np.r_[True, self.owner[1:] != self.owner[:-1]])
+        self.scale = np.concatenate([np.full(len(e['roots']), float(e['learning_rate'])) for e in ensembles])
+        self.init = np.array([float(e['init']) for e in ensembles])
+        self._compile()
+
+    def _compile(self):
+        '''Perfect-tree layout and comparison-code tables for batch predict'''
+        # Level order: position p has children 2p+1 and 2p+2; below a leaf the
+        # leaf repeats, since leaves are their own children
+        splits = 2 ** self.depth - 1
+        nodes = [self.roots]
+        for p in range(splits):
+            nodes += [self.left[nodes[p]], self.right[nodes[p]]]
+        nodes = np.stack(nodes, axis=1)
+        self.split_feature = self.feature[nodes[:, :splits]]
+        # Features are float32-valued either way, so comparing in float32 is exact
+        self.split_threshold = narrow_thresholds(self.threshold[nodes[:, :splits]], np.float32)
+        leaf_value = (self.value[nodes[:, splits:]] * self.scale[:, None]).astype(self.dtype)
+
+        self.code_value = None
+        if 0 < self.depth <= CODE_MAX_DEPTH:
+            # Leaf reached under every pattern of outcomes (bit p set: right at position p)
+            codes = np.arange(2 ** splits)
+            position = np.zeros(len(codes), dtype=np.intp)
+            for _ in range(self.depth):
+                position = 2 * position + 1 + (codes >> position & 1)
+            self.code_value = np.ascontiguousarray(leaf_value[:, position - splits])
+
+    @property
+    def nbytes(self):
+        '''Bytes held by the node arrays'''
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value))
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32).astype(self.dtype, copy=False)
+        if self.code_value is not None:
+            return self._predict_codes(X)
+        return np.concatenate([self._walk(X[start:start + BATCH_CHUNK_ROWS])
+                               for start in range(0, max(len(X), 1), BATCH_CHUNK_ROWS)])
+
+    def _walk(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaves = self.value[node] * self.scale
+        return np.add.reduceat(leaves, self.starts, axis=1) + self.init
+
+    def _predict_codes(self, X):
+        trees, splits = self.split_feature.shape
+        columns = self.split_feature.ravel()
+        thresholds = self.split_threshold.ravel()[:, None]
+        weights = (1 << np.arange(splits)).astype(np.uint8)
+        table = self.code_value.ravel()
+        offsets = (np.arange(trees) * self.code_value.shape[1])[:, None]
+
+        out = np.empty((len(X), self.n_models))
+        for start in range(0, len(X), BATCH_CHUNK_ROWS):
+            block = np.ascontiguousarray(X[start:start + BATCH_CHUNK_ROWS].T, dtype=np.float32)
+            right = (block[columns] > thresholds).view(np.uint8).reshape(trees, splits, -1)
+            code = np.einsum('tpn,p->tn', right, weights)
+            leaves = table[offsets + code]
+            out[start:start + block.shape[1]] = np.add.reduceat(leaves, self.starts, axis=0).T
+        return out + self.init
+
+    def contributions(self, X, model=0):
+        '''(bias, contributions) for one model: bias (n_rows,) plus contributions
+        (n_rows, n_features) summed over features equals its prediction.'''
+        X = np.asarray(X, dtype=np.float32).astype(self.dtype, copy=False)
+        trees = slice(self.starts[model], self.starts[model + 1] if model + 1 < len(self.starts) else None)
+        roots, scale = self.roots[trees], self.scale[trees]
+        bias = np.full(len(X), self.init[model] + (self.value[roots] * scale).sum())
+        contributions = np.zeros((len(X), self.n_features))
+
+        for start in range(0, len(X), CONTRIBUTION_CHUNK_ROWS):
+            chunk = X[start:start + CONTRIBUTION_CHUNK_ROWS]
+            rows = np.arange(len(chunk))[:, None]
+            node = np.broadcast_to(roots, (len(chunk), len(roots)))
+            totals = np.zeros(len(chunk) * self.n_features)
+            for _ in range(self.depth):
+                feature = self.feature[node]
+                go_left = chunk[rows, feature] <= self.threshold[node]
+                child = np.where(go_left, self.left[node], self.right[node])
+                # Leaves map to themselves, so they add nothing once reached
+                delta = (self.value[child] - self.value[node]) * scale
+                totals += np.bincount((rows * self.n_features + feature).ravel(), delta.ravel(),
+                                      minlength=len(totals))
+                node = child
+            contributions[start:start + len(chunk)] = totals.reshape(len(chunk), self.n_features)
+        return bias, contributions
@@ -0,0 +1,201 @@
+# Hyper-parameter search for the AQI models with rolling-origin cross-validation
+# Each configuration is scored on expanding-window folds (train on everything
+# before the fold, test on the next block of hours), so no fold ever trains on
+# the future. (config, fold) fits run in parallel with joblib; the engineered
+# feature matrix comes from the feature cache and each fold's score is written
+# to disk as soon as its fit finishes, so re-running a search (including one
+# that was interrupted) only fits what it has not scored before.
+#
+# Usage:
+#   python tune.py --model gradient_boosting --search grid
+#   python tune.py --model random_forest --search random --n-iter 20 --folds 5 --jobs -1
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from itertools import product
+
+import joblib
+import numpy as np
+
+from feature_cache import load_features
+
+DATA_PATH = 'delhi_air_quality_2024.csv'
+CACHE_DIR = '.tune_cache'
+
+# Search space per model: parameter -> candidate values
+SEARCH_SPACES = {
+    'gradient_boosting': {
+        'n_estimators': [100, 200, 400],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_depth': [2, 3, 5],
+        'subsample': [0.8, 1.0],
+    },
+    'random_forest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 10, 20],
+        'min_samples_leaf': [1, 5, 20],
+        'max_features': [1.0, 0.5, 'sqrt'],
+    },
+    'ridge': {
+        'alpha': [0.01, 0.1, 1.0, 10.0, 100.0],
+    },
+}
+
+
+def make_model(name, params):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if name == 'gradient_boosting':
+        return GradientBoostingRegressor(random_state=42, **params)
+    if name == 'random_forest':
+        # One core per fit; the search itself is what runs in parallel
+        return RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    if name == 'ridge':
+        return make_pipeline(StandardScaler(), Ridge(**params))
+    raise ValueError(f'Unknown model: {name}')
+
+
+def candidate_params(space, search, n_iter, seed):
+    '''Every grid point, or n_iter distinct random draws from the grid'''
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in product(*(space[n] for n in names))]
+    if search == 'grid' or n_iter >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, n_iter)
+
+
+def rolling_origin_folds(n_rows, n_folds, test_size, gap=0):
+    '''(train_end, test_start, test_end) per fold; folds step forward by test_size'''
+    folds = []
+    for k in range(n_folds):
+        test_end = n_rows - (n_folds - 1 - k) * test_size
+        test_start = test_end - test_size
+        train_end = test_start - gap
+        if train_end <= 0:
+            raise ValueError('Not enough rows for this many folds; lower --folds or --test-hours')
+        folds.append((train_end, test_start, test_end))
+    return folds
+
+
+def digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def evaluate_fold(model_name, params, X, y, fold):
+    '''Fit on rows before the fold, score on the fold'''
+    train_end, test_start, test_end = fold
+    model = make_model(model_name, params)
+    started = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    fit_seconds = time.perf_counter() - started
+    y_true, y_pred = y[test_start:test_end], model.predict(X[test_start:test_end])
+    error = y_pred - y_true
+    return {
+        'mae': float(np.abs(error).mean()),
+        'rmse': float(np.sqrt((error ** 2).mean())),
+        'r2': float(1 - (error ** 2).sum() / ((y_true - y_true.mean()) ** 2).sum()),
+        'fit_seconds': round(fit_seconds, 3),
+    }
+
+
+def evaluate_and_store(model_name, params, X, y, fold, path):
+    '''evaluate_fold, then write its score to path (atomically, so a crash leaves no partial file)'''
+    score = evaluate_fold(model_name, params, X, y, fold)
+    staging = f'{path}.tmp-{os.getpid()}'
+    with open(staging, 'w') as f:
+        json.dump(score, f)
+    os.replace(staging, path)
+    return score
+
+
+def run_search(model_name, configs, folds, X, y, data_key, cache_dir, n_jobs):
+    '''Score every (config, fold), reusing cached fold results; returns the leaderboard'''
+    fold_dir = os.path.join(cache_dir, 'folds')
+    os.makedirs(fold_dir, exist_ok=True)
+
+    def fold_path(params, fold):
+        return os.path.join(fold_dir, digest({'data': data_key, 'model': model_name,
+                                              'params': params, 'fold': fold}) + '.json')
+
+    pending = [(params, fold) for params in configs for fold in folds
+               if not os.path.exists(fold_path(params, fold))]
+    print(f"🔁 {len(configs)} configurations x {len(folds)} folds: "
+          f"{len(configs) * len(folds) - len(pending)} cached, {len(pending)} to fit")
+
+    # Each worker saves its own fold, so an interrupted search keeps every finished fit
+    joblib.Parallel(n_jobs=n_jobs, verbose=5 if pending else 0)(
+        joblib.delayed(evaluate_and_store)(model_name, params, X, y, fold, fold_path(params, fold))
+        for params, fold in pending)
+
+    leaderboard = []
+    for params in configs:
+        folds_scored = []
+        for fold in folds:
+            with open(fold_path(params, fold)) as f:
+                folds_scored.append(json.load(f))
+        rmse = np.array([s['rmse'] for s in folds_scored])
+        leaderboard.append({
+            'model': model_name,
+            'params': params,
+            'rmse': round(float(rmse.mean()), 3),
+            'rmse_std': round(float(rmse.std()), 3),
+            'mae': round(float(np.mean([s['mae'] for s in folds_scored])), 3),
+            'r2': round(float(np.mean([s['r2'] for s in folds_scored])), 4),
+            'fit_seconds': round(float(np.mean([s['fit_seconds'] for s in folds_scored])), 3),
+            'folds': folds_scored,
+        })
+    return sorted(leaderboard, key=lambda entry: entry['rmse'])
+
+
+def print_leaderboard(leaderboard, top):
+    print(f"\n🏆 Leaderboard (rolling-origin CV, mean over folds)")
+    print(f"{'rank':<5}{'rmse':>9}{'± std':>9}{'mae':>9}{'r2':>9}{'fit s':>8}  params")
+    for rank, entry in enumerate(leaderboard[:top], 1):
+        print(f"{rank:<5}{entry['rmse']:>9.3f}{entry['rmse_std']:>9.3f}{entry['mae']:>9.3f}"
+              f"{entry['r2']:>9.4f}{entry['fit_seconds']:>8.2f}  {json.dumps(entry['params'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling-origin CV hyper-parameter search for the AQI models')
+    parser.add_argument('--model', choices=sorted(SEARCH_SPACES), default='gradient_boosting')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--n-iter', type=int, default=20, help='configurations to draw for --search random')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--test-hours', type=int, default=720, help='rows per test fold (about a month)')
+    parser.add_argument('--gap', type=int, default=0, help='rows left out between train and test')
+    parser.add_argument('--jobs', type=int, default=-1, help='parallel fits (-1 = all cores)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='write the full leaderboard as JSON')
+    args = parser.parse_args()
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    feature_set = load_features(args.data)
+    X, y, feature_columns = feature_set.X, feature_set.targets['aqi'], feature_set.feature_columns
+    folds = rolling_origin_folds(len(X), args.folds, args.test_hours, args.gap)
+    configs = candidate_params(SEARCH_SPACES[args.model], args.search, args.n_iter, args.seed)
+    print(f"📊 {len(X)} rows, {len(feature_columns)} features; folds test rows "
+          + ', '.join(f'{start}-{end}' for _, start, end in folds))
+
+    started = time.perf_counter()
+    leaderboard = run_search(args.model, configs, folds, X, y, feature_set.key,
+                             args.cache_dir, args.jobs)
+    print_leaderboard(leaderboard, args.top)
+    print(f"\n⏱️ Search finished in {time.perf_counter() - started:.1f}s")
+
+    output = args.output or os.path.join(args.cache_dir, f'leaderboard-{args.model}.json')
+    with open(output, 'w') as f:
+        json.dump(leaderboard, f, indent=2)
+    print(f"✅ Leaderboard saved: {output}")
+
+
+if __name__ == '__main__':
+    main()